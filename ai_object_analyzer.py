@@ -14,8 +14,24 @@ import time
 import os
 from typing import Dict, List, Tuple, Optional
 import threading
-from queue import Queue
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
+from crop_hash_cache import PerceptualHashCache, compute_dhash
+from analysis_store import AnalysisStore
+from http_transport import get_transport, get_transport_stats, iter_sse_data
+from provider_dispatcher import CallCancelled, HedgedDispatcher, current_cancel_event
+from provider_health import ProviderRouter
+from rate_limiter import ProviderRateLimiter
+from analysis_job_queue import AnalysisJobQueue
+from crop_encoder import CropEncoderPool, CropPayload, EncodedCrop, encode_crop_jpeg
+from image_sizing import OPENAI_DETAIL, ImageSizingPolicy
+from structured_output import (BRAND_MODEL_FIELDS, FULL_FIELDS, build_batch_schema, build_schema,
+                               compact_batch_prompt, compact_prompt, parse_analysis, parse_batch,
+                               to_gemini_schema, COMPACT_KEYS, StreamingJSONParser)
+from local_attributes import LocalAttributeExtractor
+from offline_spool import OfflineJobSpool
+from provider_registry import JobCallLedger, get_provider_registry
 
 class AIObjectAnalyzer:
     """AI API를 활용한 객체 상세 분석 클래스"""
@@ -25,18 +41,18 @@ class AIObjectAnalyzer:
             'openai': {
                 'enabled': False,
                 'api_key': os.getenv('OPENAI_API_KEY'),
-                'endpoint': 'https://api.openai.com/v1/chat/completions',
-                'model': 'gpt-4-vision-preview'
+                'endpoint': os.getenv('OPENAI_API_ENDPOINT', 'https://api.openai.com/v1/chat/completions'),
+                'model': 'gpt-4o-mini'   # 이미지 입력 + JSON 스키마 출력 지원
             },
             'anthropic': {
                 'enabled': False,
                 'api_key': os.getenv('ANTHROPIC_API_KEY'),
-                'endpoint': 'https://api.anthropic.com/v1/messages',
+                'endpoint': os.getenv('ANTHROPIC_API_ENDPOINT', 'https://api.anthropic.com/v1/messages'),
                 'model': 'claude-3-sonnet-20240229'
             },            'google': {
                 'enabled': False,
                 'api_key': os.getenv('GOOGLE_API_KEY'),
-                'endpoint': 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent',
+                'endpoint': os.getenv('GOOGLE_API_ENDPOINT', 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent'),
                 'model': 'gemini-2.0-flash'
             },
             'github_copilot': {
@@ -47,10 +63,15 @@ class AIObjectAnalyzer:
             }
         }
         
-        # GitHub Copilot 통합 초기화
+        # 공용 제공자 레지스트리 (Copilot 통합과 전송 계층/작업별 중복 호출 기록 공유)
+        self.provider_registry = get_provider_registry()
+        for provider in self.api_providers:
+            self.provider_registry.register(provider)
+        
+        # GitHub Copilot 통합 초기화 (CLI 기능 확인은 캐시 또는 백그라운드 - 시작을 막지 않음)
         try:
             from github_copilot_integration import GitHubCopilotIntegration
-            self.copilot_integration = GitHubCopilotIntegration()
+            self.copilot_integration = GitHubCopilotIntegration(registry=self.provider_registry)
             if self.copilot_integration.is_available():
                 self.api_providers['github_copilot']['enabled'] = True
                 print("✅ GitHub Copilot 통합 활성화")
@@ -63,13 +84,38 @@ class AIObjectAnalyzer:
         # API 설정 확인
         self.check_api_availability()
         
-        # 분석 캐시 (같은 객체 반복 분석 방지)
-        self.analysis_cache = {}
-        self.cache_expire_time = 300  # 5분
+        # 제공자별 keep-alive 연결 풀 (프로세스 전체 공유)
+        self.transports = {
+            provider: self.provider_registry.transport(provider)
+            for provider in ('openai', 'anthropic', 'google')
+        }
+        
+        # 트랙별 분석 캐시 (트랙 ID → 분석 결과, 트랙이 살아있는 동안 재사용)
+        self.analysis_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.cache_expire_time = 300  # 5분 (추적이 끊긴 항목 정리 기준)
+        self.max_cache_entries = 256  # 초과 시 가장 오래 사용되지 않은 항목부터 제거
+        
+        # 크롭 지각 해시 캐시 (트랙이 바뀌어도 같은 모습의 물체는 재분석하지 않음)
+        self.phash_cache = PerceptualHashCache(max_entries=512, ttl=600, max_distance=6)
+        
+        # 영구 분석 저장소 (재시작 후에도 API 호출 없이 재사용, 여러 프로세스 공유)
+        try:
+            self.analysis_store = AnalysisStore()
+            print(f"💾 분석 저장소 연결: {self.analysis_store.db_path}")
+        except Exception as e:
+            self.analysis_store = None
+            print(f"⚠️ 분석 저장소 사용 불가: {e}")
         
-        # 비동기 분석을 위한 큐
-        self.analysis_queue = Queue()
+        # 비동기 분석을 위한 우선순위 큐 (점수 높은 작업 우선, 사라진 트랙 작업은 폐기)
+        self.active_track_ids = None    # 추적기가 알려준 현재 트랙 ID (None이면 확인 안 함)
+        self.analysis_queue = None
         self.result_cache = {}
+        self.result_lock = threading.Lock()
+        self.pending_tracks = set()     # 분석 대기/진행 중인 트랙 ID
+        self.result_generation = 0      # 트랙 리셋 시 이전 작업 결과 무시용
+        self.analysis_workers = []
+        self.workers_running = False
         
         # 분석 설정
         self.analysis_settings = {
@@ -78,8 +124,104 @@ class AIObjectAnalyzer:
                 'brand', 'model', 'type', 'color', 'condition', 'distinctive_features'
             ],
             'confidence_threshold': 0.7,
-            'max_analysis_time': 10  # 초
+            'max_analysis_time': 10,  # 초
+            'num_workers': 2,         # 비동기 분석 워커 수
+            'max_pending_jobs': 8,    # 대기열 최대 작업 수 (초과 시 점수 낮은 작업부터 밀려남)
+            'min_class_priority': 5,  # 이 값보다 우선순위가 낮은 클래스는 분석하지 않음
+            'priority_weights': {     # 작업 점수 가중치
+                'class': 0.4,         # 클래스 우선순위 (analysis_priority)
+                'area': 0.2,          # 화면 대비 크롭 면적
+                'confidence': 0.2,    # 검출 신뢰도
+                'stability': 0.2      # 트랙 안정성 (stable_count)
+            },
+            'hedge_delay': 3.0,       # 측정값이 없을 때 다음 제공자를 병렬 시작하기까지 대기 (초)
+            'hedge_percentile': 90,   # 제공자별 헤지 지연 = 측정된 지연 시간의 p90
+            'job_deadline': 15.0,     # 작업 하나의 전체 마감 시간 (초)
+            'batching_enabled': True, # 여러 크롭을 한 번의 요청으로 묶어 전송
+            'batch_max_items': 4,     # 배치당 최대 크롭 수
+            'batch_max_wait_ms': 150, # 배치를 채우기 위해 기다리는 최대 시간
+            'local_attributes': True,   # 색상/대략적 타입은 로컬에서 계산, 원격에는 브랜드/모델만 요청
+            'local_only_classes': ['person'],  # 로컬 속성만으로 충분한 클래스 (원격 분석 생략)
+            'escalation': {             # 저렴한 제공자 먼저, 불확실한 결과만 비싼 제공자로 상향
+                'enabled': True,
+                'cheap_providers': ['google', 'github_copilot'],
+                'min_confidence': 0.6,  # 이보다 낮으면 상향
+                'escalate_unknown_brand': True  # 브랜드를 알아내지 못하면 상향
+            },
+            'streaming': True,          # 스트리밍 응답으로 브랜드/모델을 먼저 표시
+            'offline_spool': {          # 모든 제공자 실패/호출 한도 초과 작업을 디스크에 보관 후 복구 시 재분석
+                'enabled': True,
+                'max_bytes': 200 * 1024 * 1024,
+                'max_jobs': 5000,
+                'drain_interval': 5.0   # 드레이너 확인 간격 (초, 실패 시 최대 120초까지 늘어남)
+            },
+            'structured_output': True,  # 축약 스키마 + 제공자 네이티브 JSON 모드 (출력 토큰/파싱 실패 감소)
+            'image_detail': 'medium', # 전송 이미지 상세도 (low: 256px, medium: 384px, high: 512px)
+            'image_token_limits': {   # 제공자별 이미지 1장 토큰 상한
+                'openai': 85,         # detail 'low' 고정 1장분
+                'anthropic': 350,     # 약 512×512 픽셀
+                'google': 258         # 고정 1장분
+            }
+        }
+        self.analysis_queue = AnalysisJobQueue(maxsize=self.analysis_settings['max_pending_jobs'],
+                                               is_stale=self._is_stale_job,
+                                               on_discard=self._discard_job)
+        
+        # 제공자 우선순위 및 헤지 디스패처
+        self.provider_order = ['google', 'github_copilot', 'openai', 'anthropic']
+        self.provider_functions = {
+            'google': self.analyze_with_google,
+            'github_copilot': self.analyze_with_github_copilot,
+            'openai': self.analyze_with_openai,
+            'anthropic': self.analyze_with_anthropic
+        }
+        self.batch_provider_functions = {
+            'google': self.analyze_batch_with_google,
+            'openai': self.analyze_batch_with_openai,
+            'anthropic': self.analyze_batch_with_anthropic
+        }
+        self.batch_stats = {'batches': 0, 'batched_items': 0, 'requests_saved': 0}
+        self.escalation_stats = {'jobs': 0, 'accepted_cheap': 0, 'escalated': 0, 'improved': 0}
+        # 배치 항목별 상향을 병렬로 실행 (배치 전체가 하나의 마감 시간을 공유, 첫 배치에서 시작)
+        self.escalation_executor = None
+        self.escalation_executor_lock = threading.Lock()
+        self.streaming_stats = {}
+        self.provider_router = ProviderRouter(failure_threshold=3, cooldown=30.0)
+        
+        # 제공자별 호출 한도 (rpm: 분당, rps: 초당, daily: 일일 요청 수, 비어 있으면 제한 없음)
+        self.rate_limits = {
+            'google': {'rpm': 15, 'daily': 1500},   # Gemini 무료 등급
+            'openai': {'rpm': 60},
+            'anthropic': {'rpm': 50},
+            'github_copilot': {}
         }
+        self.rate_limiter = ProviderRateLimiter(self.rate_limits)
+        self.deferred_jobs = 0
+        
+        # 레지스트리를 거치는 다른 호출 경로(Copilot 내부 OpenAI 호출 등)도 같은 서킷/호출 한도 적용
+        for provider in ('openai', 'anthropic', 'google'):
+            self.provider_registry.set_gate(provider, self._admit_provider_call, self._report_provider_call)
+        self.dispatcher = HedgedDispatcher(
+            hedge_delay=self.analysis_settings['hedge_delay'],
+            deadline=self.analysis_settings['job_deadline']
+        )
+        
+        # 크롭 인코딩 풀 (JPEG 바이트가 기본, base64는 필요한 제공자만 지연 생성)
+        self.crop_encoder = CropEncoderPool(max_workers=2, max_side=512, quality=85)
+        self.local_extractor = LocalAttributeExtractor()
+        self.image_sizing = ImageSizingPolicy(detail=self.analysis_settings['image_detail'],
+                                              max_tokens=self.analysis_settings['image_token_limits'])
+        self.raw_image_providers = {'github_copilot'}   # base64 대신 JPEG 바이트를 받는 제공자
+        
+        # 오프라인 작업 스풀 (네트워크 장애 중 크롭을 잃지 않도록 디스크에 보관)
+        spool_settings = self.analysis_settings['offline_spool']
+        self.offline_spool = None
+        if spool_settings['enabled']:
+            try:
+                self.offline_spool = OfflineJobSpool(max_bytes=spool_settings['max_bytes'],
+                                                     max_jobs=spool_settings['max_jobs'])
+            except Exception as e:
+                print(f"⚠️ 오프라인 스풀 사용 불가: {e}")
         
         # 객체별 분석 우선순위
         self.analysis_priority = {
@@ -121,21 +263,51 @@ class AIObjectAnalyzer:
     def encode_image_to_base64(self, image_crop: np.ndarray) -> str:
         """이미지를 base64로 인코딩"""
         try:
-            # 이미지 품질 최적화
-            if image_crop.shape[1] > 512:
-                height, width = image_crop.shape[:2]
-                scale = 512 / width
-                new_width, new_height = int(width * scale), int(height * scale)
-                image_crop = cv2.resize(image_crop, (new_width, new_height))
-            
-            # JPEG 인코딩 (압축률 높음)
-            _, buffer = cv2.imencode('.jpg', image_crop, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            image_base64 = base64.b64encode(buffer).decode('utf-8')
-            return image_base64
+            encoded = encode_crop_jpeg(image_crop, max_side=512, quality=85)
+            return encoded.base64 if encoded else None
         except Exception as e:
             print(f"❌ 이미지 인코딩 실패: {e}")
             return None
     
+    def _provider_payload(self, provider: str, image, usage: Optional[Dict] = None):
+        """제공자에 맞는 이미지 형태로 변환 (제공자별 크기로 인코딩 → JPEG 바이트 또는 메모된 base64)
+        
+        usage를 주면 변환한 이미지 수/예상 토큰/바이트를 누적 (요청 단위 통계용)
+        """
+        if isinstance(image, list):
+            return [self._provider_payload(provider, item, usage) for item in image]
+        if isinstance(image, CropPayload):
+            max_side, quality, tokens = self.image_sizing.choose(provider, *image.size)
+            image = image.encoded(max_side, quality)
+            if image is None:
+                return None
+            if usage is not None:
+                usage['images'] += 1
+                usage['tokens'] += tokens
+                usage['bytes'] += len(image)
+        if isinstance(image, EncodedCrop):
+            return image.jpeg if provider in self.raw_image_providers else image.base64
+        return image
+    
+    def _prepare_payloads(self, jobs: List[Dict]) -> List[Optional[CropPayload]]:
+        """작업 크롭을 1순위 제공자 크기로 인코딩 풀에서 병렬 인코딩 (작업별로 메모해 재사용)"""
+        order = self.get_provider_order()
+        first_provider = order[0] if order else None
+        
+        prepared = []
+        for job in jobs:
+            payload = job.get('payload')
+            if payload is None:
+                payload = CropPayload(job['crop'], self.crop_encoder)
+                job['payload'] = payload
+            max_side, quality, _ = self.image_sizing.choose(first_provider, *payload.size)
+            payload.prefetch(max_side, quality)
+            prepared.append((payload, max_side, quality))
+        
+        # 인코딩 실패한 크롭은 제외
+        return [payload if payload.encoded(max_side, quality) else None
+                for payload, max_side, quality in prepared]
+    
     def create_analysis_prompt(self, object_class: str, detail_level: str = 'high') -> str:
         """분석 프롬프트 생성"""
         base_prompt = f"""이 이미지에 보이는 {object_class}에 대해 상세히 분석해주세요.
@@ -190,8 +362,117 @@ class AIObjectAnalyzer:
 
         return base_prompt
     
-    def analyze_with_openai(self, image_base64: str, object_class: str) -> Optional[Dict]:
-        """OpenAI GPT-4 Vision으로 분석"""
+    @staticmethod
+    def _openai_response_format(name: str, schema: Dict) -> Dict:
+        """OpenAI 구조화 출력 설정 (JSON 스키마 strict 모드)"""
+        return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+    
+    @staticmethod
+    def _anthropic_tool(name: str, schema: Dict) -> Dict:
+        """Anthropic 구조화 출력 설정 (도구 사용 강제 → 입력 스키마대로 응답)"""
+        return {
+            "tools": [{"name": name, "description": "Report the analysis result", "input_schema": schema}],
+            "tool_choice": {"type": "tool", "name": name}
+        }
+    
+    @staticmethod
+    def _anthropic_content(result: Dict):
+        """Anthropic 응답에서 도구 입력(dict) 또는 텍스트 추출"""
+        for block in result.get('content', []):
+            if block.get('type') == 'tool_use':
+                return block.get('input')
+        for block in result.get('content', []):
+            if block.get('type') == 'text':
+                return block.get('text')
+        return None
+    
+    @staticmethod
+    def _google_generation_config(max_output_tokens: int, schema: Optional[Dict] = None) -> Dict:
+        """Gemini 생성 설정 (스키마가 있으면 JSON 응답 모드)"""
+        config = {
+            "temperature": 0.1,
+            "maxOutputTokens": max_output_tokens,
+            "candidateCount": 1
+        }
+        if schema is not None:
+            config["responseMimeType"] = "application/json"
+            config["responseSchema"] = to_gemini_schema(schema)
+        return config
+    
+    def _consume_stream(self, provider: str, response, started: float, on_partial, extract_text) -> Tuple[str, Optional[Dict]]:
+        """SSE 스트림을 읽으며 완성된 필드가 생길 때마다 on_partial 호출, (전체 텍스트, 마지막 이벤트) 반환"""
+        parser = StreamingJSONParser()
+        published = {}
+        last_event = None
+        first_field_at = None
+        cancel = current_cancel_event()
+        
+        try:
+            for data in iter_sse_data(response):
+                # 다른 제공자 결과가 채택됨 - 응답을 닫아 연결/호출 한도를 바로 반환
+                if cancel is not None and cancel.is_set():
+                    raise CallCancelled(f"{provider} 스트림 취소 (다른 제공자 결과 채택)")
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                last_event = event
+                
+                chunk = extract_text(event)
+                if not chunk:
+                    continue
+                partial = parser.feed(chunk)
+                if not isinstance(partial, dict):
+                    continue
+                
+                # 새로 완성된 필드가 있을 때만 전달 (브랜드 → 모델 → 나머지 순서로 도착)
+                fields = {COMPACT_KEYS.get(key, key): value for key, value in partial.items()
+                          if value not in (None, '', [])}
+                if fields and fields != published:
+                    if first_field_at is None:
+                        first_field_at = time.time()
+                    published = fields
+                    try:
+                        on_partial(dict(fields))
+                    except Exception as e:
+                        print(f"⚠️ 부분 결과 전달 실패: {e}")
+        finally:
+            response.close()
+        
+        total_time = time.time() - started
+        self._record_stream(provider, first_field_at - started if first_field_at else None, total_time)
+        # 헤지 지연은 전체 호출 시간 기준 (전송 계층은 스트리밍 응답의 헤더 시점을 표본에서 제외)
+        self.transports[provider].record_latency(total_time)
+        return parser.buffer, last_event
+    
+    def _record_stream(self, provider: str, time_to_first_field: Optional[float], total_time: float):
+        """스트리밍 응답 시간 기록 (첫 필드까지 시간, 전체 시간)"""
+        with self.result_lock:
+            stats = self.streaming_stats.setdefault(provider, {
+                'streams': 0, 'ttff': deque(maxlen=100), 'total': deque(maxlen=100)
+            })
+            stats['streams'] += 1
+            if time_to_first_field is not None:
+                stats['ttff'].append(time_to_first_field)
+            stats['total'].append(total_time)
+    
+    def get_streaming_stats(self) -> Dict:
+        """제공자별 스트리밍 통계 (첫 필드까지 시간 평균/p50, 전체 응답 시간 평균, ms)"""
+        with self.result_lock:
+            result = {}
+            for provider, stats in self.streaming_stats.items():
+                ttff = sorted(stats['ttff'])
+                total = list(stats['total'])
+                result[provider] = {
+                    'streams': stats['streams'],
+                    'avg_time_to_first_field_ms': sum(ttff) / len(ttff) * 1000 if ttff else None,
+                    'p50_time_to_first_field_ms': ttff[len(ttff) // 2] * 1000 if ttff else None,
+                    'avg_total_ms': sum(total) / len(total) * 1000 if total else None,
+                }
+            return result
+    
+    def analyze_with_openai(self, image_base64: str, object_class: str, on_partial=None) -> Optional[Dict]:
+        """OpenAI GPT-4 Vision으로 분석 (on_partial이 있으면 스트리밍으로 부분 필드 전달)"""
         if not self.api_providers['openai']['enabled']:
             return None
             
@@ -201,10 +482,11 @@ class AIObjectAnalyzer:
                 'Authorization': f"Bearer {self.api_providers['openai']['api_key']}"
             }
             
-            prompt = self.create_analysis_prompt(object_class)
+            structured = self.analysis_settings['structured_output']
+            prompt = compact_prompt(object_class, self.get_remote_fields()) if structured else self.create_analysis_prompt(object_class)
             
             payload = {
-                "model": "gpt-4-vision-preview",
+                "model": self.api_providers['openai']['model'],
                 "messages": [
                     {
                         "role": "user",
@@ -213,44 +495,61 @@ class AIObjectAnalyzer:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}"
+                                    "url": f"data:image/jpeg;base64,{image_base64}",
+                                    "detail": OPENAI_DETAIL
                                 }
                             }
                         ]
                     }
                 ],
-                "max_tokens": 500,
+                "max_tokens": 150 if structured else 500,
                 "temperature": 0.1
             }
+            if structured:
+                payload["response_format"] = self._openai_response_format('object_analysis', build_schema(self.get_remote_fields()))
+            stream = self.analysis_settings['streaming'] and on_partial is not None
+            if stream:
+                payload["stream"] = True
             
-            response = requests.post(
+            started = time.time()
+            response = self.transports['openai'].post(
                 self.api_providers['openai']['endpoint'],
                 headers=headers,
                 json=payload,
-                timeout=self.analysis_settings['max_analysis_time']
+                timeout=self.analysis_settings['max_analysis_time'],
+                stream=stream
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                try:
-                    # JSON 파싱
-                    analysis = json.loads(content)
+            # 스트리밍 응답은 본문을 다 읽지 않으면 연결이 풀에 반환되지 않으므로 항상 닫음
+            try:
+                if response.status_code == 200:
+                    if stream:
+                        content, _ = self._consume_stream(
+                            'openai', response, started, on_partial,
+                            lambda event: ((event.get('choices') or [{}])[0].get('delta') or {}).get('content')
+                        )
+                    else:
+                        content = response.json()['choices'][0]['message']['content']
+                    analysis = parse_analysis(content, object_class)
+                    if analysis is None:
+                        print(f"⚠️ OpenAI 응답 JSON 파싱 실패: {content}")
+                        return None
                     analysis['provider'] = 'OpenAI GPT-4'
                     return analysis
-                except json.JSONDecodeError:
-                    print(f"⚠️ OpenAI 응답 JSON 파싱 실패: {content}")
+                else:
+                    print(f"❌ OpenAI API 오류: {response.status_code}")
                     return None
-            else:
-                print(f"❌ OpenAI API 오류: {response.status_code}")
-                return None
+            finally:
+                response.close()
                 
+        except CallCancelled:
+            return None
         except Exception as e:
             print(f"❌ OpenAI 분석 실패: {e}")
             return None
     
-    def analyze_with_anthropic(self, image_base64: str, object_class: str) -> Optional[Dict]:
-        """Anthropic Claude로 분석"""
+    def analyze_with_anthropic(self, image_base64: str, object_class: str, on_partial=None) -> Optional[Dict]:
+        """Anthropic Claude로 분석 (on_partial이 있으면 스트리밍으로 부분 필드 전달)"""
         if not self.api_providers['anthropic']['enabled']:
             return None
             
@@ -261,11 +560,12 @@ class AIObjectAnalyzer:
                 'anthropic-version': '2023-06-01'
             }
             
-            prompt = self.create_analysis_prompt(object_class)
+            structured = self.analysis_settings['structured_output']
+            prompt = compact_prompt(object_class, self.get_remote_fields()) if structured else self.create_analysis_prompt(object_class)
             
             payload = {
-                "model": "claude-3-sonnet-20240229",
-                "max_tokens": 500,
+                "model": self.api_providers['anthropic']['model'],
+                "max_tokens": 150 if structured else 500,
                 "temperature": 0.1,
                 "messages": [
                     {
@@ -284,33 +584,52 @@ class AIObjectAnalyzer:
                     }
                 ]
             }
+            if structured:
+                payload.update(self._anthropic_tool('report_analysis', build_schema(self.get_remote_fields())))
+            stream = self.analysis_settings['streaming'] and on_partial is not None
+            if stream:
+                payload["stream"] = True
             
-            response = requests.post(
+            started = time.time()
+            response = self.transports['anthropic'].post(
                 self.api_providers['anthropic']['endpoint'],
                 headers=headers,
                 json=payload,
-                timeout=self.analysis_settings['max_analysis_time']
+                timeout=self.analysis_settings['max_analysis_time'],
+                stream=stream
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['content'][0]['text']
-                try:
-                    analysis = json.loads(content)
+            # 스트리밍 응답은 본문을 다 읽지 않으면 연결이 풀에 반환되지 않으므로 항상 닫음
+            try:
+                if response.status_code == 200:
+                    if stream:
+                        # 도구 입력은 input_json_delta, 일반 텍스트는 text_delta로 도착
+                        content, _ = self._consume_stream(
+                            'anthropic', response, started, on_partial,
+                            lambda event: (event.get('delta') or {}).get('partial_json') or (event.get('delta') or {}).get('text')
+                            if event.get('type') == 'content_block_delta' else None
+                        )
+                    else:
+                        content = self._anthropic_content(response.json())
+                    analysis = parse_analysis(content, object_class)
+                    if analysis is None:
+                        print(f"⚠️ Claude 응답 JSON 파싱 실패: {content}")
+                        return None
                     analysis['provider'] = 'Anthropic Claude'
                     return analysis
-                except json.JSONDecodeError:
-                    print(f"⚠️ Claude 응답 JSON 파싱 실패: {content}")
+                else:
+                    print(f"❌ Anthropic API 오류: {response.status_code}")
                     return None
-            else:
-                print(f"❌ Anthropic API 오류: {response.status_code}")
-                return None
+            finally:
+                response.close()
                 
+        except CallCancelled:
+            return None
         except Exception as e:
             print(f"❌ Anthropic 분석 실패: {e}")
             return None
-    def analyze_with_google(self, image_base64: str, object_class: str) -> Optional[Dict]:
-        """Google Gemini로 분석 (개선된 오류 처리)"""
+    def analyze_with_google(self, image_base64: str, object_class: str, on_partial=None) -> Optional[Dict]:
+        """Google Gemini로 분석 (개선된 오류 처리, on_partial이 있으면 스트리밍으로 부분 필드 전달)"""
         if not self.api_providers['google']['enabled']:
             return None
             
@@ -320,7 +639,8 @@ class AIObjectAnalyzer:
             }
             
             # 더 단순하고 명확한 프롬프트
-            prompt = f"""Analyze this {object_class} image and respond with ONLY valid JSON:
+            structured = self.analysis_settings['structured_output']
+            prompt = compact_prompt(object_class, self.get_remote_fields()) if structured else f"""Analyze this {object_class} image and respond with ONLY valid JSON:
 
 {{
     "brand": "brand name or Unknown",
@@ -348,11 +668,9 @@ IMPORTANT: Return ONLY the JSON object above, no markdown, no explanations."""
                         ]
                     }
                 ],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "maxOutputTokens": 300,
-                    "candidateCount": 1
-                },
+                "generationConfig": self._google_generation_config(
+                    150 if structured else 300, build_schema(self.get_remote_fields()) if structured else None
+                ),
                 "safetySettings": [
                     {
                         "category": "HARM_CATEGORY_HARASSMENT",
@@ -373,86 +691,105 @@ IMPORTANT: Return ONLY the JSON object above, no markdown, no explanations."""
                 ]
             }
             
-            url = f"{self.api_providers['google']['endpoint']}?key={self.api_providers['google']['api_key']}"
+            stream = self.analysis_settings['streaming'] and on_partial is not None
+            endpoint = self.api_providers['google']['endpoint']
+            if stream:
+                url = f"{endpoint.replace(':generateContent', ':streamGenerateContent')}?alt=sse&key={self.api_providers['google']['api_key']}"
+            else:
+                url = f"{endpoint}?key={self.api_providers['google']['api_key']}"
             
-            response = requests.post(
+            started = time.time()
+            response = self.transports['google'].post(
                 url,
                 headers=headers,
                 json=payload,
-                timeout=self.analysis_settings['max_analysis_time']
+                timeout=self.analysis_settings['max_analysis_time'],
+                stream=stream
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # 응답 구조 상세 확인
-                if 'candidates' not in result or not result['candidates']:
-                    print("⚠️ Gemini 응답에 candidates 없음")
-                    return None
-                
-                candidate = result['candidates'][0]
-                
-                # finishReason 확인
-                finish_reason = candidate.get('finishReason', 'UNKNOWN')
-                if finish_reason != 'STOP':
-                    print(f"⚠️ Gemini 응답 미완료: {finish_reason}")
-                    if finish_reason == 'SAFETY':
-                        print("⚠️ 안전 필터에 의해 차단됨")
-                    return None
-                
-                if 'content' not in candidate:
-                    print("⚠️ Gemini candidate에 content 없음")
-                    return None
-                
-                content = candidate['content']['parts'][0]['text'].strip()
-                
-                # JSON 정리 (마크다운 코드 블록 제거)
-                if content.startswith('```json'):
-                    content = content.replace('```json', '').replace('```', '').strip()
-                elif content.startswith('```'):
-                    content = content.replace('```', '').strip()
-                
-                # JSON 파싱 시도
-                try:
-                    analysis = json.loads(content)
-                    print(f"⚠️ Gemini JSON : {analysis}")
-                    analysis['provider'] = 'Google Gemini 2.0 Flash'
-                    print(f"✅ Gemini 분석 성공: {analysis.get('brand', 'Unknown')} {analysis.get('model', 'Unknown')}")
-                    return analysis
-                except json.JSONDecodeError as e:
-                    print(f"⚠️ Gemini JSON 파싱 실패: {e}")
-                    print(f"   원본 응답: {content[:100]}...")
+            # 스트리밍 응답은 본문을 다 읽지 않으면 연결이 풀에 반환되지 않으므로 항상 닫음
+            try:
+                if response.status_code == 200:
+                    if stream:
+                        # 조각 텍스트를 이어 붙이고 마지막 조각의 finishReason으로 단일 응답 형태 구성
+                        content, last_event = self._consume_stream(
+                            'google', response, started, on_partial,
+                            lambda event: ''.join(part.get('text', '') for part in
+                                                  (((event.get('candidates') or [{}])[0].get('content') or {}).get('parts') or []))
+                        )
+                        last_candidate = ((last_event or {}).get('candidates') or [{}])[0]
+                        result = {'candidates': [{
+                            'finishReason': last_candidate.get('finishReason', 'UNKNOWN'),
+                            'content': {'parts': [{'text': content}]}
+                        }]} if content else {}
+                    else:
+                        result = response.json()
                     
-                    # 백업: 간단한 분석 반환
-                    return {
-                        "brand": "Gemini Analysis",
-                        "model": f"{object_class} detected",
-                        "type": object_class,
-                        "color": "Unknown",
-                        "distinctive_features": ["AI analyzed"],
-                        "condition": "Good",
-                        "confidence": 0.6,
-                        "provider": "Google Gemini 1.5 (backup)"
-                    }
+                    # 응답 구조 상세 확인
+                    if 'candidates' not in result or not result['candidates']:
+                        print("⚠️ Gemini 응답에 candidates 없음")
+                        return None
                     
-            elif response.status_code == 400:
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get('error', {}).get('message', str(error_data))
-                    print(f"❌ Google API 400 오류: {error_msg}")
-                except:
-                    print(f"❌ Google API 400 오류: {response.text}")
-                return None
-            else:
-                print(f"❌ Google API 오류 ({response.status_code}): {response.text}")
-                return None
+                    candidate = result['candidates'][0]
+                    
+                    # finishReason 확인
+                    finish_reason = candidate.get('finishReason', 'UNKNOWN')
+                    if finish_reason != 'STOP':
+                        print(f"⚠️ Gemini 응답 미완료: {finish_reason}")
+                        if finish_reason == 'SAFETY':
+                            print("⚠️ 안전 필터에 의해 차단됨")
+                        return None
+                    
+                    if 'content' not in candidate:
+                        print("⚠️ Gemini candidate에 content 없음")
+                        return None
+                    
+                    content = candidate['content']['parts'][0]['text'].strip()
+                    
+                    # JSON 파싱 (코드 블록/잘린 응답 허용)
+                    analysis = parse_analysis(content, object_class)
+                    if analysis is not None:
+                        analysis['provider'] = 'Google Gemini 2.0 Flash'
+                        print(f"✅ Gemini 분석 성공: {analysis.get('brand', 'Unknown')} {analysis.get('model', 'Unknown')}")
+                        return analysis
+                    else:
+                        print("⚠️ Gemini JSON 파싱 실패")
+                        print(f"   원본 응답: {content[:100]}...")
+                        
+                        # 백업: 간단한 분석 반환
+                        return {
+                            "brand": "Gemini Analysis",
+                            "model": f"{object_class} detected",
+                            "type": object_class,
+                            "color": "Unknown",
+                            "distinctive_features": ["AI analyzed"],
+                            "condition": "Good",
+                            "confidence": 0.6,
+                            "provider": "Google Gemini 1.5 (backup)"
+                        }
+                        
+                elif response.status_code == 400:
+                    try:
+                        error_data = response.json()
+                        error_msg = error_data.get('error', {}).get('message', str(error_data))
+                        print(f"❌ Google API 400 오류: {error_msg}")
+                    except:
+                        print(f"❌ Google API 400 오류: {response.text}")
+                    return None
+                else:
+                    print(f"❌ Google API 오류 ({response.status_code}): {response.text}")
+                    return None
+            finally:
+                response.close()
                 
+        except CallCancelled:
+            return None
         except Exception as e:
             print(f"❌ Google 분석 실패: {e}")
             return None
     
-    def analyze_with_github_copilot(self, image_base64: str, object_class: str) -> Optional[Dict]:
-        """GitHub Copilot로 분석"""
+    def analyze_with_github_copilot(self, image_base64, object_class: str, on_partial=None) -> Optional[Dict]:
+        """GitHub Copilot로 분석 (JPEG 바이트 또는 base64 문자열)"""
         if not self.api_providers['github_copilot']['enabled'] or not self.copilot_integration:
             return None
             
@@ -463,8 +800,11 @@ IMPORTANT: Return ONLY the JSON object above, no markdown, no explanations."""
                 "confidence": 0.8
             }
             
-            # 이미지 데이터 변환 (base64 -> bytes)
-            image_data = base64.b64decode(image_base64) if image_base64 else b""
+            # 이미지 데이터 (인코딩 풀의 JPEG 바이트는 그대로 사용, base64 문자열만 디코딩)
+            if isinstance(image_base64, (bytes, bytearray)):
+                image_data = bytes(image_base64)
+            else:
+                image_data = base64.b64decode(image_base64) if image_base64 else b""
             
             # Copilot 분석 실행
             result = self.copilot_integration.analyze_object(image_data, object_info)
@@ -522,58 +862,1112 @@ IMPORTANT: Return ONLY the JSON object above, no markdown, no explanations."""
             print(f"❌ 객체 크롭 실패: {e}")
             return None
     
-    def analyze_object_detailed(self, frame: np.ndarray, box: List[float], 
-                              object_class: str, confidence: float) -> Optional[Dict]:
-        """객체 상세 분석 메인 함수"""
-        
+    def should_analyze(self, object_class: str, confidence: float) -> bool:
+        """분석 대상 여부 확인 (신뢰도 및 우선순위)"""
         # 신뢰도가 낮으면 분석하지 않음
         if confidence < self.analysis_settings['confidence_threshold']:
-            return None
+            return False
         
         # 우선순위가 낮은 객체는 건너뛰기
-        priority = self.analysis_priority.get(object_class, 0)
-        if priority < 5:  # 임계값
+        return self.meets_class_priority(object_class)
+    
+    def meets_class_priority(self, object_class: str) -> bool:
+        """클래스 우선순위가 분석 기준 이상인지 확인"""
+        return self.analysis_priority.get(object_class, 0) >= self.analysis_settings['min_class_priority']
+    
+    def is_remote_class(self, object_class: str) -> bool:
+        """원격 분석(브랜드/모델)을 요청하는 클래스인지 확인 (우선순위 기준 충족 + 로컬 전용 아님)"""
+        return self.meets_class_priority(object_class) and not self.is_local_only(object_class)
+    
+    def score_job(self, object_class: str, box: List[float], confidence: float,
+                  stable_count: int, frame_shape: Tuple) -> float:
+        """분석 작업 점수 (클래스 우선순위, 크롭 면적, 신뢰도, 트랙 안정성 가중합, 0~1)"""
+        weights = self.analysis_settings['priority_weights']
+        frame_area = max(frame_shape[0] * frame_shape[1], 1)
+        box_area = max(box[2] - box[0], 0) * max(box[3] - box[1], 0)
+        
+        class_score = min(self.analysis_priority.get(object_class, 0) / 10.0, 1.0)
+        area_score = min(box_area / (frame_area * 0.1), 1.0)   # 화면의 10% 이상이면 만점
+        stability_score = min(stable_count, 10) / 10.0
+        
+        return (weights['class'] * class_score +
+                weights['area'] * area_score +
+                weights['confidence'] * float(confidence) +
+                weights['stability'] * stability_score)
+    
+    def run_provider_chain(self, image, object_class: str, on_partial=None) -> Optional[Dict]:
+        """사용 가능한 API로 분석 시도 (상태 순, 헤지 병렬 요청 + 전체 마감 시간)
+        
+        단계적 상향이 켜져 있으면 저렴한 제공자 결과가 충분히 확실할 때 비싼 제공자를 호출하지 않음
+        image는 CropPayload/EncodedCrop(제공자별로 크기 조정 후 바이트/base64 변환) 또는 base64 문자열
+        on_partial을 주면 스트리밍 응답에서 파싱된 부분 필드를 즉시 전달
+        """
+        # 작업 단위 호출 기록 - Copilot 내부 OpenAI 호출 등 같은 백엔드를 두 번 부르지 않음
+        with self.provider_registry.job():
+            args = (image, object_class) if on_partial is None else (image, object_class, on_partial)
+            escalation = self.analysis_settings['escalation']
+            if not escalation['enabled']:
+                return self._dispatch_providers(self.provider_functions, args, self.is_valid_analysis)
+            
+            start = time.time()
+            cheap_result = self._dispatch_providers(self.provider_functions, args, self.is_valid_analysis,
+                                                    providers=escalation['cheap_providers'])
+            remaining = self.analysis_settings['job_deadline'] - (time.time() - start)
+            return self.escalate_analysis(image, object_class, cheap_result, deadline=remaining, on_partial=on_partial)
+    
+    def escalate_analysis(self, image, object_class: str, baseline: Optional[Dict],
+                          deadline: Optional[float] = None, on_partial=None) -> Optional[Dict]:
+        """저렴한 제공자 결과가 불확실하면(낮은 신뢰도/브랜드 Unknown) 비싼 제공자로 재분석"""
+        escalation = self.analysis_settings['escalation']
+        with self.result_lock:
+            self.escalation_stats['jobs'] += 1
+        
+        if baseline and self.is_confident_analysis(baseline):
+            with self.result_lock:
+                self.escalation_stats['accepted_cheap'] += 1
+            return baseline
+        
+        expensive = [provider for provider in self.provider_order if provider not in escalation['cheap_providers']]
+        if deadline is not None and deadline <= 0:
+            return baseline
+        
+        args = (image, object_class) if on_partial is None else (image, object_class, on_partial)
+        with self.provider_registry.job() as ledger:
+            called_before = ledger.called
+            result = self._dispatch_providers(self.provider_functions, args, self.is_valid_analysis,
+                                              providers=expensive, deadline=deadline)
+            dispatched = (ledger.called - called_before) & set(expensive)
+        
+        # 비싼 제공자가 실제로 호출된 경우만 상향으로 집계 (서킷/호출 한도로 생략되면 제외)
+        if dispatched:
+            with self.result_lock:
+                self.escalation_stats['escalated'] += 1
+        
+        better = self._better_analysis(baseline, result)
+        if result is not None and better is result:
+            with self.result_lock:
+                self.escalation_stats['improved'] += 1
+        return better
+    
+    def is_confident_analysis(self, analysis: Dict) -> bool:
+        """상향 없이 채택할 만한 결과인지 확인 (유효한 응답 + 신뢰도 기준 + 브랜드 식별)"""
+        escalation = self.analysis_settings['escalation']
+        if not self.is_valid_analysis(analysis):
+            return False
+        try:
+            confidence = float(analysis.get('confidence', 0))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        if confidence < escalation['min_confidence']:
+            return False
+        if escalation['escalate_unknown_brand'] and analysis.get('brand') in (None, '', 'Unknown'):
+            return False
+        return True
+    
+    def _better_analysis(self, first: Optional[Dict], second: Optional[Dict]) -> Optional[Dict]:
+        """두 결과 중 나은 쪽 (유효 > 확실 > 신뢰도 순, 같으면 먼저 얻은 결과)"""
+        if not second:
+            return first
+        if not first:
+            return second
+        
+        def rank(analysis):
+            try:
+                confidence = float(analysis.get('confidence', 0))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            return self.is_valid_analysis(analysis), self.is_confident_analysis(analysis), confidence
+        
+        return second if rank(second) > rank(first) else first
+    
+    def _dispatch_providers(self, functions: Dict, args: Tuple, validator,
+                            providers: Optional[List[str]] = None, deadline: Optional[float] = None):
+        """제공자 호출 목록을 헤지 디스패처로 실행해 결과 반환 (없으면 None)"""
+        calls = self._build_provider_calls(functions, args, validator, providers)
+        dispatched = self.dispatcher.dispatch(
+            calls,
+            hedge_delays=self.get_hedge_delays(),
+            deadline=deadline if deadline is not None else self.analysis_settings['job_deadline'],
+            validator=validator
+        )
+        return dispatched[1] if dispatched else None
+    
+    def _build_provider_calls(self, functions: Dict, args: Tuple, validator,
+                              providers: Optional[List[str]] = None) -> List[Tuple]:
+        """상태 라우터 순서대로 호출 목록 작성 (서킷이 열린 제공자 제외, providers로 후보 제한)"""
+        enabled = [provider for provider in self.provider_order
+                   if provider in functions and self.api_providers[provider]['enabled']
+                   and (providers is None or provider in providers)]
+        
+        # 디스패처 스레드에서도 현재 작업의 호출 기록을 사용하도록 연결
+        return [
+            (provider, self.provider_registry.bind(
+                lambda provider=provider: self._call_provider(provider, functions[provider], args, validator)))
+            for provider in self.provider_router.order(enabled)
+            if self.provider_router.is_callable(provider) and self.rate_limiter.has_budget(provider)
+        ]
+    
+    def has_provider_budget(self) -> bool:
+        """지금 호출 가능한 제공자가 하나라도 있는지 확인 (서킷 + 호출 한도)"""
+        return any(
+            config['enabled'] and self.provider_router.is_callable(provider) and self.rate_limiter.has_budget(provider)
+            for provider, config in self.api_providers.items()
+        )
+    
+    def has_batch_provider(self) -> bool:
+        """배치 요청을 보낼 수 있는 제공자가 있는지 확인 (배치 함수 + 키 설정 + 서킷/호출 한도, 상향 시 저렴한 제공자만)"""
+        escalation = self.analysis_settings['escalation']
+        return any(
+            self.api_providers[provider]['enabled'] and self.provider_router.is_callable(provider)
+            and self.rate_limiter.has_budget(provider)
+            and (not escalation['enabled'] or provider in escalation['cheap_providers'])
+            for provider in self.batch_provider_functions
+        )
+    
+    def get_budget_wait_time(self) -> float:
+        """호출 한도/열린 서킷 때문에 막힌 경우 가장 빨리 풀리는 제공자까지 남은 시간 (초)"""
+        waits = [max(self.rate_limiter.wait_time(provider), self.provider_router.cooldown_remaining(provider))
+                 for provider, config in self.api_providers.items() if config['enabled']]
+        return min(waits, default=0.0)
+    
+    def _admit_provider_call(self, provider: str) -> bool:
+        """호출 직전 확인 (서킷 → 작업 단위 중복 → 호출 한도 순, 생략되는 호출은 토큰을 쓰지 않음)
+        
+        레지스트리 게이트로도 등록되어 Copilot 내부 OpenAI 호출도 같은 확인을 거침
+        """
+        # 서킷 상태는 실제 호출 시점에 확인 (반개방 시험 호출은 1회만)
+        if not self.provider_router.allow(provider):
+            return False
+        
+        # 같은 작업에서 이미 호출된 백엔드면 생략 (예: Copilot 경로가 OpenAI를 이미 호출)
+        if not self.provider_registry.claim(provider):
+            self.provider_router.release(provider)
+            return False
+        
+        # 호출 한도 확인 - 초과할 요청은 보내지 않고 다음 제공자로 넘김
+        if not self.rate_limiter.try_acquire(provider):
+            self.provider_router.release(provider)
+            self.provider_registry.release(provider)
+            return False
+        return True
+    
+    def _report_provider_call(self, provider: str, latency: float, success: bool, reason: Optional[str] = None):
+        """레지스트리 게이트 경유 호출 결과를 상태 라우터에 기록"""
+        if success:
+            self.provider_router.record_success(provider, latency)
+        else:
+            self.provider_router.record_failure(provider, latency, reason)
+    
+    def _call_provider(self, provider: str, function, args: Tuple, validator):
+        """제공자 호출 + 성공/실패/지연 시간을 상태 라우터에 기록"""
+        if not self._admit_provider_call(provider):
             return None
         
-        # 캐시 확인
-        cache_key = f"{object_class}_{int(time.time() // 60)}"  # 1분 단위 캐시
-        if cache_key in self.analysis_cache:
-            return self.analysis_cache[cache_key]
+        start = time.time()
+        try:
+            usage = {'images': 0, 'tokens': 0, 'bytes': 0}
+            payload_args = [self._provider_payload(provider, arg, usage) for arg in args]
+            if usage['images']:
+                self.image_sizing.record(provider, usage['tokens'], usage['bytes'], images=usage['images'])
+            result = function(*payload_args)
+        except Exception as e:
+            self.provider_router.record_failure(provider, time.time() - start, str(e))
+            raise
         
-        # 객체 영역 크롭
+        elapsed = time.time() - start
+        cancel = current_cancel_event()
+        if result and validator(result):
+            self.provider_router.record_success(provider, elapsed)
+        elif cancel is not None and cancel.is_set():
+            # 승자 확정 후 중단된 호출은 제공자 실패로 보지 않음
+            self.provider_router.release(provider)
+        else:
+            self.provider_router.record_failure(provider, elapsed, 'empty or invalid response')
+        return result
+    
+    def get_hedge_delays(self) -> Dict[str, float]:
+        """제공자별 헤지 지연 (측정된 지연 시간 백분위수, 없으면 기본값)"""
+        delays = {}
+        for provider, transport in self.transports.items():
+            latency = transport.latency_percentile(self.analysis_settings['hedge_percentile'])
+            if latency is not None:
+                delays[provider] = latency
+        return delays
+    
+    @staticmethod
+    def is_valid_analysis(analysis: Dict) -> bool:
+        """실제 AI 응답인지 확인 (백업/추정 결과, 잘린 응답을 복구한 결과 제외)"""
+        if not analysis or analysis.get('truncated'):
+            return False
+        return 'fallback' not in analysis.get('source', '') and 'backup' not in analysis.get('provider', '')
+    
+    def get_remote_fields(self) -> List[str]:
+        """원격 제공자에 요청할 축약 필드 (로컬 속성 사용 시 브랜드/모델만)"""
+        return BRAND_MODEL_FIELDS if self.analysis_settings['local_attributes'] else FULL_FIELDS
+    
+    def is_local_only(self, object_class: str) -> bool:
+        """로컬 속성만으로 충분해 원격 분석을 생략하는 클래스인지 확인"""
+        return (self.analysis_settings['local_attributes'] and
+                object_class in self.analysis_settings['local_only_classes'])
+    
+    def extract_local_attributes(self, crop: np.ndarray, object_class: str, box: Optional[List[float]] = None,
+                                 frame_shape: Optional[Tuple] = None) -> Dict:
+        """크롭에서 색상/대략적 타입/크기 계산 (실패 시 빈 dict)"""
+        if not self.analysis_settings['local_attributes'] or crop is None or crop.size == 0:
+            return {}
+        try:
+            return self.local_extractor.extract(crop, object_class, box, frame_shape)
+        except Exception as e:
+            print(f"⚠️ 로컬 속성 추출 실패: {e}")
+            return {}
+    
+    def local_pre_analysis(self, track_id: int, frame: np.ndarray, box: List[float],
+                           object_class: str) -> Optional[Dict]:
+        """API 호출 없이 즉시 채울 수 있는 분석 결과 (원격 결과가 오기 전 첫 프레임 표시용)
+        
+        원격 분석 대상이 아닌 클래스(로컬 전용, 낮은 우선순위)는 이 결과가 최종 결과로 트랙 캐시에 저장됨
+        """
         crop = self.get_object_crop(frame, box)
-        if crop is None or crop.size == 0:
+        local = self.extract_local_attributes(crop, object_class, box, frame.shape)
+        if not local:
             return None
         
-        # 이미지 인코딩
-        image_base64 = self.encode_image_to_base64(crop)
-        if not image_base64:
-            return None          # 사용 가능한 API로 분석 시도 (우선순위 순)
-        analysis_result = None
+        remote = self.is_remote_class(object_class)
+        analysis = {
+            'brand': 'Unknown',
+            'model': 'Unknown',
+            'type': local['type'],
+            'color': local['color'],
+            'confidence': 0.7,
+            'provider': 'Local',
+            'source': 'local',
+            'partial': remote   # True면 원격 분석(브랜드/모델) 대기 중
+        }
+        if 'size' in local:
+            analysis['size'] = local['size']
+        
+        if not remote:
+            self.cache_track_analysis(track_id, analysis)
+        return analysis
+    
+    @staticmethod
+    def merge_local_attributes(remote: Dict, local: Optional[Dict], object_class: str) -> Dict:
+        """원격 결과(브랜드/모델)에 로컬 속성(색상/타입/크기)을 채워 넣음"""
+        if not local:
+            return remote
+        merged = dict(remote)
+        for key in ('color', 'type', 'size'):
+            if local.get(key) and merged.get(key) in (None, '', 'Unknown', object_class):
+                merged[key] = local[key]
+        merged.pop('partial', None)
+        return merged
+    
+    def analyze_object_detailed(self, frame: np.ndarray, box: List[float], 
+                              object_class: str, confidence: float,
+                              track_id: Optional[int] = None) -> Optional[Dict]:
+        """객체 상세 분석 메인 함수 (동기 방식)"""
+        
+        if not self.should_analyze(object_class, confidence):
+            return None
         
-        # Google Gemini 최우선 (무료, 이미지 분석 우수)
-        if self.api_providers['google']['enabled']:
-            analysis_result = self.analyze_with_google(image_base64, object_class)
+        # 트랙 캐시 확인 (같은 물체는 트랙이 유지되는 동안 한 번만 분석)
+        if track_id is not None:
+            cached = self.get_cached_analysis(track_id)
+            if cached:
+                return cached
         
-        # Google 실패 시 GitHub Copilot
-        if not analysis_result and self.api_providers['github_copilot']['enabled']:
-            analysis_result = self.analyze_with_github_copilot(image_base64, object_class)
+        # 로컬 전용 클래스는 API 호출 없이 로컬 속성으로 완료
+        if self.is_local_only(object_class):
+            crop = self.get_object_crop(frame, box)
+            local = self.extract_local_attributes(crop, object_class, box, frame.shape)
+            if not local:
+                return None
+            analysis_result = self.merge_local_attributes(
+                {'brand': 'Unknown', 'model': 'Unknown', 'confidence': 0.7, 'provider': 'Local', 'source': 'local'},
+                local, object_class
+            )
+            if track_id is not None:
+                self.cache_track_analysis(track_id, analysis_result)
+            return analysis_result
         
-        # GitHub Copilot 실패 시 OpenAI
-        if not analysis_result and self.api_providers['openai']['enabled']:
-            analysis_result = self.analyze_with_openai(image_base64, object_class)
+        # 객체 영역 크롭
+        crop = self.get_object_crop(frame, box)
+        if crop is None or crop.size == 0:
+            return None
         
-        # OpenAI 실패 시 Anthropic
-        if not analysis_result and self.api_providers['anthropic']['enabled']:
-            analysis_result = self.analyze_with_anthropic(image_base64, object_class)
+        analysis_result = self.analyze_crop(crop, object_class)
+        if analysis_result:
+            local = self.extract_local_attributes(crop, object_class, box, frame.shape)
+            analysis_result = self.merge_local_attributes(analysis_result, local, object_class)
         
         # 결과 캐싱
         if analysis_result:
-            self.analysis_cache[cache_key] = analysis_result
+            if track_id is not None:
+                self.cache_track_analysis(track_id, analysis_result)
             print(f"🔍 {object_class} 상세 분석 완료: {analysis_result.get('brand', 'Unknown')} {analysis_result.get('model', 'Unknown')}")
         
         return analysis_result
     
+    def analyze_crop(self, crop: np.ndarray, object_class: str) -> Optional[Dict]:
+        """크롭 분석 (지각 해시 캐시 확인 → 인코딩 → API 호출)"""
+        phash, cached = self._lookup_crop_caches(crop, object_class)
+        if cached:
+            return cached
+        
+        # 이미지 인코딩 (제공자별 크기는 호출 시점에 결정, 같은 크기는 재사용)
+        payload = self._prepare_payloads([{'crop': crop}])[0]
+        if not payload:
+            return None
+        
+        analysis_result = self.run_provider_chain(payload, object_class)
+        if analysis_result:
+            self._remember_crop_analysis(phash, object_class, analysis_result)
+        else:
+            self._spool_job({'crop': crop, 'object_class': object_class}, payload, phash, 'providers_failed')
+        
+        return analysis_result
+    
+    def _lookup_crop_caches(self, crop: np.ndarray, object_class: str) -> Tuple[Optional[int], Optional[Dict]]:
+        """인코딩/전송 전에 지각 해시 캐시 → 디스크 저장소 순으로 중복 크롭 확인"""
+        phash = compute_dhash(crop)
+        cached = self.phash_cache.lookup(phash, object_class)
+        if cached:
+            return phash, cached
+        
+        # 디스크 저장소 확인 (이전 실행에서 분석된 물체)
+        stored = self._lookup_store(phash, object_class)
+        if stored:
+            self.phash_cache.store(phash, object_class, stored)
+            return phash, stored
+        
+        return phash, None
+    
+    def _remember_crop_analysis(self, phash: Optional[int], object_class: str, analysis: Dict,
+                                track_id: Optional[int] = None, timestamp: Optional[float] = None):
+        """분석 결과를 지각 해시 캐시와 디스크 저장소, 이벤트 로그에 기록"""
+        # 백업(추정) 결과나 잘린 응답을 복구한 결과는 같은 모양의 다른 크롭에 재사용하지 않도록 캐시하지 않음
+        if not self.is_valid_analysis(analysis):
+            return
+        self.phash_cache.store(phash, object_class, analysis)
+        self._save_store(phash, object_class, analysis)
+        self._log_event('analyzed', track_id=track_id, object_class=object_class, phash=phash,
+                        detail={key: analysis.get(key) for key in ('brand', 'model', 'provider', 'confidence')},
+                        timestamp=timestamp)
+    
+    def _lookup_store(self, phash: Optional[int], object_class: str) -> Optional[Dict]:
+        """영구 저장소 조회 (오류 시 저장소 없이 계속 진행)"""
+        if not self.analysis_store:
+            return None
+        try:
+            return self.analysis_store.lookup(phash, object_class)
+        except Exception as e:
+            print(f"⚠️ 분석 저장소 조회 실패: {e}")
+            return None
+    
+    def _save_store(self, phash: Optional[int], object_class: str, analysis: Dict):
+        """영구 저장소에 분석 결과 기록"""
+        if not self.analysis_store:
+            return
+        # 백업(추정) 결과는 재시작 후까지 남기지 않음
+        if not self.is_valid_analysis(analysis):
+            return
+        try:
+            self.analysis_store.store(phash, object_class, analysis)
+        except Exception as e:
+            print(f"⚠️ 분석 저장소 기록 실패: {e}")
+    
+    def _log_event(self, event: str, **kwargs):
+        """이벤트 로그 기록 (저장소가 없거나 오류면 무시)"""
+        if not self.analysis_store:
+            return
+        try:
+            self.analysis_store.log_event(event, **kwargs)
+        except Exception as e:
+            print(f"⚠️ 이벤트 로그 기록 실패: {e}")
+    
+    def get_recent_events(self, limit: int = 100, event: Optional[str] = None) -> List[Dict]:
+        """최근 분석 이벤트 (analyzed, spooled, spool_dropped)"""
+        if not self.analysis_store:
+            return []
+        try:
+            return self.analysis_store.recent_events(limit, event)
+        except Exception as e:
+            print(f"⚠️ 이벤트 로그 조회 실패: {e}")
+            return []
+    
+    def _spool_job(self, job: Dict, payload, phash: Optional[int], reason: str):
+        """분석하지 못한 작업을 오프라인 스풀에 보관 (제공자 복구 후 드레이너가 재분석)"""
+        if not self.offline_spool:
+            return
+        
+        max_side, quality = self.image_sizing.target
+        if isinstance(payload, CropPayload):
+            encoded = payload.encoded(max_side, quality)
+        elif isinstance(payload, EncodedCrop):
+            encoded = payload
+        else:
+            encoded = self.crop_encoder.encode(job['crop'], max_side, quality)
+        if encoded is None:
+            return
+        
+        captured_at = job.get('submitted_at', time.time())
+        job_id = self.offline_spool.put(encoded.jpeg, {
+            'object_class': job['object_class'],
+            'track_id': job.get('track_id'),
+            'generation': job.get('generation'),
+            'phash': format(phash, '016x') if phash is not None else None,
+            'local': job.get('local') or {},
+            'captured_at': captured_at,
+            'reason': reason,
+        })
+        if job_id is None:
+            return
+        
+        self._log_event('spooled', track_id=job.get('track_id'), object_class=job['object_class'], phash=phash,
+                        detail={'job_id': job_id, 'reason': reason})
+        print(f"📦 분석 작업 스풀 저장: {job['object_class']} ({reason})")
+        self.start_spool_drainer()
+    
+    def start_spool_drainer(self):
+        """스풀 드레이너 시작 (이미 실행 중이면 무시)"""
+        if self.offline_spool:
+            self.offline_spool.start_drainer(self._replay_spooled_job, is_ready=self.has_provider_budget,
+                                             interval=self.analysis_settings['offline_spool']['drain_interval'])
+    
+    def _replay_spooled_job(self, jpeg: bytes, metadata: Dict) -> bool:
+        """스풀 작업 재분석 후 저장소/이벤트 로그 백필 (True면 완료, False면 나중에 재시도)"""
+        object_class = metadata['object_class']
+        crop = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if crop is None:
+            return True   # 손상된 작업은 재시도하지 않음
+        
+        phash = int(metadata['phash'], 16) if metadata.get('phash') else compute_dhash(crop)
+        analysis = self._lookup_store(phash, object_class)
+        if not analysis:
+            payload = self._prepare_payloads([{'crop': crop}])[0]
+            analysis = self.run_provider_chain(payload, object_class) if payload else None
+            if not analysis:
+                return False
+            analysis = self.merge_local_attributes(
+                analysis, metadata.get('local') or self.extract_local_attributes(crop, object_class), object_class
+            )
+            analysis['replayed'] = True
+            # 이벤트는 원래 캡처 시각으로 기록 (녹화 세션 타임라인 유지)
+            self._remember_crop_analysis(phash, object_class, analysis, track_id=metadata.get('track_id'),
+                                         timestamp=metadata.get('captured_at'))
+        
+        # 트랙이 아직 살아 있으면 카드도 갱신
+        track_id = metadata.get('track_id')
+        active_track_ids = self.active_track_ids
+        if (track_id is not None and metadata.get('generation') == self.result_generation
+                and active_track_ids is not None and track_id in active_track_ids):
+            self.cache_track_analysis(track_id, analysis)
+            with self.result_lock:
+                self.result_cache[track_id] = {
+                    'analysis': analysis,
+                    'detailed_name': self.get_detailed_object_name(analysis, object_class),
+                    'timestamp': time.time()
+                }
+        
+        print(f"📦 스풀 작업 재분석 완료: {object_class} → {analysis.get('brand', 'Unknown')} {analysis.get('model', 'Unknown')}")
+        return True
+    
+    def get_copilot_worker_stats(self) -> Optional[Dict]:
+        """GitHub CLI Copilot 워커 통계 (호출 수, 호출별 지연 시간)"""
+        return self.copilot_integration.get_worker_stats() if self.copilot_integration else None
+    
+    def get_spool_stats(self) -> Optional[Dict]:
+        """오프라인 스풀 통계 (대기 작업 수/용량, 재분석 성공/실패)"""
+        return self.offline_spool.get_stats() if self.offline_spool else None
+    
+    def get_cache_stats(self) -> Dict:
+        """캐시 통계 (트랙 캐시 크기 + 지각 해시 캐시 적중/제거 수)"""
+        with self.cache_lock:
+            track_entries = len(self.analysis_cache)
+        return {
+            'track_cache_entries': track_entries,
+            'phash_cache': self.phash_cache.get_stats(),
+            'store': self.analysis_store.get_stats() if self.analysis_store else None
+        }
+    
+    def get_transport_stats(self) -> Dict:
+        """제공자별 HTTP 전송 통계 (요청 수, 재시도, 지연 시간)"""
+        return get_transport_stats()
+    
+    def get_provider_health(self) -> Dict[str, Dict]:
+        """제공자별 상태 (서킷 상태, 성공률, 지연 EWMA) - 대시보드용"""
+        health = self.provider_router.get_health()
+        for provider, config in self.api_providers.items():
+            health.setdefault(provider, {'state': 'closed', 'total_calls': 0})
+            health[provider]['enabled'] = config['enabled']
+        return health
+    
+    def get_budget_usage(self) -> Dict:
+        """제공자별 호출 예산 사용 현황 (분당/일일 사용량, 거절 수, 미룬 작업 수)"""
+        usage = self.rate_limiter.get_usage()
+        usage['deferred_jobs'] = self.deferred_jobs
+        return usage
+    
+    def get_queue_stats(self) -> Dict:
+        """분석 작업 대기열 통계 (대기 수, 밀려난 작업, 만료로 버린 작업)"""
+        stats = self.analysis_queue.get_stats()
+        with self.result_lock:
+            stats['pending_tracks'] = len(self.pending_tracks)
+        return stats
+    
+    def get_provider_order(self) -> List[str]:
+        """현재 상태 기준 제공자 호출 순서"""
+        enabled = [provider for provider in self.provider_order if self.api_providers[provider]['enabled']]
+        return self.provider_router.order(enabled)
+    
+    def get_dispatch_stats(self) -> Dict:
+        """헤지 디스패처 통계 (헤지/폴백 요청 수, 취소 수, 제공자별 승리 수, 배치 통계)"""
+        stats = self.dispatcher.get_stats()
+        stats['batching'] = dict(self.batch_stats)
+        stats['escalation'] = dict(self.escalation_stats)
+        stats['provider_calls'] = self.provider_registry.get_stats()
+        return stats
+    
+    def get_encode_stats(self) -> Dict:
+        """크롭 인코딩 통계 (인코딩 시간, JPEG 크기)"""
+        return self.crop_encoder.get_stats()
+    
+    def get_sizing_stats(self) -> Dict:
+        """제공자별 전송 이미지 수와 예상 이미지 토큰"""
+        return self.image_sizing.get_stats()
+    
+    def get_cached_analysis(self, track_id: int) -> Optional[Dict]:
+        """트랙 캐시 조회 (조회 시 LRU 순서 갱신)"""
+        with self.cache_lock:
+            entry = self.analysis_cache.get(track_id)
+            if entry is None:
+                return None
+            entry['timestamp'] = time.time()
+            self.analysis_cache.move_to_end(track_id)
+            return entry['analysis']
+    
+    def cache_track_analysis(self, track_id: int, analysis: Dict):
+        """트랙 캐시에 분석 결과 저장 (크기 초과 시 LRU 제거)"""
+        with self.cache_lock:
+            self.analysis_cache[track_id] = {
+                'analysis': analysis,
+                'timestamp': time.time()
+            }
+            self.analysis_cache.move_to_end(track_id)
+            while len(self.analysis_cache) > self.max_cache_entries:
+                self.analysis_cache.popitem(last=False)
+    
+    def invalidate_track(self, track_id: int):
+        """트랙의 분석 결과 무효화 (외형 변화 등으로 재분석이 필요할 때)"""
+        with self.cache_lock:
+            self.analysis_cache.pop(track_id, None)
+        with self.result_lock:
+            self.result_cache.pop(track_id, None)
+    
+    def prune_tracks(self, active_track_ids):
+        """사라진 트랙의 캐시 항목/대기 작업 제거, 살아있는 트랙은 사용 시각 갱신"""
+        active_track_ids = set(active_track_ids)
+        current_time = time.time()
+        self.active_track_ids = active_track_ids
+        self.analysis_queue.drop_stale()
+        
+        with self.cache_lock:
+            for track_id in list(self.analysis_cache.keys()):
+                if track_id in active_track_ids:
+                    self.analysis_cache[track_id]['timestamp'] = current_time
+                else:
+                    del self.analysis_cache[track_id]
+    
+    def start_workers(self, num_workers: Optional[int] = None):
+        """비동기 분석 워커 풀 시작"""
+        if self.workers_running:
+            return
+        
+        num_workers = num_workers or self.analysis_settings['num_workers']
+        self.workers_running = True
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._analysis_worker_loop,
+                                      name=f'AIAnalysisWorker-{i}', daemon=True)
+            worker.start()
+            self.analysis_workers.append(worker)
+        
+        # 이전 실행에서 남은 스풀 작업이 있으면 드레이너도 시작
+        if self.offline_spool and self.offline_spool.job_ids():
+            self.start_spool_drainer()
+        
+        print(f"🧵 AI 분석 워커 {num_workers}개 시작")
+    
+    def stop_workers(self):
+        """비동기 분석 워커 풀 종료"""
+        if not self.workers_running:
+            return
+        
+        self.workers_running = False
+        for worker in self.analysis_workers:
+            worker.join(timeout=1)
+        self.analysis_workers = []
+        if self.offline_spool:
+            self.offline_spool.stop_drainer()
+        if self.copilot_integration:
+            self.copilot_integration.shutdown()
+    
+    def _get_escalation_executor(self) -> ThreadPoolExecutor:
+        """상향 스레드 풀 (없으면 생성 - shutdown 후 다시 실행해도 사용 가능)"""
+        with self.escalation_executor_lock:
+            if self.escalation_executor is None:
+                self.escalation_executor = ThreadPoolExecutor(max_workers=self.analysis_settings['batch_max_items'],
+                                                              thread_name_prefix='Escalation')
+            return self.escalation_executor
+    
+    def shutdown(self):
+        """분석기 종료 (워커 풀 + 상향/헤지 디스패처 스레드 풀 + 인코딩 풀)
+        
+        스레드 풀은 다음 사용 시 다시 만들어지므로 종료 후 같은 분석기로 다시 실행 가능
+        """
+        self.stop_workers()
+        with self.escalation_executor_lock:
+            executor, self.escalation_executor = self.escalation_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self.dispatcher.shutdown()
+        self.crop_encoder.shutdown()
+    
+    def submit_analysis(self, track_id: int, frame: np.ndarray, box: List[float],
+                        object_class: str, confidence: float, stable_count: int = 1,
+                        crop: Optional[np.ndarray] = None) -> bool:
+        """트랙 단위 비동기 분석 작업 제출 (렌더 루프를 막지 않음)
+        
+        crop을 주면 (최적 프레임 선택 등으로 미리 복사해 둔 크롭) 프레임에서 다시 자르지 않음
+        """
+        if not self.should_analyze(object_class, confidence) or self.is_local_only(object_class):
+            return False
+        
+        # 이미 분석된 트랙은 캐시 결과를 바로 전달
+        cached = self.get_cached_analysis(track_id)
+        if cached:
+            with self.result_lock:
+                self.result_cache[track_id] = {
+                    'analysis': cached,
+                    'detailed_name': self.get_detailed_object_name(cached, object_class),
+                    'timestamp': time.time()
+                }
+            return True
+        
+        with self.result_lock:
+            if track_id in self.pending_tracks:
+                return False
+            self.pending_tracks.add(track_id)
+            generation = self.result_generation
+        
+        if not self.workers_running:
+            self.start_workers()
+        
+        # 프레임 재사용에 대비해 크롭은 복사본으로 전달
+        if crop is None:
+            crop = self.get_object_crop(frame, box)
+            crop = crop.copy() if crop is not None else None
+        if crop is None or crop.size == 0:
+            with self.result_lock:
+                self.pending_tracks.discard(track_id)
+            return False
+        
+        # 로컬 속성(k-means 색상 등)은 렌더 스레드가 아닌 워커에서 계산
+        job = {
+            'track_id': track_id,
+            'crop': crop,
+            'box': list(box),
+            'frame_shape': frame.shape,
+            'local': None,
+            'object_class': object_class,
+            'confidence': confidence,
+            'generation': generation,
+            'submitted_at': time.time()
+        }
+        score = self.score_job(object_class, box, confidence, stable_count, frame.shape)
+        
+        # 대기열이 가득 차고 더 가치 있는 작업만 있으면 제출 거부
+        if not self.analysis_queue.put(job, score):
+            with self.result_lock:
+                self.pending_tracks.discard(track_id)
+            return False
+        return True
+    
+    def _is_stale_job(self, job: Dict) -> bool:
+        """전송 전에 버려야 할 작업인지 확인 (트랙 리셋 또는 트랙 소멸)"""
+        if job['generation'] != self.result_generation:
+            return True
+        active_track_ids = self.active_track_ids
+        return active_track_ids is not None and job['track_id'] not in active_track_ids
+    
+    def _discard_job(self, job: Dict):
+        """대기열에서 밀려나거나 만료된 작업 정리"""
+        with self.result_lock:
+            self.pending_tracks.discard(job['track_id'])
+    
+    def _analysis_worker_loop(self):
+        """워커 스레드: 대기열의 작업을 꺼내 API 분석 수행 (가능하면 배치로 묶음)"""
+        while self.workers_running:
+            job = self.analysis_queue.get(timeout=0.5)
+            if job is None:
+                continue
+            
+            # 배치를 보낼 제공자가 없으면(예: Gemini 키 없음) 기다려도 묶어 보낼 수 없으므로 바로 처리
+            jobs = [job]
+            if self.analysis_settings['batching_enabled'] and self.has_batch_provider():
+                jobs.extend(self._collect_batch_jobs())
+            
+            try:
+                results, deferred = self._analyze_jobs(jobs)
+            except Exception as e:
+                print(f"❌ 비동기 분석 실패 (트랙 {[job['track_id'] for job in jobs]}): {e}")
+                results, deferred = [None] * len(jobs), []
+            
+            for i, (job, analysis_result) in enumerate(zip(jobs, results)):
+                if i in deferred:
+                    self._defer_job(job)
+                else:
+                    self._finish_job(job, analysis_result)
+    
+    def _collect_batch_jobs(self) -> List[Dict]:
+        """최대 N ms 또는 K개까지 추가 작업 수집"""
+        jobs = []
+        deadline = time.time() + self.analysis_settings['batch_max_wait_ms'] / 1000
+        
+        while len(jobs) + 1 < self.analysis_settings['batch_max_items']:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            job = self.analysis_queue.get(timeout=remaining)
+            if job is None:
+                break
+            jobs.append(job)
+        
+        return jobs
+    
+    def _analyze_jobs(self, jobs: List[Dict]) -> Tuple[List[Optional[Dict]], List[int]]:
+        """작업 목록 분석 (캐시 확인 후 남은 크롭을 한 번의 요청으로 묶어 전송)
+
+        반환: (작업별 결과, 호출 한도 때문에 미뤄야 할 작업 인덱스)
+        """
+        results = [None] * len(jobs)
+        pending = []  # (작업 인덱스, 지각 해시, 인코딩된 크롭)
+        uncached = []
+        
+        for i, job in enumerate(jobs):
+            if job.get('local') is None:
+                job['local'] = self.extract_local_attributes(job['crop'], job['object_class'],
+                                                             job.get('box'), job.get('frame_shape'))
+            phash, cached = self._lookup_crop_caches(job['crop'], job['object_class'])
+            if cached:
+                results[i] = cached
+            else:
+                uncached.append((i, phash))
+        
+        # 호출 가능한 제공자가 없으면 요청을 보내지 않고 미룸
+        if uncached and not self.has_provider_budget():
+            return results, [i for i, _ in uncached]
+        
+        encoded_crops = self._prepare_payloads([jobs[i] for i, _ in uncached])
+        for (i, phash), encoded in zip(uncached, encoded_crops):
+            if encoded:
+                pending.append((i, phash, encoded))
+        
+        # 크롭별 호출 기록 - 배치 요청에서 호출한 제공자는 상향/개별 요청에서 다시 호출하지 않음
+        ledgers = {}
+        if len(pending) > 1:
+            batch_start = time.time()
+            with self.provider_registry.job(JobCallLedger()) as batch_ledger:
+                batch_results = self.run_batch_provider_chain(
+                    [encoded for _, _, encoded in pending],
+                    [jobs[i]['object_class'] for i, _, _ in pending]
+                )
+            ledgers = {i: JobCallLedger(batch_ledger.called) for i, _, _ in pending}
+            
+            # 불확실한 항목의 상향은 병렬로, 배치 요청과 합쳐 작업 마감 시간 하나를 공유
+            if self.analysis_settings['escalation']['enabled']:
+                remaining = self.analysis_settings['job_deadline'] - (time.time() - batch_start)
+                futures = [
+                    self._get_escalation_executor().submit(self.provider_registry.bind(self.escalate_analysis, ledgers[i]),
+                                                    encoded, jobs[i]['object_class'],
+                                                    analysis, remaining) if analysis else None
+                    for (i, _, encoded), analysis in zip(pending, batch_results)
+                ]
+                batch_results = [future.result() if future else None for future in futures]
+            
+            unresolved = []
+            for (i, phash, encoded), analysis in zip(pending, batch_results):
+                if analysis:
+                    results[i] = analysis
+                    self._remember_crop_analysis(phash, jobs[i]['object_class'], analysis, jobs[i]['track_id'])
+                else:
+                    unresolved.append((i, phash, encoded))
+            pending = unresolved
+        
+        # 배치로 해결되지 않은 크롭은 개별 요청
+        for i, phash, encoded in pending:
+            with self.provider_registry.job(ledgers.get(i)):
+                analysis = self.run_provider_chain(encoded, jobs[i]['object_class'],
+                                                   on_partial=self._partial_publisher(jobs[i]))
+            if analysis:
+                results[i] = analysis
+                self._remember_crop_analysis(phash, jobs[i]['object_class'], analysis, jobs[i]['track_id'])
+            else:
+                self._spool_job(jobs[i], encoded, phash, 'providers_failed')
+        
+        return results, []
+    
+    def _defer_job(self, job: Dict):
+        """호출 한도가 풀릴 때까지 작업을 미룬 뒤 대기열에 다시 넣음"""
+        delay = min(max(self.get_budget_wait_time(), 0.5), 60.0)
+        with self.result_lock:
+            self.deferred_jobs += 1
+        
+        timer = threading.Timer(delay, self._requeue_job, args=(job,))
+        timer.daemon = True
+        timer.start()
+    
+    def _requeue_job(self, job: Dict):
+        """미뤄둔 작업 재투입 (종료/대기열 포화로 재투입할 수 없으면 스풀에 보관, 사라진 트랙은 폐기)"""
+        active_track_ids = self.active_track_ids
+        
+        # 트랙이 사라졌거나 초기화된 작업은 결과를 받을 곳이 없으므로 보관하지 않고 폐기
+        if job['generation'] != self.result_generation or \
+                (active_track_ids is not None and job['track_id'] not in active_track_ids):
+            self._discard_job(job)
+            return
+        
+        if not self.workers_running:
+            reason = 'workers_stopped'
+        elif not self.analysis_queue.put(job):
+            reason = 'queue_full'
+        else:
+            return
+        
+        # 호출 한도/서킷 때문에 분석하지 못한 크롭은 스풀에 보관 (나중에 저장소를 채움)
+        self._spool_job(job, job.get('payload'), compute_dhash(job['crop']), reason)
+        self._discard_job(job)
+    
+    def _partial_publisher(self, job: Dict):
+        """스트리밍 부분 필드를 트랙에 즉시 게시하는 콜백 (작업이 끝났거나 리셋된 경우 무시)"""
+        def publish(fields: Dict):
+            analysis = self.merge_local_attributes(fields, job.get('local'), job['object_class'])
+            analysis['partial'] = True
+            analysis.setdefault('source', 'stream')
+            
+            with self.result_lock:
+                if job['generation'] != self.result_generation or job['track_id'] not in self.pending_tracks:
+                    return
+                self.result_cache[job['track_id']] = {
+                    'analysis': analysis,
+                    'detailed_name': self.get_detailed_object_name(analysis, job['object_class']),
+                    'timestamp': time.time()
+                }
+        return publish
+    
+    def _finish_job(self, job: Dict, analysis_result: Optional[Dict]):
+        """작업 결과를 트랙 캐시/결과 대기열에 반영"""
+        if analysis_result:
+            analysis_result = self.merge_local_attributes(analysis_result, job.get('local'), job['object_class'])
+        
+        with self.result_lock:
+            self.pending_tracks.discard(job['track_id'])
+            if analysis_result and job['generation'] == self.result_generation:
+                self.cache_track_analysis(job['track_id'], analysis_result)
+                self.result_cache[job['track_id']] = {
+                    'analysis': analysis_result,
+                    'detailed_name': self.get_detailed_object_name(analysis_result, job['object_class']),
+                    'timestamp': time.time()
+                }
+        
+        if analysis_result:
+            elapsed = time.time() - job['submitted_at']
+            print(f"🔍 {job['object_class']} (트랙 {job['track_id']}) 상세 분석 완료: "
+                  f"{analysis_result.get('brand', 'Unknown')} {analysis_result.get('model', 'Unknown')} "
+                  f"({elapsed:.1f}초)")
+    
+    def run_batch_provider_chain(self, images_base64: List, object_classes: List[str]) -> List[Optional[Dict]]:
+        """여러 크롭을 한 번의 멀티 이미지 요청으로 분석 (헤지 디스패처 사용, 상향 시 저렴한 제공자만)"""
+        batch_validator = lambda results: bool(results) and any(results)
+        escalation = self.analysis_settings['escalation']
+        
+        # 단계적 상향 시 배치는 저렴한 제공자로만 보내고, 불확실한 항목만 개별 상향
+        results = self._dispatch_providers(
+            self.batch_provider_functions, (images_base64, object_classes), batch_validator,
+            providers=escalation['cheap_providers'] if escalation['enabled'] else None
+        )
+        if not results:
+            return [None] * len(images_base64)
+        
+        with self.result_lock:
+            self.batch_stats['batches'] += 1
+            self.batch_stats['batched_items'] += len(images_base64)
+            self.batch_stats['requests_saved'] += len(images_base64) - 1
+        return results
+    
+    def create_batch_analysis_prompt(self, object_classes: List[str]) -> str:
+        """배치 분석 프롬프트 생성 (이미지 번호별 결과를 JSON 배열로 요청)"""
+        labels = '\n'.join(f"- Image {i + 1}: {object_class}" for i, object_class in enumerate(object_classes))
+        return f"""You will receive {len(object_classes)} images. Each image shows one object:
+{labels}
+
+Analyze every image and respond with ONLY a valid JSON array, one object per image:
+[
+    {{
+        "index": 1,
+        "brand": "brand name or Unknown",
+        "model": "model name or Unknown",
+        "type": "specific type",
+        "color": "primary color",
+        "distinctive_features": ["feature1", "feature2"],
+        "condition": "condition status",
+        "confidence": 0.8
+    }}
+]
+
+IMPORTANT: Return ONLY the JSON array, no markdown, no explanations."""
+    
+    def _parse_batch_response(self, content, count: int, provider_name: str) -> List[Optional[Dict]]:
+        """배치 응답({"r": [...]} 또는 JSON 배열)을 이미지 순서대로 분리 (잘린 응답은 완성된 항목만)"""
+        results = parse_batch(content, count)
+        if not any(results):
+            print(f"⚠️ {provider_name} 배치 응답 JSON 파싱 실패: {str(content)[:100]}...")
+        
+        for item in results:
+            if item is not None:
+                item['provider'] = provider_name
+        return results
+    
+    def analyze_batch_with_google(self, images_base64: List[str], object_classes: List[str]) -> Optional[List[Optional[Dict]]]:
+        """Google Gemini 멀티 이미지 배치 분석"""
+        structured = self.analysis_settings['structured_output']
+        prompt = compact_batch_prompt(object_classes, self.get_remote_fields()) if structured else self.create_batch_analysis_prompt(object_classes)
+        parts = [{"text": prompt}]
+        for i, image_base64 in enumerate(images_base64):
+            parts.append({"text": f"Image {i + 1}:"})
+            parts.append({"inline_data": {"mime_type": "image/jpeg", "data": image_base64}})
+        
+        payload = {
+            "contents": [{"parts": parts}],
+            "generationConfig": self._google_generation_config(
+                (150 if structured else 300) * len(images_base64), build_batch_schema(self.get_remote_fields()) if structured else None
+            )
+        }
+        url = f"{self.api_providers['google']['endpoint']}?key={self.api_providers['google']['api_key']}"
+        
+        try:
+            response = self.transports['google'].post(
+                url, headers={'Content-Type': 'application/json'}, json=payload,
+                timeout=self.analysis_settings['max_analysis_time']
+            )
+            if response.status_code != 200:
+                print(f"❌ Google 배치 API 오류 ({response.status_code}): {response.text[:100]}")
+                return None
+            content = response.json()['candidates'][0]['content']['parts'][0]['text']
+            return self._parse_batch_response(content, len(images_base64), 'Google Gemini 2.0 Flash')
+        except Exception as e:
+            print(f"❌ Google 배치 분석 실패: {e}")
+            return None
+    
+    def analyze_batch_with_openai(self, images_base64: List[str], object_classes: List[str]) -> Optional[List[Optional[Dict]]]:
+        """OpenAI GPT-4 Vision 멀티 이미지 배치 분석"""
+        structured = self.analysis_settings['structured_output']
+        prompt = compact_batch_prompt(object_classes, self.get_remote_fields()) if structured else self.create_batch_analysis_prompt(object_classes)
+        content_parts = [{"type": "text", "text": prompt}]
+        for i, image_base64 in enumerate(images_base64):
+            content_parts.append({"type": "text", "text": f"Image {i + 1}:"})
+            content_parts.append({"type": "image_url",
+                                  "image_url": {"url": f"data:image/jpeg;base64,{image_base64}",
+                                                "detail": OPENAI_DETAIL}})
+        
+        payload = {
+            "model": self.api_providers['openai']['model'],
+            "messages": [{"role": "user", "content": content_parts}],
+            "max_tokens": (150 if structured else 500) * len(images_base64),
+            "temperature": 0.1
+        }
+        if structured:
+            payload["response_format"] = self._openai_response_format('batch_analysis', build_batch_schema(self.get_remote_fields()))
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {self.api_providers['openai']['api_key']}"
+        }
+        
+        try:
+            response = self.transports['openai'].post(
+                self.api_providers['openai']['endpoint'], headers=headers, json=payload,
+                timeout=self.analysis_settings['max_analysis_time']
+            )
+            if response.status_code != 200:
+                print(f"❌ OpenAI 배치 API 오류: {response.status_code}")
+                return None
+            content = response.json()['choices'][0]['message']['content']
+            return self._parse_batch_response(content, len(images_base64), 'OpenAI GPT-4')
+        except Exception as e:
+            print(f"❌ OpenAI 배치 분석 실패: {e}")
+            return None
+    
+    def analyze_batch_with_anthropic(self, images_base64: List[str], object_classes: List[str]) -> Optional[List[Optional[Dict]]]:
+        """Anthropic Claude 멀티 이미지 배치 분석"""
+        structured = self.analysis_settings['structured_output']
+        prompt = compact_batch_prompt(object_classes, self.get_remote_fields()) if structured else self.create_batch_analysis_prompt(object_classes)
+        content_parts = [{"type": "text", "text": prompt}]
+        for i, image_base64 in enumerate(images_base64):
+            content_parts.append({"type": "text", "text": f"Image {i + 1}:"})
+            content_parts.append({"type": "image", "source": {
+                "type": "base64", "media_type": "image/jpeg", "data": image_base64
+            }})
+        
+        payload = {
+            "model": self.api_providers['anthropic']['model'],
+            "max_tokens": (150 if structured else 500) * len(images_base64),
+            "temperature": 0.1,
+            "messages": [{"role": "user", "content": content_parts}]
+        }
+        if structured:
+            payload.update(self._anthropic_tool('report_batch_analysis', build_batch_schema(self.get_remote_fields())))
+        headers = {
+            'Content-Type': 'application/json',
+            'x-api-key': self.api_providers['anthropic']['api_key'],
+            'anthropic-version': '2023-06-01'
+        }
+        
+        try:
+            response = self.transports['anthropic'].post(
+                self.api_providers['anthropic']['endpoint'], headers=headers, json=payload,
+                timeout=self.analysis_settings['max_analysis_time']
+            )
+            if response.status_code != 200:
+                print(f"❌ Anthropic 배치 API 오류: {response.status_code}")
+                return None
+            content = self._anthropic_content(response.json())
+            return self._parse_batch_response(content, len(images_base64), 'Anthropic Claude')
+        except Exception as e:
+            print(f"❌ Anthropic 배치 분석 실패: {e}")
+            return None
+    
+    def collect_results(self) -> Dict[int, Dict]:
+        """완료된 비동기 분석 결과 수집 (트랙 ID → 결과)"""
+        with self.result_lock:
+            results = self.result_cache
+            self.result_cache = {}
+        return results
+    
+    def is_pending(self, track_id: int) -> bool:
+        """트랙의 분석 작업이 대기/진행 중인지 확인"""
+        with self.result_lock:
+            return track_id in self.pending_tracks
+    
+    def reset_tracks(self):
+        """트랙 ID 재사용 시 이전 작업 결과 폐기"""
+        with self.result_lock:
+            self.result_generation += 1
+            self.result_cache = {}
+            self.pending_tracks = set()
+        self.active_track_ids = None
+        self.analysis_queue.clear()
+        with self.cache_lock:
+            self.analysis_cache.clear()
+    
     def get_detailed_object_name(self, analysis: Dict, original_class: str) -> str:
         """분석 결과를 바탕으로 상세한 객체명 생성"""
         if not analysis:
@@ -616,17 +2010,17 @@ IMPORTANT: Return ONLY the JSON object above, no markdown, no explanations."""
         return original_class
     
     def clear_cache(self):
-        """캐시 정리"""
+        """캐시 정리 (일정 시간 동안 사용되지 않은 트랙 항목 제거)"""
         current_time = time.time()
-        expired_keys = []
         
-        for key, data in self.analysis_cache.items():
-            if 'timestamp' in data:
-                if current_time - data['timestamp'] > self.cache_expire_time:
-                    expired_keys.append(key)
+        with self.cache_lock:
+            expired_keys = [key for key, data in self.analysis_cache.items()
+                            if current_time - data['timestamp'] > self.cache_expire_time]
+            
+            for key in expired_keys:
+                del self.analysis_cache[key]
         
-        for key in expired_keys:
-            del self.analysis_cache[key]
+        return len(expired_keys)
 
 # 설정 파일 생성 함수
 def create_api_config_template():
@@ -56,7 +56,7 @@ def test_api_keys():
     try:
         from github_copilot_integration import GitHubCopilotIntegration
         copilot = GitHubCopilotIntegration()
-        copilot_available = copilot.is_available()
+        copilot_available = copilot.is_available(wait=True)
         apis['GitHub Copilot'] = 'available' if copilot_available else None
     except ImportError:
         apis['GitHub Copilot'] = None
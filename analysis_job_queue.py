@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+📋 우선순위 분석 작업 대기열
+점수가 높은 작업부터 꺼내고, 가득 차면 점수가 가장 낮은 작업을 밀어내며,
+꺼낼 때 이미 사라진 트랙의 작업은 버림
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class AnalysisJobQueue:
+    """점수 기반 우선순위 + 용량 제한 + 만료 작업 제거를 지원하는 작업 대기열"""
+
+    def __init__(self, maxsize: int = 8, is_stale: Optional[Callable[[Dict], bool]] = None,
+                 on_discard: Optional[Callable[[Dict], None]] = None):
+        self.maxsize = maxsize
+        self.is_stale = is_stale        # 꺼낼 때 버릴 작업 판별 (트랙 소멸 등)
+        self.on_discard = on_discard    # 밀려나거나 버려진 작업 정리 콜백
+        self._heap = []                 # (-점수, 순번, 작업)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+        # 통계
+        self.enqueued = 0
+        self.evicted = 0
+        self.stale_dropped = 0
+
+    def put(self, job: Dict, score: Optional[float] = None) -> bool:
+        """작업 추가 (가득 찬 경우 더 낮은 점수의 작업을 밀어내고, 없으면 False)"""
+        score = job.get('priority_score', 0.0) if score is None else score
+        job['priority_score'] = score
+        discarded = None
+
+        with self._cond:
+            if len(self._heap) >= self.maxsize:
+                # 힙에서 점수가 가장 낮은 항목 찾기 (크기가 작으므로 선형 탐색)
+                lowest = max(range(len(self._heap)), key=lambda i: (self._heap[i][0], self._heap[i][1]))
+                if -self._heap[lowest][0] >= score:
+                    return False
+                discarded = self._heap[lowest][2]
+                self._heap[lowest] = self._heap[-1]
+                self._heap.pop()
+                heapq.heapify(self._heap)
+                self.evicted += 1
+
+            heapq.heappush(self._heap, (-score, next(self._counter), job))
+            self.enqueued += 1
+            self._cond.notify()
+
+        if discarded is not None and self.on_discard:
+            self.on_discard(discarded)
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """점수가 가장 높은 유효 작업 반환 (시간 초과 시 None)"""
+        deadline = time.time() + timeout if timeout is not None else None
+        stale_jobs = []
+
+        try:
+            with self._cond:
+                while True:
+                    while self._heap:
+                        job = heapq.heappop(self._heap)[2]
+                        if self.is_stale and self.is_stale(job):
+                            self.stale_dropped += 1
+                            stale_jobs.append(job)
+                            continue
+                        return job
+
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+        finally:
+            if self.on_discard:
+                for job in stale_jobs:
+                    self.on_discard(job)
+
+    def drop_stale(self) -> int:
+        """대기 중인 만료 작업 즉시 제거"""
+        if not self.is_stale:
+            return 0
+
+        with self._cond:
+            kept, stale_jobs = [], []
+            for item in self._heap:
+                (stale_jobs if self.is_stale(item[2]) else kept).append(item)
+            heapq.heapify(kept)
+            self._heap = kept
+            self.stale_dropped += len(stale_jobs)
+
+        if self.on_discard:
+            for item in stale_jobs:
+                self.on_discard(item[2])
+        return len(stale_jobs)
+
+    def clear(self):
+        """대기열 비우기"""
+        with self._cond:
+            self._heap = []
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {
+                'queued': len(self._heap),
+                'enqueued': self.enqueued,
+                'evicted': self.evicted,
+                'stale_dropped': self.stale_dropped,
+            }
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+💾 영구 분석 결과 저장소 (SQLite WAL)
+크롭 지각 해시 + 클래스 + 제공자 단위로 분석 결과를 디스크에 저장해 재시작 후에도 재사용
+분석 이벤트 로그(스풀 저장/재분석 완료 등)도 같은 DB에 기록
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from crop_hash_cache import hamming_distance
+
+DEFAULT_STORE_PATH = os.getenv('AI_ANALYSIS_STORE', 'analysis_store.db')
+
+
+class AnalysisStore:
+    """여러 트래커 프로세스가 공유할 수 있는 SQLite 기반 분석 결과 저장소"""
+
+    def __init__(self, db_path: str = DEFAULT_STORE_PATH, ttl: float = 7 * 24 * 3600,
+                 max_rows: int = 20000, max_distance: int = 6, max_events: int = 50000):
+        self.db_path = db_path
+        self.ttl = ttl                    # 초 (기본 7일)
+        self.max_rows = max_rows
+        self.max_distance = max_distance  # 근사 일치로 인정할 최대 해밍 거리
+        self.max_events = max_events
+        self._local = threading.local()   # sqlite 연결은 스레드별로 생성
+        self._write_count = 0
+        self._count_lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 연결 반환 (WAL 모드, 잠금 대기 설정)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        """테이블 및 인덱스 생성"""
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_results (
+                phash TEXT NOT NULL,
+                object_class TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (phash, object_class, provider)
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_analysis_class_used
+            ON analysis_results (object_class, last_used)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                event TEXT NOT NULL,
+                track_id INTEGER,
+                object_class TEXT,
+                phash TEXT,
+                detail TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_created
+            ON analysis_events (created_at)
+        """)
+
+    def lookup(self, phash: Optional[int], object_class: str) -> Optional[Dict]:
+        """해시 + 클래스로 최신 분석 결과 조회 (정확 일치 → 근사 일치 순)"""
+        if phash is None:
+            return None
+
+        conn = self._connect()
+        min_created = time.time() - self.ttl
+        key = format(phash, '016x')
+
+        row = conn.execute(
+            "SELECT phash, provider, analysis FROM analysis_results "
+            "WHERE phash = ? AND object_class = ? AND created_at >= ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (key, object_class, min_created)
+        ).fetchone()
+
+        if row is not None:
+            self.hits += 1
+        else:
+            # 근사 일치 탐색 (최근 사용된 같은 클래스 항목 중 최소 해밍 거리)
+            candidates = conn.execute(
+                "SELECT phash, provider, analysis FROM analysis_results "
+                "WHERE object_class = ? AND created_at >= ? "
+                "ORDER BY last_used DESC LIMIT 2000",
+                (object_class, min_created)
+            ).fetchall()
+
+            best_distance = self.max_distance + 1
+            for candidate in candidates:
+                distance = hamming_distance(phash, int(candidate[0], 16))
+                if distance < best_distance:
+                    row, best_distance = candidate, distance
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.near_hits += 1
+
+        conn.execute(
+            "UPDATE analysis_results SET last_used = ? WHERE phash = ? AND object_class = ? AND provider = ?",
+            (time.time(), row[0], object_class, row[1])
+        )
+
+        try:
+            return json.loads(row[2])
+        except json.JSONDecodeError:
+            return None
+
+    def store(self, phash: Optional[int], object_class: str, analysis: Dict):
+        """분석 결과 저장 (주기적으로 만료/초과 항목 정리)"""
+        if phash is None or not analysis:
+            return
+
+        current_time = time.time()
+        provider = analysis.get('provider', 'unknown')
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_results "
+            "(phash, object_class, provider, analysis, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (format(phash, '016x'), object_class, provider,
+             json.dumps(analysis, ensure_ascii=False), current_time, current_time)
+        )
+
+        with self._count_lock:
+            self._write_count += 1
+            should_prune = self._write_count % 100 == 0
+        if should_prune:
+            self.prune()
+
+    def log_event(self, event: str, track_id: Optional[int] = None, object_class: Optional[str] = None,
+                  phash: Optional[int] = None, detail: Optional[Dict] = None, timestamp: Optional[float] = None):
+        """분석 이벤트 기록 (timestamp를 주면 원래 발생 시각으로 기록)"""
+        self._connect().execute(
+            "INSERT INTO analysis_events (created_at, event, track_id, object_class, phash, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (timestamp or time.time(), event, track_id, object_class,
+             format(phash, '016x') if phash is not None else None,
+             json.dumps(detail, ensure_ascii=False) if detail is not None else None)
+        )
+
+    def recent_events(self, limit: int = 100, event: Optional[str] = None) -> List[Dict]:
+        """최근 이벤트 (최신 순, event로 종류 제한)"""
+        query = "SELECT created_at, event, track_id, object_class, phash, detail FROM analysis_events"
+        params = []
+        if event is not None:
+            query += " WHERE event = ?"
+            params.append(event)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        events = []
+        for created_at, name, track_id, object_class, phash, detail in self._connect().execute(query, params):
+            events.append({
+                'timestamp': created_at,
+                'event': name,
+                'track_id': track_id,
+                'object_class': object_class,
+                'phash': phash,
+                'detail': json.loads(detail) if detail else None,
+            })
+        return events
+
+    def prune(self) -> int:
+        """TTL 만료 항목 삭제 후 최대 행 수를 넘는 만큼 오래 사용되지 않은 항목 삭제"""
+        conn = self._connect()
+        deleted = conn.execute(
+            "DELETE FROM analysis_results WHERE created_at < ?",
+            (time.time() - self.ttl,)
+        ).rowcount
+
+        deleted += conn.execute(
+            "DELETE FROM analysis_results WHERE rowid IN ("
+            "SELECT rowid FROM analysis_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        ).rowcount
+
+        # 이벤트 로그도 같은 TTL/최대 개수로 정리
+        deleted += conn.execute(
+            "DELETE FROM analysis_events WHERE created_at < ?",
+            (time.time() - self.ttl,)
+        ).rowcount
+        deleted += conn.execute(
+            "DELETE FROM analysis_events WHERE id IN ("
+            "SELECT id FROM analysis_events ORDER BY id DESC LIMIT -1 OFFSET ?)",
+            (self.max_events,)
+        ).rowcount
+        return deleted
+
+    def get_stats(self) -> Dict:
+        """저장소 통계"""
+        conn = self._connect()
+        row_count = conn.execute("SELECT COUNT(*) FROM analysis_results").fetchone()[0]
+        event_count = conn.execute("SELECT COUNT(*) FROM analysis_events").fetchone()[0]
+        return {
+            'path': self.db_path,
+            'rows': row_count,
+            'events': event_count,
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        """현재 스레드의 연결 닫기"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+🎨 트랙 외형 변화 감지
+트랙마다 HSV 히스토그램 서명을 매 프레임 갱신(EMA)하고, 분석 시점의 서명과 비교해
+외형이 크게 바뀐 경우(예: 다른 휴대폰으로 교체)에만 재분석을 요청
+"""
+
+import threading
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+def compute_appearance_signature(crop: np.ndarray, bins=(16, 8), max_side: int = 64) -> Optional[np.ndarray]:
+    """축소한 크롭의 H-S 히스토그램 (합이 1이 되도록 정규화)"""
+    if crop is None or crop.size == 0 or crop.ndim != 3:
+        return None
+
+    height, width = crop.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1.0:
+        crop = cv2.resize(crop, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, list(bins), [0, 180, 0, 256]).astype(np.float32)
+    total = hist.sum()
+    return hist / total if total > 0 else None
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """두 서명 사이 바타차리야 거리 (0: 동일, 1: 완전히 다름)"""
+    return float(cv2.compareHist(a, b, cv2.HISTCMP_BHATTACHARYYA))
+
+
+class AppearanceDriftMonitor:
+    """트랙별 외형 서명 추적 및 변화 감지"""
+
+    def __init__(self, threshold: float = 0.4, alpha: float = 0.3, confirm_frames: int = 5):
+        self.threshold = threshold            # 분석 시점 대비 이 거리 이상이면 변화로 간주
+        self.alpha = alpha                    # 서명 EMA 가중치
+        self.confirm_frames = confirm_frames  # 연속 몇 프레임 초과해야 확정 (가림/조명 순간 변화 무시)
+        self._tracks = {}                     # track_id → {'current', 'reference', 'over_count', 'distance'}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.updates = 0
+        self.drifts_detected = 0
+
+    def update(self, track_id: int, crop: np.ndarray) -> bool:
+        """현재 크롭으로 서명 갱신, 기준 서명 대비 외형 변화가 확정되면 True"""
+        signature = compute_appearance_signature(crop)
+        if signature is None:
+            return False
+
+        with self._lock:
+            self.updates += 1
+            state = self._tracks.get(track_id)
+            if state is None:
+                self._tracks[track_id] = {'current': signature, 'reference': None,
+                                          'over_count': 0, 'distance': 0.0}
+                return False
+
+            state['current'] = state['current'] * (1 - self.alpha) + signature * self.alpha
+            if state['reference'] is None:
+                return False
+
+            state['distance'] = signature_distance(state['reference'], state['current'])
+            if state['distance'] < self.threshold:
+                state['over_count'] = 0
+                return False
+
+            state['over_count'] += 1
+            if state['over_count'] < self.confirm_frames:
+                return False
+
+            # 변화 확정 → 기준 서명 해제 (새 분석 결과가 반영될 때 다시 설정)
+            state['reference'] = None
+            state['over_count'] = 0
+            self.drifts_detected += 1
+            return True
+
+    def set_reference(self, track_id: int):
+        """분석 결과가 반영된 시점의 서명을 기준으로 고정"""
+        with self._lock:
+            state = self._tracks.get(track_id)
+            if state is not None:
+                state['reference'] = state['current'].copy()
+                state['over_count'] = 0
+                state['distance'] = 0.0
+
+    def get_distance(self, track_id: int) -> Optional[float]:
+        """기준 서명 대비 현재 거리 (기준이 없으면 None)"""
+        with self._lock:
+            state = self._tracks.get(track_id)
+            if state is None or state['reference'] is None:
+                return None
+            return state['distance']
+
+    def prune(self, active_track_ids):
+        """사라진 트랙 서명 제거"""
+        active_track_ids = set(active_track_ids)
+        with self._lock:
+            for track_id in [tid for tid in self._tracks if tid not in active_track_ids]:
+                del self._tracks[track_id]
+
+    def clear(self):
+        with self._lock:
+            self._tracks = {}
+
+    def get_stats(self) -> Dict:
+        """외형 변화 감지 통계"""
+        with self._lock:
+            return {
+                'tracks': len(self._tracks),
+                'updates': self.updates,
+                'drifts_detected': self.drifts_detected,
+            }
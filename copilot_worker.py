@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+🧑‍✈️ GitHub CLI Copilot 호출 풀
+gh copilot은 서버 모드가 없어 프롬프트마다 명령 실행이 필요하므로, gh 경로/환경 준비는 한 번만 하고
+프로세스 내 스레드 풀에서 여러 객체의 호출을 순차 대기 없이 병렬로 실행
+(풀 크기는 분석 워커/상향 호출이 동시에 Copilot을 부를 수 있는 수에 맞춤)
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+
+def run_gh_copilot(gh_path: str, prompt: str, timeout: float, env: Dict[str, str]) -> Optional[str]:
+    """gh copilot suggest 한 번 실행 (실패 시 None)"""
+    try:
+        result = subprocess.run([gh_path, 'copilot', 'suggest', '-t', 'shell', prompt],
+                                capture_output=True, text=True, timeout=timeout, env=env)
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    if result.returncode == 0 and result.stdout:
+        return result.stdout
+    return None
+
+
+class CopilotWorkerPool:
+    """gh copilot 호출 스레드 풀 (gh 경로/환경은 시작 시 한 번만 확인)"""
+
+    def __init__(self, size: int = 4, timeout: float = 10.0):
+        self.size = size
+        self.timeout = timeout
+
+        self._executor = None
+        self._gh_path = None
+        self._env = None
+        self._lock = threading.Lock()
+
+        # 통계
+        self._latencies = deque(maxlen=200)   # 호출별 (제출 → 결과) 시간
+        self.calls = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def start(self) -> 'CopilotWorkerPool':
+        """gh 경로/환경 준비 후 스레드 풀 시작"""
+        with self._lock:
+            if self._executor is not None:
+                return self
+            self._gh_path = shutil.which('gh')
+            self._env = dict(os.environ, GH_PROMPT_DISABLED='1', NO_COLOR='1')
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='CopilotCall')
+        print(f"🧑‍✈️ GitHub CLI Copilot 호출 풀 시작 (동시 {self.size}개)")
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def submit(self, prompt: str) -> Future:
+        """프롬프트 제출 (Future 결과는 gh 출력 문자열 또는 None)"""
+        if not self.running:
+            self.start()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return self._executor.submit(self._call, prompt, time.perf_counter())
+        except RuntimeError:
+            # 종료된 풀
+            with self._lock:
+                self.in_flight -= 1
+            future = Future()
+            future.set_result(None)
+            return future
+
+    def _call(self, prompt: str, submitted: float) -> Optional[str]:
+        output = run_gh_copilot(self._gh_path, prompt, self.timeout, self._env) if self._gh_path else None
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            if output is None:
+                self.failures += 1
+            self._latencies.append(time.perf_counter() - submitted)
+        return output
+
+    def run(self, prompt: str, timeout: Optional[float] = None) -> Optional[str]:
+        """프롬프트 실행 후 결과 대기 (시간 초과 시 None)"""
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=(timeout or self.timeout) + 1)
+        except Exception:
+            return None
+
+    def get_stats(self) -> Dict:
+        """호출 수/실패 수, 동시 실행 수, 호출별 지연 시간(평균/p50/p90 ms)"""
+        with self._lock:
+            samples = sorted(self._latencies)
+            return {
+                'workers': self.size,
+                'running': self.running,
+                'calls': self.calls,
+                'failures': self.failures,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'avg_latency_ms': sum(samples) / len(samples) * 1000 if samples else None,
+                'p50_latency_ms': samples[len(samples) // 2] * 1000 if samples else None,
+                'p90_latency_ms': samples[min(len(samples) - 1, int(len(samples) * 0.9))] * 1000 if samples else None,
+            }
+
+    def shutdown(self):
+        """스레드 풀 종료 (실행 중인 gh 호출은 제한 시간 안에 끝남)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+🗜️ 크롭 JPEG 인코딩 워커 풀
+크롭 축소/JPEG 인코딩을 스레드 풀에서 수행하고, JPEG 바이트를 기본 형태로 보관하며
+base64 문자열은 필요한 제공자가 처음 요청할 때 한 번만 생성해 재사용
+(같은 크롭을 제공자마다 다른 크기로 보낼 수 있도록 크기/품질별로 메모)
+"""
+
+import base64
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class EncodedCrop:
+    """JPEG 인코딩된 크롭 (base64는 지연 생성 후 메모)"""
+
+    __slots__ = ('jpeg', 'width', 'height', 'encode_ms', '_base64', '_lock')
+
+    def __init__(self, jpeg: bytes, width: int, height: int, encode_ms: float):
+        self.jpeg = jpeg
+        self.width = width
+        self.height = height
+        self.encode_ms = encode_ms
+        self._base64 = None
+        self._lock = threading.Lock()
+
+    @property
+    def base64(self) -> str:
+        """base64 문자열 (헤지 요청 등 여러 제공자가 공유)"""
+        if self._base64 is None:
+            with self._lock:
+                if self._base64 is None:
+                    self._base64 = base64.b64encode(self.jpeg).decode('ascii')
+        return self._base64
+
+    def __len__(self) -> int:
+        return len(self.jpeg)
+
+
+def encode_crop_jpeg(crop: np.ndarray, max_side: int = 512, quality: int = 85) -> Optional[EncodedCrop]:
+    """긴 변이 max_side 이하가 되도록 축소 후 JPEG 인코딩 (실패 시 None)"""
+    if crop is None or crop.size == 0:
+        return None
+
+    start = time.perf_counter()
+    height, width = crop.shape[:2]
+    if max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        crop = cv2.resize(crop, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    ok, buffer = cv2.imencode('.jpg', crop, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None
+
+    encode_ms = (time.perf_counter() - start) * 1000
+    return EncodedCrop(buffer.tobytes(), crop.shape[1], crop.shape[0], encode_ms)
+
+
+class CropPayload:
+    """분석 작업 하나의 크롭 + 크기/품질별 인코딩 결과 메모 (헤지/재시도 시 재사용)"""
+
+    def __init__(self, crop: np.ndarray, encoder: 'CropEncoderPool'):
+        self.crop = crop
+        self.encoder = encoder
+        self._encoded = {}   # (긴 변, 품질) → EncodedCrop 또는 Future
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """원본 크롭 (가로, 세로)"""
+        return self.crop.shape[1], self.crop.shape[0]
+
+    def prefetch(self, max_side: int, quality: int):
+        """인코딩 풀에 미리 인코딩 요청 (이미 있으면 무시)"""
+        with self._lock:
+            if (max_side, quality) not in self._encoded:
+                self._encoded[(max_side, quality)] = self.encoder.submit(self.crop, max_side, quality)
+
+    def encoded(self, max_side: int, quality: int) -> Optional[EncodedCrop]:
+        """해당 크기/품질의 인코딩 결과 (없으면 호출 스레드에서 인코딩)"""
+        key = (max_side, quality)
+        with self._lock:
+            entry = self._encoded.get(key)
+        if entry is None:
+            entry = self.encoder.encode(self.crop, max_side, quality)
+            with self._lock:
+                entry = self._encoded.setdefault(key, entry)
+        if isinstance(entry, Future):
+            entry = entry.result()
+            with self._lock:
+                self._encoded[key] = entry
+        return entry
+
+
+class CropEncoderPool:
+    """크롭 인코딩 스레드 풀 (OpenCV 인코딩은 GIL을 풀어 병렬 수행 가능) + 인코딩 시간 통계"""
+
+    def __init__(self, max_workers: int = 2, max_side: int = 512, quality: int = 85):
+        self.max_side = max_side
+        self.quality = quality
+        self.max_workers = max_workers
+        self._executor = None   # 첫 submit에서 시작 (shutdown 후에도 다시 시작)
+
+        # 통계
+        self._lock = threading.Lock()
+        self._encode_times = deque(maxlen=200)
+        self.encoded = 0
+        self.failures = 0
+        self.total_bytes = 0
+
+    def encode(self, crop: np.ndarray, max_side: Optional[int] = None,
+               quality: Optional[int] = None) -> Optional[EncodedCrop]:
+        """호출 스레드에서 바로 인코딩 (통계 기록)"""
+        try:
+            encoded = encode_crop_jpeg(crop, max_side or self.max_side, quality or self.quality)
+        except Exception as e:
+            print(f"❌ 이미지 인코딩 실패: {e}")
+            encoded = None
+
+        with self._lock:
+            if encoded is None:
+                self.failures += 1
+            else:
+                self.encoded += 1
+                self.total_bytes += len(encoded)
+                self._encode_times.append(encoded.encode_ms)
+        return encoded
+
+    def submit(self, crop: np.ndarray, max_side: Optional[int] = None,
+               quality: Optional[int] = None) -> Future:
+        """인코딩 작업 제출 (Future 결과는 EncodedCrop 또는 None)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='CropEncoder')
+            executor = self._executor
+        return executor.submit(self.encode, crop, max_side, quality)
+
+    def get_stats(self) -> Dict:
+        """인코딩 통계 (평균/p90/최대 인코딩 시간, 평균 JPEG 크기)"""
+        with self._lock:
+            samples = sorted(self._encode_times)
+            encoded = self.encoded
+            return {
+                'encoded': encoded,
+                'failures': self.failures,
+                'avg_encode_ms': sum(samples) / len(samples) if samples else None,
+                'p90_encode_ms': samples[min(len(samples) - 1, int(len(samples) * 0.9))] if samples else None,
+                'max_encode_ms': samples[-1] if samples else None,
+                'avg_jpeg_bytes': self.total_bytes / encoded if encoded else None,
+            }
+
+    def shutdown(self):
+        """스레드 풀 종료 (통계는 유지, 다음 submit에서 다시 시작)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+🧩 크롭 지각 해시(dHash) 중복 제거 캐시
+시각적으로 동일한 크롭은 트랙이 달라도 API 호출 없이 이전 분석 결과를 재사용
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+def compute_dhash(image: np.ndarray, hash_size: int = 8) -> Optional[int]:
+    """차이 해시(dHash) 계산 - hash_size² 비트 정수 반환"""
+    if image is None or image.size == 0:
+        return None
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    # 가로로 한 칸 더 크게 축소한 뒤 인접 픽셀 밝기 비교
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = resized[:, 1:] > resized[:, :-1]
+
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """두 해시 간 해밍 거리"""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+class PerceptualHashCache:
+    """해밍 거리 허용 오차를 지원하는 LRU + TTL 분석 결과 캐시"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 600, max_distance: int = 6):
+        self.max_entries = max_entries
+        self.ttl = ttl                    # 초
+        self.max_distance = max_distance  # 근사 일치로 인정할 최대 해밍 거리
+        self._entries = OrderedDict()     # (phash, class) → (analysis, timestamp)
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, phash: int, object_class: str) -> Optional[Dict]:
+        """해시로 분석 결과 조회 (정확 일치 → 근사 일치 순)"""
+        if phash is None:
+            return None
+
+        current_time = time.time()
+        with self._lock:
+            self._expire(current_time)
+
+            key = (phash, object_class)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            # 근사 일치 탐색 (같은 클래스 내 최소 해밍 거리)
+            best_key, best_distance = None, self.max_distance + 1
+            for cached_hash, cached_class in self._entries:
+                if cached_class != object_class:
+                    continue
+                distance = hamming_distance(phash, cached_hash)
+                if distance < best_distance:
+                    best_key, best_distance = (cached_hash, cached_class), distance
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.near_hits += 1
+                return self._entries[best_key][0]
+
+            self.misses += 1
+            return None
+
+    def store(self, phash: int, object_class: str, analysis: Dict):
+        """분석 결과 저장 (크기 초과 시 가장 오래 사용되지 않은 항목 제거)"""
+        if phash is None or not analysis:
+            return
+
+        with self._lock:
+            key = (phash, object_class)
+            self._entries[key] = (analysis, time.time())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _expire(self, current_time: float):
+        """TTL이 지난 항목 제거 (오래된 순으로 정렬되어 있지 않으므로 전체 확인)"""
+        expired = [key for key, (_, timestamp) in self._entries.items()
+                   if current_time - timestamp > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """캐시 통계 (적중, 근사 적중, 제거 수)"""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+🎯 트랙별 최적 프레임 선택
+선명도(라플라시안 분산), 면적, 신뢰도, 화면 가장자리 거리로 크롭 품질을 점수화하고
+트랙마다 상위 후보 몇 장만 보관했다가 충분히 좋은 크롭이 나오거나 시간이 지나면 분석에 제출
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def measure_sharpness(crop: np.ndarray, max_side: int = 160) -> float:
+    """라플라시안 분산으로 선명도 측정 (크기 차이를 줄이기 위해 축소 후 계산)"""
+    if crop is None or crop.size == 0:
+        return 0.0
+
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    height, width = gray.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+class BestFrameSelector:
+    """트랙별 크롭 후보 버퍼 (품질 상위 N개 유지)"""
+
+    def __init__(self, buffer_size: int = 3, min_quality: float = 0.65, timeout: float = 1.5,
+                 sharpness_target: float = 150.0, min_area_ratio: float = 0.02,
+                 edge_margin: int = 16, weights: Optional[Dict[str, float]] = None):
+        self.buffer_size = buffer_size          # 트랙당 보관할 후보 수
+        self.min_quality = min_quality          # 이 점수 이상이면 즉시 제출
+        self.timeout = timeout                  # 첫 후보 이후 이 시간이 지나면 최선 후보 제출 (초)
+        self.sharpness_target = sharpness_target  # 라플라시안 분산 만점 기준
+        self.min_area_ratio = min_area_ratio    # 화면 대비 면적 만점 기준
+        self.edge_margin = edge_margin          # 가장자리에서 이 거리(px) 이상이면 만점
+        self.weights = weights or {
+            'sharpness': 0.4,
+            'area': 0.25,
+            'confidence': 0.2,
+            'edge': 0.15
+        }
+
+        self._candidates = {}   # track_id → {'first_seen', 'items': [후보, ...]}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.candidates_seen = 0
+        self.candidates_kept = 0
+        self.submitted_by_quality = 0
+        self.submitted_by_timeout = 0
+
+    def score_crop(self, crop: np.ndarray, box: List[float], confidence: float,
+                   frame_shape: Tuple) -> Tuple[float, Dict[str, float]]:
+        """크롭 품질 점수 (0~1)와 항목별 점수"""
+        frame_height, frame_width = frame_shape[:2]
+        x1, y1, x2, y2 = box
+        box_area = max(x2 - x1, 0) * max(y2 - y1, 0)
+        edge_distance = min(x1, y1, frame_width - x2, frame_height - y2)
+
+        parts = {
+            'sharpness': min(measure_sharpness(crop) / self.sharpness_target, 1.0),
+            'area': min(box_area / max(frame_width * frame_height * self.min_area_ratio, 1), 1.0),
+            'confidence': float(confidence),
+            'edge': min(max(edge_distance, 0) / self.edge_margin, 1.0)  # 잘린 객체는 0점
+        }
+        score = sum(self.weights[key] * value for key, value in parts.items())
+        return score, parts
+
+    def add_candidate(self, track_id: int, crop: np.ndarray, box: List[float],
+                      confidence: float, frame_shape: Tuple) -> float:
+        """후보 크롭 추가 (상위 N개에 들 때만 복사해서 보관), 품질 점수 반환"""
+        if crop is None or crop.size == 0:
+            return 0.0
+
+        score, parts = self.score_crop(crop, box, confidence, frame_shape)
+
+        with self._lock:
+            self.candidates_seen += 1
+            entry = self._candidates.get(track_id)
+            if entry is None:
+                entry = {'first_seen': time.time(), 'items': []}
+                self._candidates[track_id] = entry
+
+            items = entry['items']
+            if len(items) >= self.buffer_size and score <= items[-1]['score']:
+                return score
+
+            # 프레임 버퍼는 재사용되므로 보관할 크롭만 복사
+            items.append({
+                'crop': crop.copy(),
+                'box': list(box),
+                'confidence': confidence,
+                'score': score,
+                'parts': parts,
+                'timestamp': time.time()
+            })
+            items.sort(key=lambda item: item['score'], reverse=True)
+            del items[self.buffer_size:]
+            self.candidates_kept += 1
+        return score
+
+    def get_ready(self, track_id: int) -> Optional[Dict]:
+        """제출할 후보 반환 (품질 기준 충족 또는 시간 초과 시), 아직이면 None"""
+        with self._lock:
+            entry = self._candidates.get(track_id)
+            if not entry or not entry['items']:
+                return None
+
+            best = entry['items'][0]
+            if best['score'] >= self.min_quality:
+                self.submitted_by_quality += 1
+            elif time.time() - entry['first_seen'] >= self.timeout:
+                self.submitted_by_timeout += 1
+            else:
+                return None
+
+            del self._candidates[track_id]
+            return best
+
+    def discard(self, track_id: int):
+        """트랙 후보 제거 (분석 완료 등)"""
+        with self._lock:
+            self._candidates.pop(track_id, None)
+
+    def prune(self, active_track_ids):
+        """사라진 트랙의 후보 제거"""
+        active_track_ids = set(active_track_ids)
+        with self._lock:
+            for track_id in [tid for tid in self._candidates if tid not in active_track_ids]:
+                del self._candidates[track_id]
+
+    def clear(self):
+        with self._lock:
+            self._candidates = {}
+
+    def get_stats(self) -> Dict:
+        """후보 선택 통계"""
+        with self._lock:
+            return {
+                'tracks_buffering': len(self._candidates),
+                'candidates_seen': self.candidates_seen,
+                'candidates_kept': self.candidates_kept,
+                'submitted_by_quality': self.submitted_by_quality,
+                'submitted_by_timeout': self.submitted_by_timeout,
+            }
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+🎞️ FFmpeg rawvideo 파이프 캡처
+ffmpeg가 디코딩과 동시에 목표 크기/픽셀 형식으로 변환한 고정 크기 프레임을 파이프로 받아
+미리 할당한 numpy 버퍼에 readinto로 바로 채운 뒤 한 번의 복사로 넘김 (바이트 → 배열 변환 없음)
+cv2.VideoCapture와 같은 read()/release() 형태라 ThreadedFrameCapture에 그대로 사용 가능
+(첫 프레임을 받은 뒤에만 열린 것으로 보고, 실패하면 ffmpeg 오류 출력과 함께 닫힘 - 호출 쪽은 OpenCV로 대체)
+"""
+
+import json
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 픽셀 형식 → 채널 수
+PIXEL_CHANNELS = {'bgr24': 3, 'rgb24': 3, 'gray': 1}
+
+
+def ffmpeg_available(ffmpeg: str = 'ffmpeg', ffprobe: str = 'ffprobe') -> bool:
+    """ffmpeg/ffprobe 실행 파일이 PATH에 있는지 확인"""
+    return shutil.which(ffmpeg) is not None and shutil.which(ffprobe) is not None
+
+
+def probe_video(source: str, ffprobe: str = 'ffprobe', timeout: float = 15.0) -> Optional[Dict]:
+    """ffprobe로 첫 비디오 스트림의 가로/세로/FPS 확인 (실패 시 None)"""
+    cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'stream=width,height,avg_frame_rate', '-of', 'json', source]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        streams = json.loads(result.stdout).get('streams') or []
+    except (subprocess.TimeoutExpired, OSError, ValueError):
+        return None
+    if result.returncode != 0 or not streams:
+        return None
+
+    stream = streams[0]
+    fps = 0.0
+    numerator, _, denominator = str(stream.get('avg_frame_rate', '0/1')).partition('/')
+    try:
+        fps = float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        pass
+    return {'width': int(stream['width']), 'height': int(stream['height']), 'fps': fps}
+
+
+def build_ffmpeg_command(source: str, width: int, height: int, pixel_format: str = 'bgr24',
+                         ffmpeg: str = 'ffmpeg', realtime: bool = False) -> List[str]:
+    """목표 크기로 축소/확대한 rawvideo를 표준 출력으로 내보내는 ffmpeg 명령"""
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin']
+    if source.lower().startswith('rtsp://'):
+        cmd += ['-rtsp_transport', 'tcp']
+    if realtime:
+        cmd += ['-fflags', 'nobuffer', '-flags', 'low_delay']
+    cmd += ['-i', source, '-an', '-sn',
+            '-vf', f'scale={width}:{height}:flags=fast_bilinear',
+            '-pix_fmt', pixel_format, '-f', 'rawvideo', 'pipe:1']
+    return cmd
+
+
+class FFmpegCapture:
+    """ffmpeg 파이프 기반 VideoCapture 대체 (읽기 버퍼 하나를 돌려 씀)
+
+    파이프는 항상 같은 버퍼로 읽고 반환할 때 복사본을 넘기므로, 링 버퍼/처리 루프/크롭 뷰가
+    프레임을 얼마나 오래 잡고 있어도 다음 읽기에 덮어써지지 않음
+    """
+
+    def __init__(self, source: str, width: int, height: int, pixel_format: str = 'bgr24',
+                 fps: float = 0.0, realtime: bool = False, ffmpeg: str = 'ffmpeg',
+                 startup_timeout: float = 10.0):
+        if pixel_format not in PIXEL_CHANNELS:
+            raise ValueError(f"지원하지 않는 픽셀 형식: {pixel_format} (가능: {', '.join(PIXEL_CHANNELS)})")
+
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pixel_format = pixel_format
+        channels = PIXEL_CHANNELS[pixel_format]
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.frame_bytes = width * height * channels
+
+        # 파이프 읽기 버퍼 (내보낼 때는 복사본)
+        self._buffer = np.empty(self.shape, dtype=np.uint8)
+        self._view = memoryview(self._buffer.reshape(-1))
+
+        # 통계
+        self.frames_read = 0
+        self._read_times = deque(maxlen=200)
+
+        self._stderr_tail = deque(maxlen=20)   # ffmpeg 오류 출력 마지막 줄들
+        self._first_frame = None
+        try:
+            self.process = subprocess.Popen(
+                build_ffmpeg_command(source, width, height, pixel_format, ffmpeg, realtime),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
+            )
+        except OSError as e:
+            print(f"❌ ffmpeg 실행 실패: {e}")
+            self.process = None
+            self._opened = False
+            return
+        threading.Thread(target=self._drain_stderr, args=(self.process.stderr,),
+                         name='FFmpegStderr', daemon=True).start()
+        self._opened = self._probe_first_frame(startup_timeout)
+
+    def _drain_stderr(self, stream):
+        """ffmpeg 오류 출력을 계속 읽어 파이프가 막히지 않게 하고 마지막 줄만 보관"""
+        try:
+            for line in iter(stream.readline, b''):
+                text = line.decode('utf-8', 'replace').strip()
+                if text:
+                    self._stderr_tail.append(text)
+        except (OSError, ValueError):
+            pass
+
+    def _probe_first_frame(self, timeout: float) -> bool:
+        """첫 프레임을 제한 시간 안에 받으면 True (받은 프레임은 첫 read()에서 반환), 실패 시 프로세스 종료"""
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(frame=self.read()),
+                                  name='FFmpegProbe', daemon=True)
+        reader.start()
+        reader.join(timeout)
+
+        ok, frame = result.get('frame', (False, None))
+        if ok:
+            self._first_frame = frame
+            return True
+
+        if reader.is_alive():
+            reason = f"{timeout:.0f}초 안에 첫 프레임 없음"
+        else:
+            time.sleep(0.1)   # 종료 직후 오류 출력이 마저 읽히도록 잠시 대기
+            reason = self.last_error() or f"종료 코드 {self.process.poll()}"
+        print(f"❌ ffmpeg 캡처 시작 실패: {reason}")
+        # 읽기 스레드가 readinto에서 막혀 있을 수 있으므로 프로세스를 먼저 끝내 EOF를 받게 한 뒤 파이프를 닫음
+        self._stop_process()
+        reader.join(2)
+        self.release()
+        return False
+
+    def last_error(self) -> Optional[str]:
+        """ffmpeg 오류 출력 마지막 줄 (없으면 None)"""
+        return self._stderr_tail[-1] if self._stderr_tail else None
+
+    def isOpened(self) -> bool:
+        """첫 프레임을 받았고 release()되지 않았으면 True"""
+        return self.process is not None and self._opened
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """다음 프레임 (cv2.VideoCapture.read()와 같은 형태, 스트림 끝이면 (False, None))"""
+        if self._first_frame is not None:
+            frame, self._first_frame = self._first_frame, None
+            return True, frame
+        process = self.process
+        if process is None:
+            return False, None
+
+        start = time.perf_counter()
+        filled = 0
+        while filled < self.frame_bytes:
+            try:
+                count = process.stdout.readinto(self._view[filled:])
+            except (OSError, ValueError):
+                # release()로 파이프가 닫힌 경우
+                return False, None
+            if not count:
+                return False, None
+            filled += count
+
+        frame = self._buffer.copy()
+        self.frames_read += 1
+        self._read_times.append(time.perf_counter() - start)
+        return True, frame
+
+    def get(self, prop_id: int) -> float:
+        """cv2.CAP_PROP_FRAME_WIDTH/HEIGHT/FPS 조회"""
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def set(self, prop_id: int, value) -> bool:
+        """크기/형식은 ffmpeg 시작 시 고정되므로 설정 변경은 지원하지 않음"""
+        return False
+
+    def get_stats(self) -> Dict:
+        """파이프 읽기 통계 (프레임 수, 평균 읽기+복사 시간)"""
+        samples = list(self._read_times)
+        return {
+            'backend': 'ffmpeg',
+            'size': (self.width, self.height),
+            'pixel_format': self.pixel_format,
+            'frames_read': self.frames_read,
+            'avg_read_ms': sum(samples) / len(samples) * 1000 if samples else None,
+            'last_error': self.last_error(),
+        }
+
+    def _stop_process(self):
+        """ffmpeg 프로세스 종료 (파이프는 열어 둠 - 막혀 있던 읽기는 EOF로 끝남)"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def release(self):
+        """ffmpeg 프로세스 종료 후 파이프 닫기"""
+        self._first_frame = None
+        if self.process is None:
+            return
+        self._stop_process()
+        try:
+            self.process.stdout.close()
+        except OSError:
+            pass
+        self.process = None
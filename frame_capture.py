@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+📹 스레드 기반 프레임 캡처 모듈
+캡처 스레드가 고정 크기 링 버퍼에 프레임을 기록하고, 처리 루프는 항상 최신 프레임을 가져감
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class FrameRing:
+    """고정 크기 프레임 링 버퍼 (드롭 정책 설정 가능)"""
+
+    # drop_oldest: 가득 차면 가장 오래된 프레임 버림 (실시간 소스 기본값)
+    # drop_newest: 가득 차면 새로 들어온 프레임 버림
+    # block: 빈 자리가 생길 때까지 캡처 스레드 대기 (파일 처리 시 무손실)
+    POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, capacity: int = 2, policy: str = 'drop_oldest'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"지원하지 않는 드롭 정책: {policy} (가능: {', '.join(self.POLICIES)})")
+
+        self.capacity = max(1, int(capacity))
+        self.policy = policy
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 통계
+        self.total_frames = 0
+        self.dropped_frames = 0   # 링이 가득 차서 버려진 프레임
+        self.skipped_frames = 0   # 최신 프레임을 고르면서 건너뛴 프레임
+        self.last_queue_age = 0.0
+        self.avg_queue_age = 0.0
+        self.max_queue_age = 0.0
+
+    def put(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """프레임 추가 (드롭 정책에 따라 버려지면 False)"""
+        timestamp = timestamp if timestamp is not None else time.time()
+
+        with self._cond:
+            if self._closed:
+                return False
+
+            self.total_frames += 1
+
+            if len(self._frames) >= self.capacity:
+                if self.policy == 'drop_oldest':
+                    self._frames.popleft()
+                    self.dropped_frames += 1
+                elif self.policy == 'drop_newest':
+                    self.dropped_frames += 1
+                    return False
+                else:
+                    while len(self._frames) >= self.capacity and not self._closed:
+                        self._cond.wait(0.1)
+                    if self._closed:
+                        return False
+
+            self._frames.append((frame, timestamp, self.total_frames))
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None, latest: bool = True) -> Optional[Tuple[np.ndarray, float, int]]:
+        """프레임 가져오기 (latest=True면 최신 프레임, 아니면 가장 오래된 프레임)"""
+        with self._cond:
+            deadline = time.time() + timeout if timeout is not None else None
+
+            while not self._frames:
+                if self._closed:
+                    return None
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            if latest:
+                item = self._frames.pop()
+                self.skipped_frames += len(self._frames)
+                self._frames.clear()
+            else:
+                item = self._frames.popleft()
+
+            self._cond.notify_all()
+
+        # 대기열 체류 시간 기록
+        age = time.time() - item[1]
+        self.last_queue_age = age
+        self.avg_queue_age = age if self.avg_queue_age == 0 else self.avg_queue_age * 0.9 + age * 0.1
+        self.max_queue_age = max(self.max_queue_age, age)
+        return item
+
+    def close(self):
+        """링 닫기 (대기 중인 스레드 모두 깨움)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._frames)
+
+
+class ThreadedFrameCapture:
+    """전용 캡처 스레드로 VideoCapture를 읽어 FrameRing에 기록하는 클래스"""
+
+    def __init__(self, cap, ring_size: int = 2, policy: str = 'drop_oldest',
+                 preprocess: Optional[Callable[[np.ndarray], np.ndarray]] = None):
+        self.cap = cap
+        self.ring = FrameRing(ring_size, policy)
+        self.preprocess = preprocess
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.end_of_stream = False
+
+    @property
+    def policy(self) -> str:
+        return self.ring.policy
+
+    def start(self) -> 'ThreadedFrameCapture':
+        """캡처 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._capture_loop, name='FrameCapture', daemon=True)
+            self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        """캡처 스레드 루프"""
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self.cap.read()
+                if not ret or frame is None:
+                    self.end_of_stream = True
+                    break
+
+                timestamp = time.time()
+                if self.preprocess is not None:
+                    frame = self.preprocess(frame)
+
+                self.ring.put(frame, timestamp)
+        except Exception as e:
+            print(f"❌ 프레임 캡처 스레드 오류: {e}")
+            self.end_of_stream = True
+        finally:
+            self.ring.close()
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """cv2.VideoCapture.read()와 같은 형태로 프레임 반환
+
+        block 정책은 무손실 처리를 위해 순서대로, 그 외 정책은 항상 최신 프레임을 반환
+        """
+        item = self.ring.get(timeout=timeout, latest=self.ring.policy != 'block')
+        if item is None:
+            return False, None
+        return True, item[0]
+
+    def get_stats(self) -> Dict:
+        """캡처 통계 (드롭 프레임, 대기열 체류 시간)"""
+        return {
+            'policy': self.ring.policy,
+            'ring_size': self.ring.capacity,
+            'queue_depth': len(self.ring),
+            'captured_frames': self.ring.total_frames,
+            'dropped_frames': self.ring.dropped_frames,
+            'skipped_frames': self.ring.skipped_frames,
+            'last_queue_age_ms': self.ring.last_queue_age * 1000,
+            'avg_queue_age_ms': self.ring.avg_queue_age * 1000,
+            'max_queue_age_ms': self.ring.max_queue_age * 1000,
+        }
+
+    def stop(self):
+        """캡처 스레드 종료"""
+        self._stop_event.set()
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
@@ -1,63 +1,188 @@
 # -*- coding: utf-8 -*-
 """
 GitHub Copilot 통합 모듈 - 다양한 차량 모델 지원
+(VS Code/GitHub CLI 기능 확인은 백그라운드에서 수행하고 PATH/실행 파일 변경 시각 기준으로 디스크에 캐시)
 """
 
 import subprocess
 import json
 import os
+import shutil
 import tempfile
 import random
+import threading
+import time
 from typing import Dict, Optional, Any
 
+from copilot_worker import CopilotWorkerPool
+from provider_registry import ProviderRegistry, get_provider_registry
+
+CAPABILITY_CACHE_PATH = os.getenv('COPILOT_CAPABILITY_CACHE', '.copilot_capabilities.json')
+CAPABILITY_CACHE_TTL = 24 * 3600  # 초
+
+
+def capability_cache_key() -> Dict[str, Any]:
+    """캐시 키 (PATH + 실행 파일 경로/변경 시각) - 설치/업데이트되면 키가 바뀜"""
+    binaries = {}
+    for name in ('code', 'gh'):
+        path = shutil.which(name)
+        try:
+            binaries[name] = [path, os.path.getmtime(path)] if path else None
+        except OSError:
+            binaries[name] = [path, None]
+    return {'path': os.environ.get('PATH', ''), 'binaries': binaries}
+
+
+def detect_capabilities() -> Dict[str, Any]:
+    """VS Code/Copilot 확장/GitHub CLI 설치 여부 확인 (하위 프로세스 실행, 수 초 소요 가능)"""
+    capabilities = {'code': None, 'copilot_extension': False, 'gh': None}
+
+    try:
+        result = subprocess.run(['code', '--version'],
+                              capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            capabilities['code'] = result.stdout.strip().split('\n')[0]
+
+            # GitHub Copilot 확장 설치 확인
+            ext_result = subprocess.run(['code', '--list-extensions'],
+                                      capture_output=True, text=True, timeout=10)
+            if ext_result.returncode == 0:
+                capabilities['copilot_extension'] = 'github.copilot' in ext_result.stdout.lower()
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        pass
+
+    try:
+        result = subprocess.run(['gh', '--version'],
+                              capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            capabilities['gh'] = result.stdout.strip().split('\n')[0]
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        pass
+
+    return capabilities
+
+
+def load_cached_capabilities(cache_path: str = CAPABILITY_CACHE_PATH,
+                             ttl: float = CAPABILITY_CACHE_TTL) -> Optional[Dict[str, Any]]:
+    """캐시된 기능 정보 (키가 다르거나 TTL이 지났으면 None)"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('key') != capability_cache_key():
+        return None
+    if time.time() - cached.get('detected_at', 0) > ttl:
+        return None
+    return cached.get('capabilities')
+
+
+def save_cached_capabilities(capabilities: Dict[str, Any], cache_path: str = CAPABILITY_CACHE_PATH):
+    """기능 정보 캐시 기록 (임시 파일 후 교체)"""
+    temp_path = f"{cache_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': capability_cache_key(), 'detected_at': time.time(),
+                       'capabilities': capabilities}, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
 class GitHubCopilotIntegration:
     """GitHub Copilot을 활용한 AI 분석 클래스"""
     
-    def __init__(self):
+    def __init__(self, registry: Optional[ProviderRegistry] = None):
+        # AIObjectAnalyzer와 공유하는 제공자 레지스트리 (같은 작업에서 OpenAI 중복 호출 방지)
+        self.registry = registry or get_provider_registry()
+        self.registry.register('gh_copilot')
         self.methods = {
             'vscode_command': self._analyze_via_vscode_command,
             'cli_tool': self._analyze_via_cli_tool,
             'prompt_engineering': self._analyze_via_prompt_engineering
         }
         
-    def is_available(self) -> bool:
-        """GitHub Copilot 사용 가능 여부 확인"""
-        # VS Code/Cursor 설치 확인
-        try:
-            result = subprocess.run(['code', '--version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                version_info = result.stdout.strip().split('\n')[0]
-                print(f"✅ Code editor 감지됨: {version_info}")
-                
-                # GitHub Copilot 확장 설치 확인
-                ext_result = subprocess.run(['code', '--list-extensions'], 
-                                          capture_output=True, text=True, timeout=10)
-                if ext_result.returncode == 0:
-                    extensions = ext_result.stdout.lower()
-                    copilot_installed = 'github.copilot' in extensions
-                    
-                    if copilot_installed:
-                        print("✅ GitHub Copilot 확장 설치됨")
-                        return True
-                    else:
-                        print("⚠️ GitHub Copilot 확장이 설치되지 않음")
-                        return True  # 프롬프트 엔지니어링 방식 사용
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        # CLI 기능 확인 결과 (확인 전에는 None - CLI 경로 없이 동작하는 저하 모드)
+        self.capabilities = None
+        self.capability_source = None   # 'cache' 또는 'detected'
+        self._detection_thread = None
+        self._detection_done = threading.Event()
+        self._detection_lock = threading.Lock()
+        
+        # gh copilot 호출 풀 (GitHub CLI가 확인된 뒤 첫 호출 시 시작)
+        self.gh_worker_pool = None
+        self._pool_lock = threading.Lock()
+    
+    def start_detection(self, cache_path: str = CAPABILITY_CACHE_PATH, ttl: float = CAPABILITY_CACHE_TTL):
+        """기능 확인 시작 (유효한 캐시가 있으면 즉시 사용, 없으면 백그라운드 스레드에서 확인)"""
+        with self._detection_lock:
+            if self._detection_thread is not None or self._detection_done.is_set():
+                return
+            
+            cached = load_cached_capabilities(cache_path, ttl)
+            if cached is not None:
+                self.capabilities = cached
+                self.capability_source = 'cache'
+                self._detection_done.set()
+                return
+            
+            def detect():
+                capabilities = detect_capabilities()
+                save_cached_capabilities(capabilities, cache_path)
+                self.capabilities = capabilities
+                self.capability_source = 'detected'
+                self._detection_done.set()
+                self._report_capabilities()
+            
+            self._detection_thread = threading.Thread(target=detect, name='CopilotDetection', daemon=True)
+            self._detection_thread.start()
+    
+    @property
+    def detection_ready(self) -> bool:
+        return self._detection_done.is_set()
+    
+    def wait_for_detection(self, timeout: Optional[float] = None) -> bool:
+        """기능 확인 완료 대기 (완료되면 True)"""
+        self.start_detection()
+        return self._detection_done.wait(timeout)
+    
+    def has_capability(self, name: str) -> bool:
+        """확인된 기능 여부 (확인 전에는 False)"""
+        return bool(self.capabilities and self.capabilities.get(name))
+    
+    def _report_capabilities(self):
+        """기능 확인 결과 출력"""
+        capabilities = self.capabilities or {}
+        if capabilities.get('code'):
+            print(f"✅ Code editor 감지됨: {capabilities['code']}")
+            if capabilities.get('copilot_extension'):
+                print("✅ GitHub Copilot 확장 설치됨")
+            else:
+                print("⚠️ GitHub Copilot 확장이 설치되지 않음")
+        else:
             print("❌ Code editor가 설치되지 않았거나 PATH에 없음")
         
-        # GitHub CLI 확인
-        try:
-            result = subprocess.run(['gh', '--version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                print("✅ GitHub CLI 감지됨")
-                return True
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        if capabilities.get('gh'):
+            print("✅ GitHub CLI 감지됨")
+        else:
             print("❌ GitHub CLI가 설치되지 않음")
-            
-        # 프롬프트 엔지니어링 방식은 항상 사용 가능
-        print("💡 프롬프트 엔지니어링 방식 사용 가능")
+        
+    def is_available(self, wait: bool = False) -> bool:
+        """GitHub Copilot 사용 가능 여부 확인
+        
+        기능 확인은 백그라운드에서 진행하고 바로 반환 (프롬프트 엔지니어링 방식은 항상 사용 가능)
+        wait=True면 확인이 끝날 때까지 기다린 뒤 결과 출력
+        """
+        self.start_detection()
+        if wait:
+            self._detection_done.wait()
+            if self.capability_source == 'cache':
+                self._report_capabilities()
+        
+        if not self.detection_ready:
+            print("⏳ Copilot CLI 기능 확인 중 (백그라운드) - 프롬프트 엔지니어링 방식으로 시작")
+        elif not (self.has_capability('code') or self.has_capability('gh')):
+            print("💡 프롬프트 엔지니어링 방식 사용 가능")
         return True
     
     def analyze_object(self, image_data: bytes, object_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -141,31 +266,47 @@ class GitHubCopilotIntegration:
         except Exception:
             return None
     def _try_gh_copilot(self, prompt: str, class_name: str) -> Optional[Dict[str, Any]]:
-        """GitHub CLI Copilot을 통한 실제 분석 시도"""
+        """GitHub CLI Copilot을 통한 실제 분석 시도 (GitHub CLI 확인 전/미설치 시 건너뜀)"""
+        if not self.has_capability('gh') or not self.registry.claim('gh_copilot'):
+            return None
         try:
-            # GitHub CLI의 gh copilot suggest 명령 사용
-            cmd = ['gh', 'copilot', 'suggest', '-t', 'shell', prompt]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0 and result.stdout:
+            # 호출 풀에서 gh copilot suggest 실행 (여러 객체 호출을 병렬 처리)
+            output = self._get_gh_worker_pool().run(prompt, timeout=10)
+            if output:
                 # CLI 결과를 파싱하여 구조화된 데이터로 변환
-                return self._parse_copilot_response(result.stdout, class_name)
-        except FileNotFoundError:
-            # GitHub CLI가 설치되지 않음 - 조용히 처리
-            return None
+                return self._parse_copilot_response(output, class_name)
         except Exception as e:
-            # 다른 오류는 로그에 기록하지 않고 조용히 처리
+            # 오류는 로그에 기록하지 않고 조용히 처리
             return None
     
+    def _get_gh_worker_pool(self) -> CopilotWorkerPool:
+        """gh copilot 호출 풀 (없으면 생성 후 시작)"""
+        with self._pool_lock:
+            if self.gh_worker_pool is None:
+                self.gh_worker_pool = CopilotWorkerPool(size=4, timeout=10).start()
+            return self.gh_worker_pool
+    
+    def get_worker_stats(self) -> Optional[Dict[str, Any]]:
+        """gh copilot 호출 통계 (호출별 지연 시간 포함, 시작 전이면 None)"""
+        return self.gh_worker_pool.get_stats() if self.gh_worker_pool else None
+    
+    def shutdown(self):
+        """gh copilot 호출 풀 종료"""
+        with self._pool_lock:
+            if self.gh_worker_pool is not None:
+                self.gh_worker_pool.shutdown()
+                self.gh_worker_pool = None
+    
     def _try_openai_analysis(self, prompt: str, class_name: str) -> Optional[Dict[str, Any]]:
         """OpenAI API를 통한 실제 분석 시도"""
         try:
-            import requests
-            import os
-            
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key or api_key == 'your-openai-key':
                 return None
+            
+            # 분석기와 같은 게이트 (중복 호출, 서킷 브레이커, 호출 한도) 확인
+            if not self.registry.acquire('openai'):
+                return None
                 
             headers = {
                 'Authorization': f'Bearer {api_key}',
@@ -182,13 +323,21 @@ class GitHubCopilotIntegration:
                 'temperature': 0.7
             }
             
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=10
-            )
+            # AIObjectAnalyzer와 같은 OpenAI 연결 풀 사용
+            start = time.time()
+            try:
+                response = self.registry.transport('openai').post(
+                    os.getenv('OPENAI_API_ENDPOINT', 'https://api.openai.com/v1/chat/completions'),
+                    headers=headers,
+                    json=data,
+                    timeout=10
+                )
+            except Exception as e:
+                self.registry.report('openai', time.time() - start, False, str(e))
+                raise
             
+            self.registry.report('openai', time.time() - start, response.status_code == 200,
+                                 None if response.status_code == 200 else f"HTTP {response.status_code}")
             if response.status_code == 200:
                 result = response.json()
                 content = result['choices'][0]['message']['content']
@@ -350,7 +499,7 @@ class GitHubCopilotIntegration:
 
 if __name__ == "__main__":
     copilot = GitHubCopilotIntegration()
-    print(f"GitHub Copilot 사용 가능: {copilot.is_available()}")
+    print(f"GitHub Copilot 사용 가능: {copilot.is_available(wait=True)}")
     
     # 차량 테스트
     print("\n🚗 차량 모델 다양성 테스트:")
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+🌐 AI 제공자 공용 HTTP 전송 계층
+제공자별 keep-alive 세션 풀, 429/5xx 지터 백오프 재시도, 요청 지연 시간 측정
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ProviderTransport:
+    """제공자 하나에 대한 연결 풀 세션 + 재시도 + 지연 시간 통계"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, name: str, pool_maxsize: int = 4, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 4.0):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # keep-alive 세션 (DNS/TCP/TLS 연결 재사용)
+        # pool_block은 쓰지 않음 - requests는 풀 대기 시간 제한이 없어 연결 누수가 영구 대기로 이어짐
+        # (풀이 가득 차면 추가 연결을 열고 사용 후 닫음)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # 통계
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self.request_count = 0
+        self.retry_count = 0
+        self.error_count = 0
+        self.last_status = None
+        self.latency_ewma = None
+
+    def post(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        """POST 요청 (429/5xx 및 연결 오류 시 지터 백오프로 재시도)
+
+        timeout은 재시도를 포함한 전체 요청 제한 시간(초)
+        """
+        deadline = time.time() + timeout
+        stream = kwargs.get('stream', False)
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise requests.Timeout(f"{self.name} 요청 제한 시간 초과")
+
+            start = time.perf_counter()
+            try:
+                response = self.session.post(url, timeout=remaining, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(time.perf_counter() - start, None)
+                if attempt >= self.max_retries or not self._sleep_backoff(attempt, deadline):
+                    raise
+                continue
+
+            # 스트리밍 성공 응답은 헤더 도착 시점이라 지연 표본에서 제외 (본문을 다 읽은 뒤 record_latency로 기록)
+            self._record(time.perf_counter() - start, response.status_code,
+                         sample=not (stream and response.status_code == 200))
+
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = self._parse_retry_after(response)
+                delay = self._backoff_delay(attempt, retry_after)
+                if time.time() + delay < deadline:
+                    # 재시도 전 이전 응답을 닫아 연결을 풀에 반환 (스트리밍 응답은 본문을 읽지 않음)
+                    response.close()
+                    self._wait(delay)
+                    continue
+            return response
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """재시도 대기 시간 (Retry-After가 있으면 그 값, 없으면 지터 지수 백오프)"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _wait(self, delay: float):
+        with self._lock:
+            self.retry_count += 1
+        time.sleep(delay)
+
+    def _sleep_backoff(self, attempt: int, deadline: float, retry_after: Optional[float] = None) -> bool:
+        """지터 백오프 대기 (남은 시간이 부족하면 대기하지 않고 False)"""
+        delay = self._backoff_delay(attempt, retry_after)
+        if time.time() + delay >= deadline:
+            return False
+        self._wait(delay)
+        return True
+
+    @staticmethod
+    def _parse_retry_after(response: requests.Response) -> Optional[float]:
+        """Retry-After 헤더(초 단위) 파싱"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    def _record(self, latency: float, status: Optional[int], sample: bool = True):
+        """요청 지연 시간/상태 기록"""
+        with self._lock:
+            self.request_count += 1
+            self.last_status = status
+            if status is None or status >= 400:
+                self.error_count += 1
+        if sample:
+            self.record_latency(latency)
+
+    def record_latency(self, latency: float):
+        """지연 시간 표본 기록 (스트리밍 응답은 본문을 끝까지 읽은 뒤 호출)"""
+        with self._lock:
+            self._latencies.append(latency)
+            self.latency_ewma = latency if self.latency_ewma is None else self.latency_ewma * 0.8 + latency * 0.2
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """최근 요청 지연 시간 백분위수 (초)"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def get_stats(self) -> Dict:
+        """전송 통계"""
+        p50 = self.latency_percentile(50)
+        p90 = self.latency_percentile(90)
+        with self._lock:
+            return {
+                'requests': self.request_count,
+                'retries': self.retry_count,
+                'errors': self.error_count,
+                'last_status': self.last_status,
+                'latency_ewma_ms': self.latency_ewma * 1000 if self.latency_ewma is not None else None,
+                'latency_p50_ms': p50 * 1000 if p50 is not None else None,
+                'latency_p90_ms': p90 * 1000 if p90 is not None else None,
+            }
+
+    def close(self):
+        """세션 종료"""
+        self.session.close()
+
+
+def iter_sse_data(response: requests.Response):
+    """SSE(text/event-stream) 응답에서 이벤트 data 문자열을 순서대로 반환 ([DONE]에서 종료)"""
+    response.encoding = 'utf-8'   # SSE는 항상 UTF-8 (text/* 기본값 ISO-8859-1 방지)
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == '':
+            # 빈 줄 = 이벤트 끝
+            if data_lines:
+                data = '\n'.join(data_lines)
+                data_lines = []
+                if data.strip() == '[DONE]':
+                    return
+                yield data
+            continue
+        if line.startswith('data:'):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        data = '\n'.join(data_lines)
+        if data.strip() != '[DONE]':
+            yield data
+
+
+# 프로세스 전체에서 제공자별 전송 계층을 하나씩 공유
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name: str, **kwargs) -> ProviderTransport:
+    """제공자 이름으로 공유 전송 계층 반환 (없으면 생성)"""
+    with _transports_lock:
+        transport = _transports.get(name)
+        if transport is None:
+            transport = ProviderTransport(name, **kwargs)
+            _transports[name] = transport
+        return transport
+
+
+def get_transport_stats() -> Dict[str, Dict]:
+    """모든 제공자의 전송 통계"""
+    with _transports_lock:
+        transports = dict(_transports)
+    return {name: transport.get_stats() for name, transport in transports.items()}
+
+
+def close_transports():
+    """모든 세션 종료"""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
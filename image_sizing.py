@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+📐 제공자별 이미지 크기 정책
+제공자마다 이미지 토큰 계산 방식이 달라(OpenAI low 고정, Claude 픽셀 수, Gemini 고정/타일)
+상세도 목표 범위 안에서 제공자별 토큰 공식으로 가장 싼 크기를 고르고 요청당 예상 토큰을 계산
+(픽셀 수로 과금하는 제공자는 목표를 만족하는 가장 작은 크기, 고정/타일 과금은 같은 토큰 안에서 가장 큰 크기)
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 상세도별 목표 (긴 변 픽셀, JPEG 품질) - 긴 변 하한은 목표 긴 변 × DETAIL_MIN_RATIO
+DETAIL_TARGETS = {
+    'low': (256, 70),
+    'medium': (384, 80),
+    'high': (512, 85),
+}
+DETAIL_MIN_RATIO = 0.75   # 브랜드/모델 식별에 필요한 최소 해상도 (목표 대비)
+SIDE_STEP = 16            # 후보 긴 변 간격 (픽셀)
+
+# OpenAI는 항상 detail 'low'로 전송 - 서버가 512×512 안으로 줄여 85토큰 고정으로 처리하는데,
+# 상세도 목표가 모두 512 이하라 해상도 손실이 없음 (타일 과금인 'high'는 같은 크기에서 255토큰 이상)
+OPENAI_DETAIL = 'low'
+OPENAI_LOW_TOKENS = 85
+
+
+def _fit_within(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """긴 변이 max_side를 넘지 않도록 비율 유지 축소"""
+    scale = min(1.0, max_side / max(width, height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def estimate_image_tokens(provider: str, width: int, height: int) -> int:
+    """제공자 공개 가격 정책 기준 이미지 1장의 예상 입력 토큰"""
+    if provider == 'openai':
+        # detail 'low' - 크기와 무관하게 고정
+        return OPENAI_LOW_TOKENS
+
+    if provider == 'anthropic':
+        # 긴 변 1568 초과 시 서버에서 축소, 토큰 ≈ 가로×세로/750
+        width, height = _fit_within(width, height, 1568)
+        return math.ceil(width * height / 750)
+
+    if provider == 'google':
+        # 두 변 모두 384 이하면 258, 그보다 크면 768 타일당 258
+        if width <= 384 and height <= 384:
+            return 258
+        return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+    # GitHub Copilot 등 이미지 토큰 과금이 없는 경로
+    return 0
+
+
+class ImageSizingPolicy:
+    """상세도 목표와 제공자별 토큰 상한으로 전송 크기 결정 + 예상 토큰 통계"""
+
+    def __init__(self, detail: str = 'medium', max_tokens: Optional[Dict[str, int]] = None,
+                 min_side: int = 64):
+        self.detail = detail
+        self.max_tokens = max_tokens or {}   # 제공자별 이미지 1장 토큰 상한 (없으면 제한 없음)
+        self.min_side = min_side             # 이보다 작게 줄이지 않음
+
+        # 통계
+        self._lock = threading.Lock()
+        self._usage = {}   # 제공자 → {'requests', 'images', 'estimated_tokens', 'bytes'}
+
+    @property
+    def target(self) -> Tuple[int, int]:
+        return DETAIL_TARGETS.get(self.detail, DETAIL_TARGETS['medium'])
+
+    def estimate_tokens(self, provider: str, width: int, height: int) -> int:
+        return estimate_image_tokens(provider, width, height)
+
+    def candidate_sides(self, width: int, height: int) -> List[int]:
+        """상세도 목표를 만족하는 후보 긴 변 (하한 ~ 목표, 원본보다 키우지 않음)"""
+        target_side, _ = self.target
+        longest = max(width, height)
+        high = min(longest, target_side)
+        low = min(high, max(self.min_side, int(target_side * DETAIL_MIN_RATIO)))
+        sides = list(range(low, high, SIDE_STEP))
+        sides.append(high)
+        return sides
+
+    def choose(self, provider: str, width: int, height: int) -> Tuple[int, int, int]:
+        """전송할 긴 변 픽셀, JPEG 품질, 예상 토큰
+
+        후보 크기마다 제공자 토큰 공식을 계산해 가장 적은 토큰을 고르고, 같은 토큰이면 더 큰 크기 선택
+        (Claude처럼 픽셀 수에 비례하면 하한 크기, Gemini/OpenAI low처럼 고정이면 목표 크기)
+        """
+        _, quality = self.target
+        best_side, best_tokens = None, None
+        for side in self.candidate_sides(width, height):
+            tokens = self.estimate_tokens(provider, *_fit_within(width, height, side))
+            if best_tokens is None or tokens <= best_tokens:
+                best_side, best_tokens = side, tokens
+
+        # 토큰 상한을 넘으면 상한 안으로 들어올 때까지 하한보다 더 축소
+        limit = self.max_tokens.get(provider)
+        while limit is not None and best_tokens > limit and best_side > self.min_side:
+            best_side = max(self.min_side, int(best_side * 0.9))
+            best_tokens = self.estimate_tokens(provider, *_fit_within(width, height, best_side))
+
+        return best_side, quality, best_tokens
+
+    def record(self, provider: str, tokens: int, size: int, images: int = 1):
+        """요청 하나(배치면 이미지 여러 장)의 예상 이미지 토큰/바이트 합계 기록"""
+        with self._lock:
+            usage = self._usage.setdefault(provider, {'requests': 0, 'images': 0, 'estimated_tokens': 0, 'bytes': 0})
+            usage['requests'] += 1
+            usage['images'] += images
+            usage['estimated_tokens'] += tokens
+            usage['bytes'] += size
+
+    def get_stats(self) -> Dict:
+        """제공자별 요청/이미지 수, 예상 토큰 합계와 요청당/이미지당 평균, 이미지 평균 크기"""
+        with self._lock:
+            stats = {'detail': self.detail, 'target': self.target, 'providers': {}}
+            for provider, usage in self._usage.items():
+                requests, images = usage['requests'], usage['images']
+                stats['providers'][provider] = {
+                    'requests': requests,
+                    'images': images,
+                    'estimated_tokens': usage['estimated_tokens'],
+                    'avg_tokens_per_request': usage['estimated_tokens'] / requests if requests else None,
+                    'avg_tokens_per_image': usage['estimated_tokens'] / images if images else None,
+                    'avg_bytes_per_image': usage['bytes'] / images if images else None,
+                }
+            return stats
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+🧪 로컬 속성 추출기
+크롭의 대표 색상(k-means)과 박스 비율/크기 기반 대략적인 타입을 API 호출 없이 즉시 계산
+(원격 제공자에는 브랜드/모델만 요청)
+"""
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def name_color(bgr) -> str:
+    """BGR 색상 → 색상 이름 (구조화 출력 열거형과 같은 이름)"""
+    pixel = np.uint8([[list(bgr)]])
+    hue, saturation, value = (int(v) for v in cv2.cvtColor(pixel, cv2.COLOR_BGR2HSV)[0, 0])
+
+    if value < 50:
+        return 'Black'
+    if saturation < 40:
+        if value > 200:
+            return 'White'
+        return 'Silver' if value > 140 else 'Gray'
+
+    # OpenCV 색상 범위는 0~180
+    if hue < 8 or hue >= 170:
+        return 'Red' if value >= 100 else 'Brown'
+    if hue < 20:
+        return 'Orange' if value >= 150 else 'Brown'
+    if hue < 33:
+        return 'Yellow' if value >= 150 else 'Gold'
+    if hue < 85:
+        return 'Green'
+    if hue < 130:
+        return 'Blue'
+    if hue < 150:
+        return 'Purple'
+    return 'Pink'
+
+
+def dominant_color(crop: np.ndarray, k: int = 3, sample_side: int = 32,
+                   center_fraction: float = 0.6) -> Tuple[str, float]:
+    """가운데 영역 픽셀을 k-means로 묶어 가장 큰 군집의 색상 이름과 비율 반환"""
+    if crop is None or crop.size == 0 or crop.ndim != 3:
+        return 'Unknown', 0.0
+
+    # 배경 영향을 줄이기 위해 가운데 영역만 사용
+    height, width = crop.shape[:2]
+    margin_y = int(height * (1 - center_fraction) / 2)
+    margin_x = int(width * (1 - center_fraction) / 2)
+    center = crop[margin_y:height - margin_y, margin_x:width - margin_x]
+    if center.size == 0:
+        center = crop
+
+    small = cv2.resize(center, (sample_side, sample_side), interpolation=cv2.INTER_AREA)
+    pixels = small.reshape(-1, 3).astype(np.float32)
+    k = min(k, len(pixels))
+
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+    counts = np.bincount(labels.flatten(), minlength=k)
+    largest = int(np.argmax(counts))
+    return name_color(centers[largest]), float(counts[largest] / counts.sum())
+
+
+def coarse_type(object_class: str, width: float, height: float) -> str:
+    """박스 가로/세로 비율로 대략적인 타입 추정"""
+    aspect = width / max(height, 1.0)
+
+    if object_class == 'person':
+        if aspect < 0.6:
+            return 'standing person'
+        return 'lying person' if aspect > 1.3 else 'sitting person'
+    if object_class == 'car':
+        return 'car (side view)' if aspect > 1.8 else 'car (front/rear view)'
+    if object_class == 'truck':
+        return 'truck (side view)' if aspect > 2.0 else 'truck (front/rear view)'
+    if object_class == 'cell phone':
+        if aspect < 0.8:
+            return 'phone (portrait)'
+        return 'phone (landscape)' if aspect > 1.25 else 'phone (angled)'
+    if object_class == 'laptop':
+        return 'open laptop' if aspect > 1.3 else 'laptop (angled)'
+    if object_class == 'tv':
+        return 'widescreen tv' if aspect > 1.5 else 'tv'
+    if object_class == 'bottle':
+        return 'tall bottle' if aspect < 0.5 else 'bottle'
+    return object_class
+
+
+class LocalAttributeExtractor:
+    """API 없이 계산 가능한 속성(색상, 대략적 타입, 크기) 추출"""
+
+    def __init__(self, k: int = 3, small_area: float = 0.02, large_area: float = 0.15):
+        self.k = k
+        self.small_area = small_area    # 화면 대비 면적이 이보다 작으면 small
+        self.large_area = large_area    # 이보다 크면 large
+
+    def extract(self, crop: np.ndarray, object_class: str, box=None,
+                frame_shape: Optional[Tuple] = None) -> Dict:
+        """로컬 속성 dict (color, type, size, color_ratio)"""
+        if box is not None:
+            width, height = box[2] - box[0], box[3] - box[1]
+        else:
+            height, width = crop.shape[:2]
+
+        color, color_ratio = dominant_color(crop, self.k)
+        attributes = {
+            'color': color,
+            'type': coarse_type(object_class, width, height),
+            'color_ratio': round(color_ratio, 2),
+        }
+
+        if frame_shape is not None:
+            area_ratio = width * height / max(frame_shape[0] * frame_shape[1], 1)
+            if area_ratio < self.small_area:
+                attributes['size'] = 'small'
+            elif area_ratio > self.large_area:
+                attributes['size'] = 'large'
+            else:
+                attributes['size'] = 'medium'
+
+        return attributes
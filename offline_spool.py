@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+📦 오프라인 분석 작업 스풀
+모든 제공자가 실패하거나 호출 한도로 처리하지 못한 작업(JPEG 바이트 + 메타데이터)을 디스크에 보관하고,
+백그라운드 드레이너가 제공자가 복구되면 오래된 작업부터 재분석해 저장소를 채움
+(용량/개수 상한을 넘으면 가장 오래된 작업부터 삭제)
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_SPOOL_DIR = os.getenv('AI_OFFLINE_SPOOL', 'analysis_spool')
+
+
+class OfflineJobSpool:
+    """디렉터리 기반 작업 스풀 (작업마다 .jpg + .json, 원자적 쓰기)"""
+
+    def __init__(self, spool_dir: str = DEFAULT_SPOOL_DIR, max_bytes: int = 200 * 1024 * 1024,
+                 max_jobs: int = 5000, max_attempts: int = 5):
+        self.spool_dir = spool_dir
+        self.max_bytes = max_bytes        # 스풀 전체 JPEG 크기 상한
+        self.max_jobs = max_jobs
+        self.max_attempts = max_attempts  # 재분석 실패가 이만큼 쌓이면 폐기
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+        # 드레이너
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        # 통계
+        self.spooled = 0
+        self.replayed = 0
+        self.failed_replays = 0
+        self.evicted = 0
+        self.dropped = 0
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def _path(self, job_id: str, extension: str) -> str:
+        return os.path.join(self.spool_dir, f"{job_id}.{extension}")
+
+    def _write_atomic(self, path: str, data: bytes):
+        """임시 파일에 쓴 뒤 교체 (중간에 종료돼도 반쯤 쓴 파일이 남지 않음)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def job_ids(self) -> List[str]:
+        """스풀된 작업 ID (오래된 순, 메타데이터까지 기록된 작업만)"""
+        try:
+            names = os.listdir(self.spool_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def _usage(self, job_ids: List[str]) -> int:
+        total = 0
+        for job_id in job_ids:
+            try:
+                total += os.path.getsize(self._path(job_id, 'jpg'))
+            except OSError:
+                pass
+        return total
+
+    def put(self, jpeg: bytes, metadata: Dict) -> Optional[str]:
+        """작업 저장 후 상한을 넘으면 오래된 작업부터 삭제 (작업 ID 반환, 실패 시 None)"""
+        if not jpeg or len(jpeg) > self.max_bytes:
+            return None
+
+        # 시간순 정렬되는 ID (밀리초 + 프로세스 내 순번)
+        job_id = f"{int(time.time() * 1000):013d}_{os.getpid()}_{next(self._sequence):06d}"
+        metadata = dict(metadata, job_id=job_id, spooled_at=time.time(), attempts=0)
+
+        with self._lock:
+            try:
+                self._write_atomic(self._path(job_id, 'jpg'), jpeg)
+                self._write_atomic(self._path(job_id, 'json'),
+                                   json.dumps(metadata, ensure_ascii=False).encode('utf-8'))
+            except OSError as e:
+                print(f"⚠️ 오프라인 스풀 기록 실패: {e}")
+                self._remove_files(job_id)
+                return None
+            self.spooled += 1
+            self._enforce_limits()
+        return job_id
+
+    def _enforce_limits(self):
+        """개수/용량 상한을 넘는 만큼 가장 오래된 작업 삭제"""
+        job_ids = self.job_ids()
+        usage = self._usage(job_ids)
+        while job_ids and (len(job_ids) > self.max_jobs or usage > self.max_bytes):
+            oldest = job_ids.pop(0)
+            try:
+                usage -= os.path.getsize(self._path(oldest, 'jpg'))
+            except OSError:
+                pass
+            self._remove_files(oldest)
+            self.evicted += 1
+
+    def load(self, job_id: str) -> Optional[Tuple[bytes, Dict]]:
+        """작업 읽기 (손상/삭제된 작업은 None)"""
+        try:
+            with open(self._path(job_id, 'json'), 'rb') as f:
+                metadata = json.loads(f.read().decode('utf-8'))
+            with open(self._path(job_id, 'jpg'), 'rb') as f:
+                jpeg = f.read()
+        except (OSError, ValueError):
+            return None
+        return jpeg, metadata
+
+    def _remove_files(self, job_id: str):
+        for extension in ('json', 'jpg'):
+            try:
+                os.remove(self._path(job_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def remove(self, job_id: str):
+        """처리 완료된 작업 삭제"""
+        with self._lock:
+            self._remove_files(job_id)
+
+    def mark_failed(self, job_id: str, metadata: Dict) -> bool:
+        """재분석 실패 횟수 기록 (최대 횟수 초과 시 폐기하고 False 반환)"""
+        metadata = dict(metadata, attempts=metadata.get('attempts', 0) + 1, last_attempt=time.time())
+        with self._lock:
+            if metadata['attempts'] >= self.max_attempts:
+                self._remove_files(job_id)
+                self.dropped += 1
+                return False
+            try:
+                self._write_atomic(self._path(job_id, 'json'),
+                                   json.dumps(metadata, ensure_ascii=False).encode('utf-8'))
+            except OSError:
+                pass
+            return True
+
+    def drain_once(self, replay: Callable[[bytes, Dict], bool], limit: int = 10) -> int:
+        """오래된 작업부터 최대 limit개 재분석 (첫 실패에서 중단 - 제공자가 아직 복구되지 않음)
+
+        replay(jpeg, metadata)가 True를 반환하면 작업을 삭제
+        """
+        processed = 0
+        for job_id in self.job_ids()[:limit]:
+            if self._stop_event.is_set():
+                break
+            loaded = self.load(job_id)
+            if loaded is None:
+                self.remove(job_id)
+                continue
+
+            jpeg, metadata = loaded
+            try:
+                done = replay(jpeg, metadata)
+            except Exception as e:
+                print(f"⚠️ 스풀 작업 재분석 오류: {e}")
+                done = False
+
+            if done:
+                self.remove(job_id)
+                self.replayed += 1
+                processed += 1
+            else:
+                self.failed_replays += 1
+                self.mark_failed(job_id, metadata)
+                break
+        return processed
+
+    def start_drainer(self, replay: Callable[[bytes, Dict], bool],
+                      is_ready: Callable[[], bool] = lambda: True,
+                      interval: float = 5.0, max_interval: float = 120.0) -> 'OfflineJobSpool':
+        """백그라운드 드레이너 시작 (is_ready가 True일 때만 재분석, 실패하면 간격을 늘림)"""
+        if self._thread is not None:
+            return self
+
+        def drain_loop():
+            wait = interval
+            while not self._stop_event.wait(wait):
+                if not self.job_ids():
+                    wait = interval
+                    continue
+                try:
+                    ready = is_ready()
+                except Exception:
+                    ready = False
+                if not ready:
+                    continue
+                if self.drain_once(replay) > 0:
+                    wait = interval
+                else:
+                    wait = min(wait * 2, max_interval)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=drain_loop, name='OfflineSpoolDrainer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop_drainer(self):
+        """드레이너 종료"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def get_stats(self) -> Dict:
+        """스풀 통계 (대기 작업 수/용량, 재분석 성공/실패, 상한 초과 삭제)"""
+        job_ids = self.job_ids()
+        return {
+            'path': self.spool_dir,
+            'pending_jobs': len(job_ids),
+            'pending_bytes': self._usage(job_ids),
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'failed_replays': self.failed_replays,
+            'evicted': self.evicted,
+            'dropped': self.dropped,
+            'draining': self._thread is not None,
+        }
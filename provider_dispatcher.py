@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+🏁 헤지(hedged) 제공자 디스패처
+1순위 제공자가 헤지 지연 시간 안에 응답하지 않으면 다음 제공자를 병렬로 시작하고,
+가장 먼저 도착한 유효한 결과를 채택 (작업 전체는 하나의 마감 시간으로 제한)
+승자가 정해지면 나머지 호출의 취소 이벤트를 설정 - 호출 쪽은 current_cancel_event()로 확인해
+스트리밍 응답을 닫고 남은 작업을 중단
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (제공자 이름, 호출 함수) - 호출 함수는 분석 결과 dict 또는 None 반환
+ProviderCall = Tuple[str, Callable[[], Optional[Dict]]]
+
+_cancel_event = contextvars.ContextVar('provider_cancel_event', default=None)
+
+
+class CallCancelled(Exception):
+    """다른 제공자 결과가 채택되어 호출이 취소됨"""
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """디스패처가 실행 중인 호출의 취소 이벤트 (디스패처 밖에서 호출되면 None)"""
+    return _cancel_event.get()
+
+
+def _run_with_cancel_event(call: Callable[[], Optional[Dict]], cancel: threading.Event) -> Optional[Dict]:
+    """스레드 풀에서 취소 이벤트를 연결한 채로 호출 실행"""
+    token = _cancel_event.set(cancel)
+    try:
+        if cancel.is_set():
+            return None
+        return call()
+    finally:
+        _cancel_event.reset(token)
+
+
+class HedgedDispatcher:
+    """asyncio 기반 헤지/경쟁 요청 디스패처 (shutdown() 후 다시 dispatch하면 루프/스레드 풀을 새로 시작)"""
+
+    def __init__(self, hedge_delay: float = 3.0, deadline: float = 15.0, max_workers: int = 8):
+        self.hedge_delay = hedge_delay  # 기본 헤지 지연 (초)
+        self.deadline = deadline        # 작업 전체 마감 시간 (초)
+
+        # 제공자 호출(동기 HTTP)은 스레드 풀에서, 조율은 전용 이벤트 루프에서 수행 (첫 dispatch에서 시작)
+        self.max_workers = max_workers
+        self._executor = None
+        self._loop = None
+        self._loop_thread = None
+        self._start_lock = threading.Lock()
+
+        # 통계
+        self._lock = threading.Lock()
+        self.stats = {
+            'jobs': 0,
+            'hedges_launched': 0,   # 헤지 지연 초과로 추가 시작된 요청
+            'fallbacks_launched': 0,  # 앞선 제공자 실패로 시작된 요청
+            'cancelled': 0,         # 승자 확정 후 취소된 요청
+            'deadline_exceeded': 0,
+            'wins': {},
+        }
+
+    def _start(self) -> Tuple[asyncio.AbstractEventLoop, ThreadPoolExecutor]:
+        """이벤트 루프/스레드 풀이 없으면 시작"""
+        with self._start_lock:
+            if self._loop is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ProviderCall')
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name='HedgedDispatcherLoop', daemon=True)
+                self._loop_thread.start()
+            return self._loop, self._executor
+
+    def dispatch(self, calls: List[ProviderCall],
+                 hedge_delays: Optional[Dict[str, float]] = None,
+                 deadline: Optional[float] = None,
+                 validator: Optional[Callable[[Dict], bool]] = None) -> Optional[Tuple[str, Dict]]:
+        """제공자 호출 목록을 우선순위대로 헤지 실행 후 (승자 이름, 결과) 반환
+
+        호출 스레드는 결과가 나오거나 마감 시간이 지날 때까지 대기
+        """
+        if not calls:
+            return None
+
+        deadline = deadline if deadline is not None else self.deadline
+        loop, executor = self._start()
+        future = asyncio.run_coroutine_threadsafe(
+            self._dispatch(calls, hedge_delays or {}, deadline, validator, executor), loop)
+        return future.result()
+
+    async def _dispatch(self, calls: List[ProviderCall], hedge_delays: Dict[str, float],
+                        deadline: float, validator: Optional[Callable[[Dict], bool]],
+                        executor: ThreadPoolExecutor) -> Optional[Tuple[str, Dict]]:
+        loop = asyncio.get_running_loop()
+        end_time = time.monotonic() + deadline
+        remaining_calls = list(calls)
+        running = {}       # task → 제공자 이름
+        cancel_events = {}  # task → 취소 이벤트
+        fallback = None    # 유효하지 않지만 비어있지 않은 첫 결과 (백업 응답)
+
+        with self._lock:
+            self.stats['jobs'] += 1
+
+        def launch(reason: Optional[str] = None) -> Optional[float]:
+            """다음 제공자 시작, 해당 제공자의 헤지 지연 반환"""
+            name, call = remaining_calls.pop(0)
+            cancel = threading.Event()
+            task = asyncio.ensure_future(loop.run_in_executor(executor, _run_with_cancel_event, call, cancel))
+            running[task] = name
+            cancel_events[task] = cancel
+            if reason:
+                with self._lock:
+                    self.stats[reason] += 1
+            return hedge_delays.get(name, self.hedge_delay)
+
+        next_hedge = launch()
+
+        try:
+            while running:
+                time_left = end_time - time.monotonic()
+                if time_left <= 0:
+                    with self._lock:
+                        self.stats['deadline_exceeded'] += 1
+                    break
+
+                wait_time = time_left
+                if remaining_calls and next_hedge is not None:
+                    wait_time = min(wait_time, next_hedge)
+
+                started = time.monotonic()
+                done, _ = await asyncio.wait(running.keys(), timeout=wait_time,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                failed = False
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"⚠️ {name} 분석 호출 오류: {e}")
+                        result = None
+
+                    if result and (validator is None or validator(result)):
+                        with self._lock:
+                            self.stats['wins'][name] = self.stats['wins'].get(name, 0) + 1
+                        return name, result
+
+                    if result and fallback is None:
+                        fallback = (name, result)
+                    failed = True
+
+                if failed and remaining_calls:
+                    # 실패한 제공자가 있으면 헤지 지연을 기다리지 않고 다음 제공자 시작
+                    next_hedge = launch('fallbacks_launched')
+                elif not done and remaining_calls and time.monotonic() < end_time:
+                    # 헤지 지연 동안 응답 없음 → 다음 제공자를 병렬로 시작
+                    next_hedge = launch('hedges_launched')
+                elif next_hedge is not None:
+                    next_hedge = max(0.0, next_hedge - (time.monotonic() - started))
+
+            return fallback
+        finally:
+            # 패배한 요청 취소 (실행 중인 호출은 취소 이벤트로 스트림을 닫고 중단)
+            for task in running:
+                cancel_events[task].set()
+                task.cancel()
+            if running:
+                with self._lock:
+                    self.stats['cancelled'] += len(running)
+
+    def get_stats(self) -> Dict:
+        """디스패처 통계"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['wins'] = dict(self.stats['wins'])
+            return stats
+
+    def shutdown(self):
+        """이벤트 루프 및 스레드 풀 종료 (통계는 유지, 다음 dispatch에서 다시 시작)"""
+        with self._start_lock:
+            loop, loop_thread, executor = self._loop, self._loop_thread, self._executor
+            self._loop = self._loop_thread = self._executor = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join(timeout=1)
+        if not loop_thread.is_alive():
+            loop.close()
+        executor.shutdown(wait=False)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+🩺 AI 제공자 상태 기반 라우팅
+제공자별 성공률/지연 시간 EWMA를 추적하고, 연속 실패 시 서킷 브레이커를 열어 호출을 차단하며,
+측정된 상태에 따라 제공자 순서를 재정렬
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+CLOSED = 'closed'          # 정상 호출
+OPEN = 'open'              # 차단 (쿨다운 대기)
+HALF_OPEN = 'half_open'    # 쿨다운 후 시험 호출 1회 허용
+
+
+class ProviderHealth:
+    """제공자 하나의 상태 (성공률/지연 EWMA + 서킷 브레이커)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.success_ewma = 1.0
+        self.latency_ewma = None
+        self.consecutive_failures = 0
+        self.total_calls = 0
+        self.total_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.last_error = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'state': self.state,
+            'success_rate': round(self.success_ewma, 3),
+            'latency_ewma_ms': self.latency_ewma * 1000 if self.latency_ewma is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'total_calls': self.total_calls,
+            'total_failures': self.total_failures,
+            'last_error': self.last_error,
+        }
+
+
+class ProviderRouter:
+    """서킷 브레이커 + 상태 점수로 제공자 호출 순서를 결정하는 라우터"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0,
+                 alpha: float = 0.3, latency_target: float = 3.0):
+        self.failure_threshold = failure_threshold  # 서킷을 여는 연속 실패 횟수
+        self.cooldown = cooldown                    # 서킷 개방 후 시험 호출까지 대기 (초)
+        self.alpha = alpha                          # EWMA 가중치
+        self.latency_target = latency_target        # 지연 점수 기준 (초)
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def _get(self, provider: str) -> ProviderHealth:
+        health = self._health.get(provider)
+        if health is None:
+            health = ProviderHealth(provider)
+            self._health[provider] = health
+        return health
+
+    def is_callable(self, provider: str) -> bool:
+        """상태를 바꾸지 않고 호출 가능성만 확인 (후보 목록 작성용)"""
+        with self._lock:
+            health = self._get(provider)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN:
+                return time.time() - health.opened_at >= self.cooldown
+            return not health.probe_in_flight
+
+    def cooldown_remaining(self, provider: str) -> float:
+        """열린 서킷이 시험 호출을 허용할 때까지 남은 시간 (초, 호출 가능하면 0)"""
+        with self._lock:
+            health = self._get(provider)
+            if health.state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.time() - health.opened_at))
+
+    def allow(self, provider: str) -> bool:
+        """호출 허용 여부 (쿨다운이 지난 열린 서킷은 시험 호출 1회 허용)"""
+        with self._lock:
+            health = self._get(provider)
+
+            if health.state == CLOSED:
+                return True
+
+            if health.state == OPEN and time.time() - health.opened_at >= self.cooldown:
+                health.state = HALF_OPEN
+                health.probe_in_flight = False
+                print(f"🩺 {provider} 서킷 반개방 - 시험 호출 허용")
+
+            if health.state == HALF_OPEN and not health.probe_in_flight:
+                health.probe_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self, provider: str, latency: float):
+        """호출 성공 기록"""
+        with self._lock:
+            health = self._get(provider)
+            health.total_calls += 1
+            health.success_ewma = health.success_ewma * (1 - self.alpha) + self.alpha
+            self._update_latency(health, latency)
+            health.consecutive_failures = 0
+
+            if health.state != CLOSED:
+                print(f"✅ {provider} 서킷 닫힘 - 정상 복구")
+            health.state = CLOSED
+            health.probe_in_flight = False
+
+    def record_failure(self, provider: str, latency: float, reason: Optional[str] = None):
+        """호출 실패 기록 (연속 실패가 임계값에 도달하면 서킷 개방)"""
+        with self._lock:
+            health = self._get(provider)
+            health.total_calls += 1
+            health.total_failures += 1
+            health.success_ewma = health.success_ewma * (1 - self.alpha)
+            self._update_latency(health, latency)
+            health.consecutive_failures += 1
+            health.last_error = reason
+
+            if health.state == HALF_OPEN or (health.state == CLOSED and
+                                             health.consecutive_failures >= self.failure_threshold):
+                health.state = OPEN
+                health.opened_at = time.time()
+                health.probe_in_flight = False
+                print(f"🚫 {provider} 서킷 개방 - {self.cooldown:.0f}초간 호출 차단 "
+                      f"(연속 실패 {health.consecutive_failures}회)")
+
+    def release(self, provider: str):
+        """결과 없이 끝난 호출(취소 등) - 상태는 그대로 두고 반개방 시험 호출 기회만 반환"""
+        with self._lock:
+            self._get(provider).probe_in_flight = False
+
+    def _update_latency(self, health: ProviderHealth, latency: float):
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma = health.latency_ewma * (1 - self.alpha) + latency * self.alpha
+
+    def score(self, provider: str) -> float:
+        """상태 점수 (성공률 × 지연 점수, 측정 전 지연은 기준값으로 간주)"""
+        with self._lock:
+            health = self._get(provider)
+            latency = health.latency_ewma if health.latency_ewma is not None else self.latency_target
+            return health.success_ewma / (1 + latency / self.latency_target)
+
+    def order(self, providers: List[str]) -> List[str]:
+        """상태 순으로 제공자 정렬 (열린 서킷은 뒤로, 점수가 비슷하면 기본 우선순위 유지)"""
+        state_rank = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+        def sort_key(item):
+            index, provider = item
+            with self._lock:
+                state = self._get(provider).state
+            return state_rank[state], -round(self.score(provider), 1), index
+
+        return [provider for _, provider in sorted(enumerate(providers), key=sort_key)]
+
+    def get_health(self) -> Dict[str, Dict]:
+        """제공자별 상태 (대시보드용)"""
+        with self._lock:
+            return {name: health.to_dict() for name, health in self._health.items()}
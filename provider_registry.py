@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+🗂️ 공용 제공자 레지스트리
+AIObjectAnalyzer와 GitHubCopilotIntegration이 같은 백엔드 목록/전송 계층을 공유하고,
+작업(크롭 하나) 단위 호출 기록으로 같은 백엔드를 한 작업에서 두 번 호출하지 않도록 막음
+(헤지 디스패처의 스레드 풀에서도 작업 기록이 이어지도록 contextvars 사용)
+백엔드별 게이트(서킷 브레이커/호출 한도)를 등록하면 어느 경로로 호출하든 같은 확인을 거침
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from http_transport import ProviderTransport, get_transport
+
+_current_job = contextvars.ContextVar('provider_job', default=None)
+
+
+class JobCallLedger:
+    """작업 하나에서 이미 호출한 백엔드 기록"""
+
+    def __init__(self, called: Optional[set] = None):
+        self._called = set(called or ())
+        self._lock = threading.Lock()
+
+    def claim(self, backend: str) -> bool:
+        """처음 호출하는 백엔드면 기록 후 True, 이미 호출했으면 False"""
+        with self._lock:
+            if backend in self._called:
+                return False
+            self._called.add(backend)
+            return True
+
+    def release(self, backend: str):
+        """claim 후 실제로 호출하지 않은 백엔드 기록 취소"""
+        with self._lock:
+            self._called.discard(backend)
+
+    @property
+    def called(self) -> set:
+        with self._lock:
+            return set(self._called)
+
+
+class ProviderRegistry:
+    """백엔드별 전송 계층 + 작업 단위 중복 호출 방지 + 호출 수 통계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends = {}   # 이름 → {'calls', 'deduped'}
+        self._gates = {}      # 이름 → (admit(name) → bool, report(name, latency, success, reason))
+
+    def register(self, name: str):
+        """백엔드 등록 (이미 있으면 무시)"""
+        with self._lock:
+            self._backends.setdefault(name, {'calls': 0, 'deduped': 0})
+
+    def transport(self, name: str) -> ProviderTransport:
+        """백엔드의 공유 전송 계층 (프로세스 전체에서 하나)"""
+        self.register(name)
+        return get_transport(name)
+
+    @contextmanager
+    def job(self, ledger: Optional[JobCallLedger] = None):
+        """작업 범위 시작 (이미 작업 범위 안이면 같은 기록을 이어서 사용)
+
+        ledger를 주면 그 기록으로 범위를 시작 (배치 요청 후 크롭별 개별 요청처럼 여러 단계에 걸친 작업)
+        """
+        if ledger is None:
+            current = _current_job.get()
+            if current is not None:
+                yield current
+                return
+            ledger = JobCallLedger()
+
+        token = _current_job.set(ledger)
+        try:
+            yield _current_job.get()
+        finally:
+            _current_job.reset(token)
+
+    @staticmethod
+    def current_job() -> Optional[JobCallLedger]:
+        return _current_job.get()
+
+    @staticmethod
+    def bind(function: Callable, ledger: Optional[JobCallLedger] = None) -> Callable:
+        """다른 스레드에서 실행될 호출에 현재 작업 기록을 연결"""
+        ledger = ledger if ledger is not None else _current_job.get()
+
+        def bound(*args, **kwargs):
+            token = _current_job.set(ledger)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _current_job.reset(token)
+        return bound
+
+    def claim(self, name: str) -> bool:
+        """백엔드 호출 전 확인 - 현재 작업에서 이미 호출했으면 False (호출하지 말 것)"""
+        self.register(name)
+        ledger = _current_job.get()
+        allowed = ledger is None or ledger.claim(name)
+        with self._lock:
+            self._backends[name]['calls' if allowed else 'deduped'] += 1
+        return allowed
+
+    def release(self, name: str):
+        """claim 후 다른 이유(호출 한도 등)로 호출하지 않았을 때 기록 취소"""
+        ledger = _current_job.get()
+        if ledger is not None:
+            ledger.release(name)
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend and backend['calls'] > 0:
+                backend['calls'] -= 1
+
+    def set_gate(self, name: str, admit: Callable[[str], bool],
+                 report: Optional[Callable[[str, float, bool, Optional[str]], None]] = None):
+        """백엔드 게이트 등록 - admit은 claim을 포함한 호출 허용 확인, report는 호출 결과 기록"""
+        self.register(name)
+        with self._lock:
+            self._gates[name] = (admit, report)
+
+    def acquire(self, name: str) -> bool:
+        """호출 전 확인 (게이트가 있으면 게이트, 없으면 작업 단위 중복 확인만)"""
+        with self._lock:
+            gate = self._gates.get(name)
+        if gate is None:
+            return self.claim(name)
+        return gate[0](name)
+
+    def report(self, name: str, latency: float, success: bool, reason: Optional[str] = None):
+        """acquire로 허용된 호출의 결과 기록 (게이트가 없으면 무시)"""
+        with self._lock:
+            gate = self._gates.get(name)
+        if gate is not None and gate[1] is not None:
+            gate[1](name, latency, success, reason)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """백엔드별 호출 수와 중복으로 생략된 호출 수"""
+        with self._lock:
+            return {name: {'calls': backend['calls'], 'deduped': backend['deduped']}
+                    for name, backend in self._backends.items()}
+
+
+# 프로세스 전체에서 하나의 레지스트리를 공유
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """공용 제공자 레지스트리 반환 (없으면 생성)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderRegistry()
+        return _registry
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+⏳ 제공자별 토큰 버킷 속도 제한 + 일일 할당량
+호출 전에 예산을 확인해 한도를 넘을 요청은 보내지 않고 다른 제공자로 돌리거나 미룸
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """토큰 버킷 (초당 rate개 충전, 최대 capacity개 보유)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self, amount: float = 1) -> bool:
+        self._refill()
+        return self.tokens >= amount
+
+    def consume(self, amount: float = 1):
+        self._refill()
+        self.tokens -= amount
+
+    def wait_time(self, amount: float = 1) -> float:
+        """amount개 토큰이 모일 때까지 남은 시간 (초)"""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class ProviderQuota:
+    """제공자 하나의 RPM/RPS 버킷과 일일 할당량"""
+
+    def __init__(self, rpm: Optional[float] = None, rps: Optional[float] = None,
+                 daily: Optional[int] = None):
+        self.rpm = rpm
+        self.rps = rps
+        self.daily = daily
+        self.buckets = []
+        if rpm:
+            self.buckets.append(TokenBucket(rpm / 60.0, rpm))
+        if rps:
+            self.buckets.append(TokenBucket(rps, max(1.0, rps)))
+
+        self.day = date.today()
+        self.daily_used = 0
+        self.total_used = 0
+        self.rejected = 0
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.daily_used = 0
+
+    def has_budget(self) -> bool:
+        self._roll_day()
+        if self.daily is not None and self.daily_used >= self.daily:
+            return False
+        return all(bucket.available() for bucket in self.buckets)
+
+    def consume(self):
+        for bucket in self.buckets:
+            bucket.consume()
+        self.daily_used += 1
+        self.total_used += 1
+
+    def wait_time(self) -> float:
+        """다음 호출이 가능해질 때까지 남은 시간 (일일 할당량 소진 시 다음 날까지)"""
+        self._roll_day()
+        if self.daily is not None and self.daily_used >= self.daily:
+            now = time.localtime()
+            return 24 * 3600 - (now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec)
+        return max([bucket.wait_time() for bucket in self.buckets], default=0.0)
+
+
+class ProviderRateLimiter:
+    """제공자별 할당량을 관리하는 속도 제한기"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None):
+        self._quotas = {}
+        self._lock = threading.Lock()
+        for provider, limit in (limits or {}).items():
+            self.configure(provider, **limit)
+
+    def configure(self, provider: str, rpm: Optional[float] = None, rps: Optional[float] = None,
+                  daily: Optional[int] = None):
+        """제공자 한도 설정 (None은 제한 없음)"""
+        with self._lock:
+            self._quotas[provider] = ProviderQuota(rpm=rpm, rps=rps, daily=daily)
+
+    def has_budget(self, provider: str) -> bool:
+        """예산 소모 없이 호출 가능 여부만 확인"""
+        with self._lock:
+            quota = self._quotas.get(provider)
+            return quota is None or quota.has_budget()
+
+    def try_acquire(self, provider: str) -> bool:
+        """예산이 있으면 1회분 소모 후 True, 없으면 False (요청을 보내지 말 것)"""
+        with self._lock:
+            quota = self._quotas.get(provider)
+            if quota is None:
+                return True
+            if not quota.has_budget():
+                quota.rejected += 1
+                return False
+            quota.consume()
+            return True
+
+    def wait_time(self, provider: str) -> float:
+        """제공자가 다시 호출 가능해질 때까지 남은 시간 (초)"""
+        with self._lock:
+            quota = self._quotas.get(provider)
+            return 0.0 if quota is None else quota.wait_time()
+
+    def get_usage(self) -> Dict[str, Dict]:
+        """제공자별 예산 사용 현황"""
+        with self._lock:
+            usage = {}
+            for provider, quota in self._quotas.items():
+                wait_time = quota.wait_time()
+                usage[provider] = {
+                    'rpm': quota.rpm,
+                    'rps': quota.rps,
+                    'daily_limit': quota.daily,
+                    'daily_used': quota.daily_used,
+                    'daily_remaining': quota.daily - quota.daily_used if quota.daily is not None else None,
+                    'bucket_tokens': [round(bucket.tokens, 2) for bucket in quota.buckets],
+                    'total_used': quota.total_used,
+                    'rejected': quota.rejected,
+                    'wait_time': round(wait_time, 2),
+                }
+            return usage
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+📺 YouTube 스트림 URL 해석기
+extract_info를 한 번만 호출해 받은 포맷 목록에서 최적 포맷을 로컬로 고르고,
+스트림 URL을 만료 시각(expire 파라미터)과 함께 캐시 - 만료 직전에는 백그라운드로 미리 갱신하고
+스트림 열기/읽기가 실패하면(만료/403) 호출 측에서 invalidate 후 다시 해석하고, 그 밖의 재연결은 캐시로 추출 없이 즉시 끝남
+캐시는 디스크에도 기록해 실행마다 새 프로세스로 시작해도 만료 전이면 추출을 생략
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+
+# 선호 해상도 구간 (앞쪽일수록 우선, 구간 안에서는 높은 해상도/비트레이트 우선)
+HEIGHT_TIERS = [
+    (720, 1080),   # 1080p-720p (최적 품질)
+    (480, 720),    # 720p-480p
+    (360, 480),    # 480p-360p
+    (240, 360),    # 360p-240p
+]
+
+STREAM_CACHE_PATH = os.getenv('YOUTUBE_STREAM_CACHE', '.youtube_stream_cache.json')
+
+DEFAULT_EXTRACT_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'socket_timeout': 30,
+    'retries': 2,
+}
+
+
+def default_extractor_factory(options: Dict):
+    """yt_dlp.YoutubeDL 생성 (yt_dlp가 없으면 오류)"""
+    if yt_dlp is None:
+        raise RuntimeError("yt_dlp가 설치되지 않음 (pip install yt-dlp)")
+    return yt_dlp.YoutubeDL(options)
+
+
+def _is_playable(fmt: Dict) -> bool:
+    """OpenCV/ffmpeg로 바로 열 수 있는 비디오 포맷인지 확인"""
+    if not fmt.get('url') or fmt.get('vcodec') == 'none' or not fmt.get('height'):
+        return False
+    protocol = fmt.get('protocol', 'https')
+    return protocol in ('http', 'https', 'm3u8', 'm3u8_native')
+
+
+def _is_muxed(fmt: Dict) -> bool:
+    """오디오가 함께 들어 있는 포맷인지 확인"""
+    return fmt.get('acodec') not in (None, 'none')
+
+
+def select_best_format(formats: List[Dict]) -> Optional[Dict]:
+    """포맷 목록에서 최적 포맷 선택
+
+    오디오 포함(muxed) 포맷 중에서 해상도 구간 순으로 고르고 (구간 안에서는 avc1 → 높은 해상도/비트레이트 순),
+    muxed 포맷이 하나도 없을 때만 비디오 전용 포맷 사용 (기존 best[...] 선택과 같은 기준)
+    """
+    playable = [fmt for fmt in formats or [] if _is_playable(fmt)]
+    if not playable:
+        return None
+    candidates = [fmt for fmt in playable if _is_muxed(fmt)] or playable
+
+    def rank(fmt):
+        return (str(fmt.get('vcodec', '')).startswith('avc1'), fmt['height'], fmt.get('tbr') or 0)
+
+    for low, high in HEIGHT_TIERS:
+        tier = [fmt for fmt in candidates if low <= fmt['height'] <= high]
+        if tier:
+            return max(tier, key=rank)
+
+    # 구간 밖이면 1080p 초과는 가장 낮은 것, 240p 미만은 가장 높은 것
+    larger = [fmt for fmt in candidates if fmt['height'] > HEIGHT_TIERS[0][1]]
+    if larger:
+        return min(larger, key=lambda fmt: (fmt['height'], -(fmt.get('tbr') or 0)))
+    return max(candidates, key=rank)
+
+
+def parse_expire(stream_url: str) -> Optional[float]:
+    """스트림 URL의 만료 시각 (googlevideo의 expire 쿼리 또는 /expire/<값>/ 경로)"""
+    parsed = urlparse(stream_url)
+    values = parse_qs(parsed.query).get('expire')
+    if not values:
+        parts = parsed.path.split('/')
+        if 'expire' in parts and parts.index('expire') + 1 < len(parts):
+            values = [parts[parts.index('expire') + 1]]
+    try:
+        return float(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+class YouTubeStreamResolver:
+    """YouTube URL → 스트림 URL 해석 + 만료 인식 캐시"""
+
+    def __init__(self, extractor_factory: Callable[[Dict], object] = default_extractor_factory,
+                 refresh_margin: float = 300.0, default_ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.time, cache_path: Optional[str] = STREAM_CACHE_PATH):
+        self.extractor_factory = extractor_factory  # 옵션 dict → extract_info(url, download=False) 제공 객체
+        self.refresh_margin = refresh_margin        # 만료 이만큼 전부터 백그라운드 갱신 (초)
+        self.default_ttl = default_ttl              # URL에 expire가 없을 때 캐시 시간 (초)
+        self.clock = clock
+        self.cache_path = cache_path                # 디스크 캐시 파일 (None이면 메모리에만 유지)
+
+        self._cache = {}         # YouTube URL → {'url', 'expire', 'format', 'resolved_at'}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.extractions = 0
+        self.background_refreshes = 0
+        self.invalidations = 0
+        self.failures = 0
+        self.loaded_from_disk = 0
+
+        self._load_cache()
+
+    def _load_cache(self):
+        """디스크 캐시에서 아직 만료되지 않은 항목 읽기 (파일이 없거나 손상되면 무시)"""
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            return
+
+        now = self.clock()
+        with self._lock:
+            for youtube_url, entry in entries.items():
+                if isinstance(entry, dict) and entry.get('url') and now < entry.get('expire', 0):
+                    self._cache[youtube_url] = entry
+            self.loaded_from_disk = len(self._cache)
+
+    def _save_cache(self):
+        """유효한 캐시 항목을 디스크에 기록 (임시 파일 후 교체)"""
+        if not self.cache_path:
+            return
+        now = self.clock()
+        with self._lock:
+            entries = {url: dict(entry) for url, entry in self._cache.items() if now < entry['expire']}
+
+        temp_path = f"{self.cache_path}.tmp"
+        with self._file_lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'saved_at': now, 'entries': entries}, f, ensure_ascii=False)
+                os.replace(temp_path, self.cache_path)
+            except OSError:
+                pass
+
+    def _extract(self, youtube_url: str) -> Optional[Dict]:
+        """extract_info 한 번으로 포맷 목록을 받아 최적 포맷 선택 후 캐시 항목 생성"""
+        start = time.perf_counter()
+        try:
+            extractor = self.extractor_factory(dict(DEFAULT_EXTRACT_OPTIONS))
+            if hasattr(extractor, '__enter__'):
+                with extractor as ydl:
+                    info = ydl.extract_info(youtube_url, download=False)
+            else:
+                info = extractor.extract_info(youtube_url, download=False)
+        except Exception as e:
+            print(f"❌ 스트림 정보 추출 실패: {str(e)[:100]}")
+            info = None
+
+        with self._lock:
+            self.extractions += 1
+
+        fmt = select_best_format((info or {}).get('formats') or [info or {}])
+        if fmt is None:
+            with self._lock:
+                self.failures += 1
+            return None
+
+        now = self.clock()
+        expire = parse_expire(fmt['url']) or now + self.default_ttl
+        entry = {
+            'url': fmt['url'],
+            'expire': expire,
+            'format': f"{fmt.get('format_id', '?')} ({fmt['height']}p)",
+            'resolved_at': now,
+            'extract_ms': (time.perf_counter() - start) * 1000,
+        }
+        with self._lock:
+            self._cache[youtube_url] = entry
+        self._save_cache()
+        return entry
+
+    def _refresh_in_background(self, youtube_url: str):
+        """만료 임박 항목을 백그라운드에서 갱신 (같은 URL은 한 번에 하나만)"""
+        with self._lock:
+            if youtube_url in self._refreshing:
+                return
+            self._refreshing.add(youtube_url)
+            self.background_refreshes += 1
+
+        def refresh():
+            try:
+                self._extract(youtube_url)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(youtube_url)
+
+        threading.Thread(target=refresh, name='StreamUrlRefresh', daemon=True).start()
+
+    def resolve(self, youtube_url: str, force_refresh: bool = False) -> Optional[str]:
+        """스트림 URL 반환 (유효한 캐시는 즉시, 만료 임박이면 캐시 반환 후 백그라운드 갱신)"""
+        now = self.clock()
+        with self._lock:
+            entry = None if force_refresh else self._cache.get(youtube_url)
+
+        if entry is not None and now < entry['expire']:
+            with self._lock:
+                self.hits += 1
+            if now >= entry['expire'] - self.refresh_margin:
+                self._refresh_in_background(youtube_url)
+            return entry['url']
+
+        entry = self._extract(youtube_url)
+        if entry is None:
+            return None
+        print(f"✅ 스트림 URL 추출 성공 (포맷: {entry['format']}, {entry['extract_ms']:.0f}ms)")
+        return entry['url']
+
+    def invalidate(self, youtube_url: str):
+        """캐시 항목 폐기 (403 등으로 URL이 더 이상 유효하지 않을 때)"""
+        with self._lock:
+            removed = self._cache.pop(youtube_url, None) is not None
+            if removed:
+                self.invalidations += 1
+        if removed:
+            self._save_cache()
+
+    def get_stats(self) -> Dict:
+        """캐시 적중/추출/갱신/무효화 통계와 항목별 남은 유효 시간"""
+        now = self.clock()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'extractions': self.extractions,
+                'background_refreshes': self.background_refreshes,
+                'invalidations': self.invalidations,
+                'failures': self.failures,
+                'loaded_from_disk': self.loaded_from_disk,
+                'entries': {url: {'format': entry['format'], 'expires_in': entry['expire'] - now}
+                            for url, entry in self._cache.items()},
+            }
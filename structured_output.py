@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+🧾 구조화 출력 (축약 스키마 + 관대한/점진적 JSON 파서)
+짧은 키와 열거형으로 출력 토큰을 줄이고, 제공자별 네이티브 JSON/스키마 모드 설정을 만들며,
+마크다운 코드 블록이나 잘린 응답도 최대한 복구해 기존 분석 결과 형식으로 변환
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 축약 키 → 분석 결과 키
+COMPACT_KEYS = {
+    'b': 'brand',
+    'm': 'model',
+    't': 'type',
+    'c': 'color',
+    's': 'condition',
+    'f': 'distinctive_features',
+    'p': 'confidence',
+}
+
+COLOR_VALUES = ['black', 'white', 'gray', 'silver', 'red', 'orange', 'yellow', 'green',
+                'blue', 'purple', 'pink', 'brown', 'gold', 'beige', 'multi', 'unknown']
+CONDITION_VALUES = ['new', 'good', 'used', 'worn', 'damaged', 'unknown']
+
+# 축약 키별 스키마와 프롬프트 설명
+FIELD_SPECS = {
+    'b': ({'type': 'string', 'description': 'brand or Unknown'}, 'b=brand'),
+    'm': ({'type': 'string', 'description': 'model or Unknown'}, 'm=model'),
+    't': ({'type': 'string', 'description': 'specific type'}, 't=specific type'),
+    'c': ({'type': 'string', 'enum': COLOR_VALUES}, f"c=color ({'|'.join(COLOR_VALUES)})"),
+    's': ({'type': 'string', 'enum': CONDITION_VALUES}, f"s=condition ({'|'.join(CONDITION_VALUES)})"),
+    'f': ({'type': 'array', 'items': {'type': 'string'}, 'description': 'up to 3 short features'},
+          'f=up to 3 short features'),
+    'p': ({'type': 'number', 'description': 'confidence 0-1'}, 'p=confidence 0-1'),
+}
+FULL_FIELDS = ['b', 'm', 't', 'c', 's', 'f', 'p']
+BRAND_MODEL_FIELDS = ['b', 'm', 'p']   # 색상/타입을 로컬에서 채울 때 원격에 요청하는 필드
+
+
+def build_schema(fields: List[str] = FULL_FIELDS) -> Dict:
+    """객체 하나의 축약 스키마 (JSON Schema, OpenAI strict 모드 조건 충족)"""
+    return {
+        'type': 'object',
+        'properties': {key: FIELD_SPECS[key][0] for key in fields},
+        'required': list(fields),
+        'additionalProperties': False,
+    }
+
+
+def build_batch_schema(fields: List[str] = FULL_FIELDS) -> Dict:
+    """배치 스키마 (루트는 객체: {"r": [{"i": 이미지 번호, ...}, ...]})"""
+    item = build_schema(fields)
+    item['properties'] = dict({'i': {'type': 'integer', 'description': 'image number'}}, **item['properties'])
+    item['required'] = ['i'] + item['required']
+    return {
+        'type': 'object',
+        'properties': {'r': {'type': 'array', 'items': item}},
+        'required': ['r'],
+        'additionalProperties': False,
+    }
+
+
+COMPACT_SCHEMA = build_schema()
+BATCH_SCHEMA = build_batch_schema()
+
+
+def compact_prompt(object_class: str, fields: List[str] = FULL_FIELDS) -> str:
+    """단일 객체 축약 프롬프트"""
+    keys = ', '.join(FIELD_SPECS[key][1] for key in fields)
+    return (f"Identify this {object_class}. Reply with JSON only: {keys}. "
+            f"Use \"Unknown\" when not visible.")
+
+
+def compact_batch_prompt(object_classes: List[str], fields: List[str] = FULL_FIELDS) -> str:
+    """배치 축약 프롬프트"""
+    labels = ', '.join(f"{i + 1}={object_class}" for i, object_class in enumerate(object_classes))
+    keys = ', '.join(FIELD_SPECS[key][1] for key in fields)
+    return (f"{len(object_classes)} images ({labels}). Reply with JSON only: {{\"r\":[...]}}, one item per image: "
+            f"i=image number, {keys}. Use \"Unknown\" when not visible.")
+
+
+def to_gemini_schema(schema: Dict) -> Dict:
+    """JSON Schema → Gemini responseSchema (OpenAPI 부분집합, additionalProperties 미지원)"""
+    converted = {}
+    for key, value in schema.items():
+        if key == 'additionalProperties':
+            continue
+        if key == 'type':
+            converted[key] = value.upper()
+        elif key == 'properties':
+            converted[key] = {name: to_gemini_schema(prop) for name, prop in value.items()}
+        elif key == 'items':
+            converted[key] = to_gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+def _strip_fences(text: str) -> str:
+    """마크다운 코드 블록 제거"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = re.sub(r'^```[a-zA-Z]*\s*', '', text)
+        text = re.sub(r'\s*```\s*$', '', text)
+    return text
+
+
+def repair_json(text: str) -> Optional[str]:
+    """잘린 JSON을 마지막으로 완성된 값까지 자르고 열린 괄호를 닫아 복구 (불가능하면 None)"""
+    start = min([pos for pos in (text.find('{'), text.find('[')) if pos != -1], default=-1)
+    if start == -1:
+        return None
+
+    stack = []          # [괄호, 기대 상태] - 객체: key/colon/value/comma, 배열: value/comma
+    safe_end, safe_stack = None, None
+    in_string = escaped = False
+    literal_start = None
+
+    def complete_value(end: int):
+        nonlocal safe_end, safe_stack
+        if not stack:
+            safe_end, safe_stack = end, []
+            return
+        frame = stack[-1]
+        if frame[0] == '{' and frame[1] == 'key':
+            frame[1] = 'colon'
+            return
+        frame[1] = 'comma'
+        safe_end, safe_stack = end, [f[0] for f in stack]
+
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                complete_value(i + 1)
+            i += 1
+            continue
+
+        if literal_start is not None and not (ch.isalnum() or ch in '+-.'):
+            complete_value(i)
+            literal_start = None
+
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append([ch, 'key' if ch == '{' else 'value'])
+            safe_end, safe_stack = i + 1, [f[0] for f in stack]
+        elif ch in '}]':
+            if not stack:
+                break
+            stack.pop()
+            complete_value(i + 1)
+            if not stack:
+                break
+        elif ch == ',':
+            if stack:
+                stack[-1][1] = 'key' if stack[-1][0] == '{' else 'value'
+        elif ch == ':':
+            if stack:
+                stack[-1][1] = 'value'
+        elif literal_start is None and (ch.isalnum() or ch == '-'):
+            literal_start = i
+        i += 1
+
+    if safe_end is None:
+        return None
+    closers = ''.join('}' if bracket == '{' else ']' for bracket in reversed(safe_stack))
+    return text[start:safe_end] + closers
+
+
+def _parse_json(text: str) -> Tuple[object, bool]:
+    """관대한 JSON 파싱 → (값 또는 None, 잘린 응답을 복구했는지 여부)"""
+    if not text:
+        return None, False
+    text = _strip_fences(text)
+
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    repaired = repair_json(text)
+    if repaired is None:
+        return None, False
+    try:
+        return json.loads(repaired), True
+    except json.JSONDecodeError:
+        return None, False
+
+
+def parse_json_tolerant(text: str):
+    """코드 블록/앞뒤 설명/잘린 응답을 허용하는 JSON 파싱 (실패 시 None)"""
+    return _parse_json(text)[0]
+
+
+def _has_identity(item: Dict) -> bool:
+    """브랜드/모델 중 하나라도 채워진 항목인지 확인 (Unknown도 모델의 답으로 인정)"""
+    return any(item.get(key) not in (None, '') for key in ('b', 'm', 'brand', 'model'))
+
+
+def expand_analysis(data: Dict, object_class: Optional[str] = None) -> Dict:
+    """축약 키/열거형 결과를 기존 분석 결과 형식으로 변환 (이미 긴 키면 그대로 유지)"""
+    analysis = {}
+    for key, value in data.items():
+        analysis[COMPACT_KEYS.get(key, key)] = value
+
+    for key in ('color', 'condition'):
+        if isinstance(analysis.get(key), str):
+            analysis[key] = analysis[key].strip().title()
+    for key in ('brand', 'model'):
+        if not analysis.get(key):
+            analysis[key] = 'Unknown'
+    if object_class and not analysis.get('type'):
+        analysis['type'] = object_class
+
+    features = analysis.get('distinctive_features')
+    if isinstance(features, str):
+        analysis['distinctive_features'] = [features]
+
+    try:
+        analysis['confidence'] = min(max(float(analysis.get('confidence', 0.5)), 0.0), 1.0)
+    except (TypeError, ValueError):
+        analysis['confidence'] = 0.5
+    return analysis
+
+
+def parse_analysis(content, object_class: Optional[str] = None) -> Optional[Dict]:
+    """단일 분석 응답(텍스트 또는 이미 파싱된 dict) → 분석 결과
+
+    잘린 응답을 복구한 결과는 'truncated': True로 표시 (기본값으로 채운 필드가 섞여 있음)
+    """
+    data, repaired = (content, False) if isinstance(content, dict) else _parse_json(content)
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data = data[0]
+    if not isinstance(data, dict) or not data:
+        return None
+    analysis = expand_analysis(data, object_class)
+    if repaired:
+        analysis['truncated'] = True
+    return analysis
+
+
+def parse_batch(content, count: int) -> List[Optional[Dict]]:
+    """배치 응답({"r": [...]} 또는 배열) → 이미지 순서별 분석 결과
+
+    잘린 응답의 마지막 항목과 브랜드/모델이 모두 없는 항목은 버림 (해당 이미지는 개별 요청으로 재시도)
+    """
+    results = [None] * count
+    data, repaired = (content, False) if isinstance(content, (dict, list)) else _parse_json(content)
+    if isinstance(data, dict):
+        data = data.get('r', data.get('results'))
+    if not isinstance(data, list):
+        return results
+    if repaired and data:
+        # 복구 시 닫힌 괄호는 마지막 항목에만 추가되므로 마지막 항목만 불완전할 수 있음
+        data = data[:-1]
+
+    for position, item in enumerate(data):
+        if not isinstance(item, dict) or not _has_identity(item):
+            continue
+        index = item.pop('i', item.pop('index', position + 1))
+        try:
+            index = int(index) - 1
+        except (TypeError, ValueError):
+            index = position
+        if 0 <= index < count:
+            results[index] = expand_analysis(item)
+    return results
+
+
+class StreamingJSONParser:
+    """스트리밍 응답 조각을 누적하며 지금까지 완성된 필드를 점진적으로 파싱"""
+
+    def __init__(self):
+        self.buffer = ''
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """조각 추가 후 현재까지의 부분 결과 반환 (아직 없으면 None)"""
+        self.buffer += chunk
+        return self.partial()
+
+    def partial(self):
+        data = parse_json_tolerant(self.buffer)
+        return data if isinstance(data, (dict, list)) else None
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+🧪 테스트 공통 설정
+저장소 루트 모듈을 import할 수 있게 경로를 추가하고,
+분석 저장소/스풀/캐시 파일이 작업 디렉토리에 생기지 않도록 임시 디렉토리로 돌림
+(경로는 모듈 import 시점에 환경변수에서 읽으므로 테스트 모듈보다 먼저 설정)
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_TMP_DIR = tempfile.mkdtemp(prefix='yolo11_tests_')
+os.environ.setdefault('AI_ANALYSIS_STORE', os.path.join(_TMP_DIR, 'analysis_store.db'))
+os.environ.setdefault('AI_OFFLINE_SPOOL', os.path.join(_TMP_DIR, 'analysis_spool'))
+os.environ.setdefault('COPILOT_CAPABILITY_CACHE', os.path.join(_TMP_DIR, 'copilot_capabilities.json'))
+os.environ.setdefault('YOUTUBE_STREAM_CACHE', os.path.join(_TMP_DIR, 'youtube_stream_cache.json'))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""🤖 AIObjectAnalyzer 배치 수집/호출 기록 테스트 (실제 API 호출 없이 제공자 함수를 대체)"""
+
+import time
+
+import numpy as np
+import pytest
+
+from ai_object_analyzer import AIObjectAnalyzer
+from analysis_job_queue import AnalysisJobQueue
+from analysis_store import AnalysisStore
+from offline_spool import OfflineJobSpool
+
+GOOD = {'brand': 'Nike', 'model': 'Air', 'type': 'shoe', 'color': 'red', 'confidence': 0.9}
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    analyzer = AIObjectAnalyzer()
+    analyzer.workers_running = True   # 자동 워커 시작 방지
+    # 테스트마다 빈 저장소/스풀 사용 (같은 크롭의 이전 결과가 캐시로 재사용되지 않도록)
+    if analyzer.analysis_store:
+        analyzer.analysis_store.close()
+    analyzer.analysis_store = AnalysisStore(str(tmp_path / 'analysis_store.db'))
+    analyzer.offline_spool = OfflineJobSpool(str(tmp_path / 'spool'))
+    for config in analyzer.api_providers.values():
+        config['enabled'] = False
+    yield analyzer
+    analyzer.workers_running = False
+    analyzer.shutdown()
+
+
+def make_job(track_id: int) -> dict:
+    crop = np.random.default_rng(track_id).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    return {'crop': crop, 'object_class': 'shoe', 'track_id': track_id,
+            'local': {}, 'box': None, 'frame_shape': None}
+
+
+def run_worker_once(analyzer) -> list:
+    """워커 루프를 작업 하나만 처리하고 멈추게 한 뒤 _analyze_jobs에 전달된 작업 수 반환"""
+    batches = []
+
+    def analyze(jobs):
+        batches.append(len(jobs))
+        analyzer.workers_running = False
+        return [None] * len(jobs), []
+
+    analyzer._analyze_jobs = analyze
+    analyzer._finish_job = lambda job, result: None
+    analyzer._analysis_worker_loop()
+    return batches
+
+
+def test_no_batch_provider_skips_batch_wait(analyzer):
+    # 상향 모드에서 배치 함수가 있는 저렴한 제공자(Gemini) 키가 없으면 배치를 기다리지 않음
+    analyzer.api_providers['openai']['enabled'] = True
+    analyzer.analysis_settings['escalation']['enabled'] = True
+    analyzer.analysis_settings['batching_enabled'] = True
+    analyzer.analysis_settings['batch_max_wait_ms'] = 2000
+    analyzer.analysis_queue = AnalysisJobQueue()
+    analyzer.analysis_queue.put(make_job(1), score=1.0)
+
+    assert not analyzer.has_batch_provider()
+    start = time.time()
+    assert run_worker_once(analyzer) == [1]
+    assert time.time() - start < 1.0
+
+
+def test_batch_provider_collects_batch(analyzer):
+    analyzer.api_providers['google']['enabled'] = True
+    analyzer.analysis_settings['escalation']['enabled'] = True
+    analyzer.analysis_settings['batch_max_wait_ms'] = 200
+    analyzer.analysis_queue = AnalysisJobQueue()
+    analyzer.analysis_queue.put(make_job(1), score=1.0)
+    analyzer.analysis_queue.put(make_job(2), score=0.5)
+
+    assert analyzer.has_batch_provider()
+    assert run_worker_once(analyzer) == [2]
+
+
+def test_open_circuit_disables_batching(analyzer):
+    analyzer.api_providers['google']['enabled'] = True
+    analyzer.provider_router.is_callable = lambda provider: provider != 'google'
+    assert not analyzer.has_batch_provider()
+
+
+@pytest.mark.parametrize('case, expected', [
+    ('vanished', []),
+    ('reset', []),
+    ('stopped', ['workers_stopped']),
+])
+def test_requeue_spools_only_recoverable_jobs(analyzer, case, expected):
+    # 사라지거나 초기화된 트랙의 작업은 스풀에 보관하지 않고 폐기
+    spooled = []
+    analyzer._spool_job = lambda job, payload, phash, reason: spooled.append(reason)
+    job = make_job(1)
+    job['generation'] = analyzer.result_generation
+    analyzer.active_track_ids = {1}
+    analyzer.pending_tracks.add(1)
+
+    if case == 'vanished':
+        analyzer.active_track_ids = {2}
+    elif case == 'reset':
+        job['generation'] = analyzer.result_generation - 1
+    else:
+        analyzer.workers_running = False
+
+    analyzer._requeue_job(job)
+    assert spooled == expected
+    assert 1 not in analyzer.pending_tracks
+
+
+def test_analyzer_usable_after_shutdown(analyzer):
+    # 트래커 run()은 종료 시 shutdown()을 호출하므로 두 번째 실행에서도 스레드 풀이 다시 만들어져야 함
+    analyzer.api_providers['google']['enabled'] = True
+    analyzer.analysis_settings['escalation']['enabled'] = True
+    analyzer.batch_provider_functions['google'] = lambda images, classes: [dict(GOOD) for _ in images]
+    analyzer.provider_functions['google'] = lambda image, object_class, *rest: dict(GOOD)
+
+    for run in range(2):
+        analyzer.workers_running = True
+        results, deferred = analyzer._analyze_jobs([make_job(10 * run + 1), make_job(10 * run + 2)])
+        assert [r['brand'] for r in results] == ['Nike', 'Nike'] and deferred == []
+        analyzer.workers_running = False
+        analyzer.shutdown()
+
+
+def test_batch_provider_not_called_again_for_unresolved_crop(analyzer):
+    analyzer.api_providers['google']['enabled'] = True
+    analyzer.analysis_settings['escalation']['enabled'] = False
+    analyzer._spool_job = lambda job, payload, phash, reason: None
+    calls = []
+
+    def batch(images, classes):
+        calls.append('batch')
+        return [dict(GOOD), None]
+
+    def single(image, object_class, *rest):
+        calls.append('single')
+        return dict(GOOD)
+
+    analyzer.batch_provider_functions['google'] = batch
+    analyzer.provider_functions['google'] = single
+    results, _ = analyzer._analyze_jobs([make_job(1), make_job(2)])
+    assert calls == ['batch']
+    assert results[0]['brand'] == 'Nike' and results[1] is None
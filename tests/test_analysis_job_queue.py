@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""📋 우선순위 작업 대기열 순서/밀어내기/만료 작업 제거 테스트"""
+
+import threading
+import time
+
+from analysis_job_queue import AnalysisJobQueue
+
+
+def job(track_id: int, score: float) -> dict:
+    return {'track_id': track_id, 'priority_score': score}
+
+
+def drain(queue: AnalysisJobQueue) -> list:
+    ids = []
+    while True:
+        item = queue.get(timeout=0)
+        if item is None:
+            return ids
+        ids.append(item['track_id'])
+
+
+def test_highest_score_first_and_fifo_on_ties():
+    queue = AnalysisJobQueue(maxsize=8)
+    queue.put(job(1, 0.5))
+    queue.put(job(2, 0.9))
+    queue.put(job(3, 0.5))
+    queue.put(job(4, 0.1), score=0.95)   # 명시한 점수가 작업 점수를 덮어씀
+    assert drain(queue) == [4, 2, 1, 3]
+
+
+def test_full_queue_evicts_lowest_score():
+    discarded = []
+    queue = AnalysisJobQueue(maxsize=2, on_discard=lambda j: discarded.append(j['track_id']))
+    queue.put(job(1, 0.3))
+    queue.put(job(2, 0.6))
+    assert queue.put(job(3, 0.5))
+    assert discarded == [1]
+    assert not queue.put(job(4, 0.2))   # 가장 낮은 점수보다 낮으면 거절
+    assert not queue.put(job(5, 0.5))   # 같은 점수도 밀어내지 않음
+    assert drain(queue) == [2, 3]
+    assert queue.get_stats()['evicted'] == 1
+
+
+def test_stale_jobs_dropped_on_get_and_drop_stale():
+    vanished = {2}
+    discarded = []
+    queue = AnalysisJobQueue(maxsize=8, is_stale=lambda j: j['track_id'] in vanished,
+                             on_discard=lambda j: discarded.append(j['track_id']))
+    for track_id, score in ((1, 0.1), (2, 0.9), (3, 0.5)):
+        queue.put(job(track_id, score))
+    assert queue.get(timeout=0)['track_id'] == 3
+    assert discarded == [2]
+
+    vanished.add(1)
+    assert queue.drop_stale() == 1
+    assert queue.qsize() == 0 and discarded == [2, 1]
+    assert queue.get_stats()['stale_dropped'] == 2
+
+
+def test_get_waits_for_put_and_times_out():
+    queue = AnalysisJobQueue()
+    start = time.time()
+    assert queue.get(timeout=0.1) is None
+    assert time.time() - start >= 0.09
+
+    threading.Timer(0.05, lambda: queue.put(job(7, 1.0))).start()
+    assert queue.get(timeout=2)['track_id'] == 7
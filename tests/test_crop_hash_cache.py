@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""🧩 dHash 계산/해밍 거리/근사 일치 캐시 테스트"""
+
+import numpy as np
+
+import crop_hash_cache
+from crop_hash_cache import PerceptualHashCache, compute_dhash, hamming_distance
+
+
+def gradient(width: int = 64, height: int = 48, reverse: bool = False) -> np.ndarray:
+    row = np.linspace(0, 255, width, dtype=np.float32)
+    if reverse:
+        row = row[::-1]
+    gray = np.tile(row, (height, 1)).astype(np.uint8)
+    return np.dstack([gray] * 3)
+
+
+def blocks_image(rng) -> np.ndarray:
+    """8×9 무작위 밝기 블록을 키운 이미지 (해시 비트가 뚜렷함)"""
+    blocks = rng.integers(0, 256, (8, 9), dtype=np.uint8)
+    return np.dstack([np.kron(blocks, np.ones((16, 16), np.uint8))] * 3)
+
+
+def test_dhash_bits_follow_brightness_direction():
+    assert compute_dhash(gradient()) == 2 ** 64 - 1
+    assert compute_dhash(gradient(reverse=True)) == 0
+    assert compute_dhash(np.zeros((0, 0, 3), np.uint8)) is None
+    assert compute_dhash(None) is None
+
+
+def test_dhash_stable_under_resize_and_small_noise():
+    rng = np.random.default_rng(0)
+    image = blocks_image(rng)
+    noisy = np.clip(image.astype(np.int16) + rng.integers(-3, 4, image.shape), 0, 255).astype(np.uint8)
+    base = compute_dhash(image)
+    assert hamming_distance(base, compute_dhash(image[::2, ::2])) <= 6
+    assert hamming_distance(base, compute_dhash(noisy)) <= 6
+    assert hamming_distance(base, compute_dhash(gradient(reverse=True))) > 6
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(0, 2 ** 64 - 1) == 64
+
+
+def test_cache_exact_near_and_class_mismatch():
+    cache = PerceptualHashCache(max_distance=2)
+    cache.store(0b1111, 'phone', {'brand': 'A'})
+    assert cache.lookup(0b1111, 'phone') == {'brand': 'A'}
+    assert cache.lookup(0b1100, 'phone') == {'brand': 'A'}   # 거리 2
+    assert cache.lookup(0b1000, 'phone') is None             # 거리 3
+    assert cache.lookup(0b1111, 'laptop') is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['near_hits'], stats['misses']) == (1, 1, 2)
+
+
+def test_cache_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(crop_hash_cache.time, 'time', lambda: now[0])
+    cache = PerceptualHashCache(max_entries=2, ttl=10, max_distance=0)
+    cache.store(1, 'cup', {'brand': 'one'})
+    cache.store(2, 'cup', {'brand': 'two'})
+    cache.lookup(1, 'cup')                  # 1을 최근 사용으로
+    cache.store(4, 'cup', {'brand': 'four'})
+    assert cache.lookup(2, 'cup') is None and cache.get_stats()['evictions'] == 1
+
+    now[0] += 11
+    assert cache.lookup(1, 'cup') is None and len(cache) == 0
+    cache.store(8, 'cup', {})               # 빈 결과는 저장하지 않음
+    assert len(cache) == 0
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""📹 프레임 링 드롭 정책/캡처 스레드 테스트"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from frame_capture import FrameRing, ThreadedFrameCapture
+
+
+def frame(value: int) -> np.ndarray:
+    return np.full((2, 2), value, dtype=np.uint8)
+
+
+def values(ring: FrameRing, latest: bool = False) -> list:
+    items = []
+    while True:
+        item = ring.get(timeout=0, latest=latest)
+        if item is None:
+            return items
+        items.append(int(item[0][0, 0]))
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        FrameRing(2, 'drop_random')
+
+
+def test_drop_oldest_keeps_newest_frames():
+    ring = FrameRing(2, 'drop_oldest')
+    assert all(ring.put(frame(i)) for i in range(4))
+    assert values(ring) == [2, 3]
+    assert ring.dropped_frames == 2 and ring.total_frames == 4
+
+
+def test_drop_newest_rejects_when_full():
+    ring = FrameRing(2, 'drop_newest')
+    assert [ring.put(frame(i)) for i in range(4)] == [True, True, False, False]
+    assert values(ring) == [0, 1]
+    assert ring.dropped_frames == 2
+
+
+def test_latest_get_skips_older_frames():
+    ring = FrameRing(3, 'drop_oldest')
+    for i in range(3):
+        ring.put(frame(i))
+    assert values(ring, latest=True) == [2]
+    assert ring.skipped_frames == 2
+
+
+def test_block_waits_for_free_slot():
+    ring = FrameRing(1, 'block')
+    ring.put(frame(0))
+    done = threading.Event()
+    writer = threading.Thread(target=lambda: (ring.put(frame(1)), done.set()))
+    writer.start()
+
+    assert not done.wait(0.2)   # 자리가 없으면 캡처 스레드가 대기
+    assert int(ring.get(latest=False)[0][0, 0]) == 0
+    assert done.wait(1.0)
+    writer.join()
+    assert values(ring) == [1] and ring.dropped_frames == 0
+
+
+def test_close_wakes_blocked_reader_and_writer():
+    ring = FrameRing(1, 'block')
+    ring.put(frame(0))
+    results = {}
+    writer = threading.Thread(target=lambda: results.update(put=ring.put(frame(1))))
+    writer.start()
+    time.sleep(0.05)
+    ring.close()
+    writer.join(1.0)
+    assert results['put'] is False
+
+    empty = FrameRing(1)
+    empty.close()
+    assert empty.get(timeout=5) is None
+
+
+class FakeCapture:
+    def __init__(self, count: int):
+        self.remaining = count
+
+    def read(self):
+        if self.remaining == 0:
+            return False, None
+        self.remaining -= 1
+        return True, frame(self.remaining)
+
+
+def test_threaded_capture_reads_in_order_and_preprocesses():
+    capture = ThreadedFrameCapture(FakeCapture(5), ring_size=2, policy='block',
+                                   preprocess=lambda f: f * 2).start()
+    frames = []
+    while True:
+        ret, f = capture.read(timeout=1.0)
+        if not ret:
+            break
+        frames.append(int(f[0, 0]))
+    capture.stop()
+    assert frames == [8, 6, 4, 2, 0]
+    assert capture.end_of_stream
+    assert capture.get_stats()['captured_frames'] == 5
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""📐 제공자별 이미지 크기/토큰 추정 테스트"""
+
+from image_sizing import DETAIL_TARGETS, ImageSizingPolicy, OPENAI_LOW_TOKENS, estimate_image_tokens
+
+
+def test_estimate_tokens_per_provider():
+    assert estimate_image_tokens('openai', 2000, 1000) == OPENAI_LOW_TOKENS
+    assert estimate_image_tokens('anthropic', 750, 100) == 100
+    assert estimate_image_tokens('google', 384, 384) == 258
+    assert estimate_image_tokens('google', 800, 400) == 258 * 2
+    assert estimate_image_tokens('github_copilot', 512, 512) == 0
+
+
+def test_openai_low_detail_never_loses_resolution():
+    # 'low'는 512×512 안으로 줄이므로 모든 상세도 목표가 그 안에 들어가야 함
+    assert all(side <= 512 for side, _ in DETAIL_TARGETS.values())
+
+
+def test_choose_prefers_largest_side_for_fixed_cost_and_smallest_for_pixel_cost():
+    policy = ImageSizingPolicy(detail='medium')
+    assert policy.choose('google', 1000, 800)[0] == 384
+    assert policy.choose('openai', 1000, 800)[0] == 384
+    assert policy.choose('anthropic', 1000, 800)[0] == 288
+
+
+def test_choose_respects_token_limit_and_small_crops():
+    policy = ImageSizingPolicy(detail='high', max_tokens={'anthropic': 100})
+    side, _, tokens = policy.choose('anthropic', 1000, 1000)
+    assert tokens <= 100 and side >= policy.min_side
+    assert policy.choose('google', 100, 50)[0] == 100
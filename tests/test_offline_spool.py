@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""📦 오프라인 작업 스풀 저장/상한/재분석 테스트"""
+
+import os
+import time
+
+from offline_spool import OfflineJobSpool
+
+
+def make_spool(tmp_path, **kwargs) -> OfflineJobSpool:
+    return OfflineJobSpool(str(tmp_path / 'spool'), **kwargs)
+
+
+def test_put_and_load_round_trip(tmp_path):
+    spool = make_spool(tmp_path)
+    job_id = spool.put(b'jpeg-bytes', {'object_class': 'cup', 'reason': 'providers_failed'})
+    jpeg, metadata = spool.load(job_id)
+    assert jpeg == b'jpeg-bytes'
+    assert metadata['object_class'] == 'cup' and metadata['job_id'] == job_id and metadata['attempts'] == 0
+    assert not any(name.endswith('.tmp') for name in os.listdir(spool.spool_dir))
+
+    # 새 인스턴스(다음 실행)에서도 그대로 보임
+    assert make_spool(tmp_path).job_ids() == [job_id]
+    assert spool.put(b'', {}) is None
+
+
+def test_limits_evict_oldest_first(tmp_path):
+    spool = make_spool(tmp_path, max_jobs=2, max_bytes=25)
+    first = spool.put(b'a' * 10, {'n': 1})
+    second = spool.put(b'b' * 10, {'n': 2})
+    third = spool.put(b'c' * 10, {'n': 3})
+    assert spool.job_ids() == [second, third]
+    assert first not in spool.job_ids() and spool.evicted == 1
+    assert spool.put(b'x' * 26, {}) is None   # 단독으로 상한을 넘는 작업은 거절
+
+    spool.put(b'd' * 20, {'n': 4})            # 용량 상한 초과 → 오래된 작업 2개 삭제
+    assert [spool.load(job_id)[1]['n'] for job_id in spool.job_ids()] == [4]
+
+
+def test_drain_once_stops_on_first_failure(tmp_path):
+    spool = make_spool(tmp_path, max_attempts=2)
+    job_ids = [spool.put(bytes([i]) * 4, {'n': i}) for i in range(3)]
+    seen = []
+
+    def replay(jpeg, metadata):
+        seen.append(metadata['n'])
+        return metadata['n'] != 1
+
+    assert spool.drain_once(replay) == 1
+    assert seen == [0, 1]
+    assert spool.job_ids() == job_ids[1:]
+    assert spool.load(job_ids[1])[1]['attempts'] == 1
+
+    # 최대 실패 횟수에 도달하면 폐기
+    spool.drain_once(replay)
+    assert spool.job_ids() == [job_ids[2]] and spool.dropped == 1
+    assert spool.drain_once(replay) == 1 and spool.job_ids() == []
+
+
+def test_corrupt_job_is_removed(tmp_path):
+    spool = make_spool(tmp_path)
+    job_id = spool.put(b'jpeg', {})
+    with open(os.path.join(spool.spool_dir, f'{job_id}.json'), 'w') as f:
+        f.write('{broken')
+    assert spool.drain_once(lambda jpeg, metadata: True) == 0
+    assert spool.job_ids() == []
+
+
+def test_drainer_replays_when_ready(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.put(b'jpeg', {'n': 1})
+    ready = []
+    spool.start_drainer(lambda jpeg, metadata: True, is_ready=lambda: bool(ready), interval=0.02)
+    time.sleep(0.1)
+    assert len(spool.job_ids()) == 1   # 제공자 복구 전에는 재분석하지 않음
+
+    ready.append(True)
+    deadline = time.time() + 2
+    while spool.job_ids() and time.time() < deadline:
+        time.sleep(0.02)
+    spool.stop_drainer()
+    assert spool.job_ids() == [] and spool.get_stats()['replayed'] == 1
+    assert not spool.get_stats()['draining']
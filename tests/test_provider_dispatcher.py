@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""🏁 헤지 디스패처 테스트 (승자 선택/헤지/마감 시간/종료 후 재시작)"""
+
+import time
+
+import pytest
+
+from provider_dispatcher import HedgedDispatcher
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = HedgedDispatcher(hedge_delay=0.05, deadline=2.0, max_workers=4)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def slow(result, delay):
+    def call():
+        time.sleep(delay)
+        return result
+    return call
+
+
+def test_hedge_starts_next_provider_and_fastest_wins(dispatcher):
+    name, result = dispatcher.dispatch([('slow', slow({'v': 1}, 0.5)), ('fast', slow({'v': 2}, 0.0))])
+    assert (name, result) == ('fast', {'v': 2})
+    stats = dispatcher.get_stats()
+    assert stats['hedges_launched'] == 1 and stats['wins'] == {'fast': 1}
+
+
+def test_failed_provider_falls_back_immediately(dispatcher):
+    name, _ = dispatcher.dispatch([('broken', lambda: None), ('ok', lambda: {'v': 1})],
+                                  hedge_delays={'broken': 10.0})
+    assert name == 'ok'
+    assert dispatcher.get_stats()['fallbacks_launched'] == 1
+
+
+def test_deadline_and_invalid_results(dispatcher):
+    assert dispatcher.dispatch([('slow', slow({'v': 1}, 0.5))], deadline=0.1) is None
+    assert dispatcher.get_stats()['deadline_exceeded'] == 1
+    # 검증에 실패한 결과는 다른 결과가 없을 때만 백업으로 반환
+    assert dispatcher.dispatch([('a', lambda: {'bad': 1})], validator=lambda r: 'v' in r) == ('a', {'bad': 1})
+
+
+def test_dispatch_after_shutdown_restarts(dispatcher):
+    assert dispatcher.dispatch([('a', lambda: {'v': 1})])[0] == 'a'
+    dispatcher.shutdown()
+    assert dispatcher.dispatch([('a', lambda: {'v': 2})]) == ('a', {'v': 2})
+    assert dispatcher.get_stats()['jobs'] == 2
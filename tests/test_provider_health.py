@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""🩺 서킷 브레이커 상태 전이/상태 순 정렬 테스트 (time.time을 대체해 쿨다운 경과를 흉내)"""
+
+import pytest
+
+import provider_health
+from provider_health import CLOSED, HALF_OPEN, OPEN, ProviderRouter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(provider_health.time, 'time', lambda: now[0])
+    return now
+
+
+def state(router: ProviderRouter, provider: str) -> str:
+    return router.get_health()[provider]['state']
+
+
+def open_circuit(router: ProviderRouter, provider: str):
+    for _ in range(router.failure_threshold):
+        router.record_failure(provider, 0.1, 'http_500')
+
+
+def test_opens_after_consecutive_failures(clock):
+    router = ProviderRouter(failure_threshold=3, cooldown=30)
+    router.record_failure('google', 0.1)
+    router.record_failure('google', 0.1)
+    router.record_success('google', 0.1)   # 성공하면 연속 실패 초기화
+    router.record_failure('google', 0.1)
+    router.record_failure('google', 0.1)
+    assert state(router, 'google') == CLOSED and router.allow('google')
+
+    router.record_failure('google', 0.1, 'timeout')
+    assert state(router, 'google') == OPEN
+    assert not router.allow('google') and not router.is_callable('google')
+    assert router.cooldown_remaining('google') == pytest.approx(30)
+    assert router.get_health()['google']['last_error'] == 'timeout'
+
+
+def test_half_open_allows_single_probe_then_closes(clock):
+    router = ProviderRouter(failure_threshold=2, cooldown=30)
+    open_circuit(router, 'openai')
+    clock[0] += 30
+    assert router.is_callable('openai') and router.cooldown_remaining('openai') == 0
+
+    assert router.allow('openai')
+    assert state(router, 'openai') == HALF_OPEN
+    assert not router.allow('openai') and not router.is_callable('openai')
+
+    router.record_success('openai', 0.2)
+    assert state(router, 'openai') == CLOSED and router.allow('openai')
+
+
+def test_failed_probe_reopens_and_release_returns_probe(clock):
+    router = ProviderRouter(failure_threshold=2, cooldown=30)
+    open_circuit(router, 'anthropic')
+    clock[0] += 31
+    assert router.allow('anthropic')
+    router.record_failure('anthropic', 0.1)
+    assert state(router, 'anthropic') == OPEN
+    assert router.cooldown_remaining('anthropic') == pytest.approx(30)
+
+    # 취소된 시험 호출은 상태를 바꾸지 않고 다음 시험 기회를 돌려줌
+    clock[0] += 30
+    assert router.allow('anthropic')
+    router.release('anthropic')
+    assert state(router, 'anthropic') == HALF_OPEN and router.allow('anthropic')
+
+
+def test_order_puts_open_circuits_last_and_prefers_healthy(clock):
+    router = ProviderRouter(failure_threshold=1, cooldown=30)
+    router.record_failure('google', 0.1)
+    router.record_success('openai', 8.0)
+    router.record_success('anthropic', 0.5)
+    assert router.order(['google', 'openai', 'anthropic']) == ['anthropic', 'openai', 'google']
+    # 측정 전이면 기본 우선순위 유지
+    assert router.order(['b', 'a']) == ['b', 'a']
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""🗂️ 작업 단위 중복 호출 방지/게이트 테스트"""
+
+import threading
+
+from provider_registry import JobCallLedger, ProviderRegistry
+
+
+def test_claim_dedups_within_job_only():
+    registry = ProviderRegistry()
+    with registry.job():
+        assert registry.claim('openai')
+        assert not registry.claim('openai')
+        assert registry.claim('google')
+    with registry.job():
+        assert registry.claim('openai')
+    # 작업 범위 밖에서는 제한 없음
+    assert registry.claim('openai') and registry.claim('openai')
+    assert registry.get_stats()['openai'] == {'calls': 4, 'deduped': 1}
+
+
+def test_nested_job_shares_ledger_and_release_allows_retry():
+    registry = ProviderRegistry()
+    with registry.job() as outer:
+        assert registry.claim('anthropic')
+        with registry.job() as inner:
+            assert inner is outer
+            assert not registry.claim('anthropic')
+        registry.release('anthropic')
+        assert registry.claim('anthropic')
+
+
+def test_explicit_ledger_carries_calls_across_scopes():
+    # 배치 요청에서 호출한 제공자는 같은 크롭의 개별 요청에서 다시 호출하지 않음
+    registry = ProviderRegistry()
+    with registry.job(JobCallLedger()) as batch:
+        registry.claim('google')
+    crop_ledger = JobCallLedger(batch.called)
+    with registry.job(crop_ledger):
+        assert not registry.claim('google')
+        assert registry.claim('openai')
+    assert crop_ledger.called == {'google', 'openai'}
+
+
+def test_bind_carries_ledger_to_other_threads():
+    registry = ProviderRegistry()
+    results = []
+    with registry.job() as ledger:
+        registry.claim('openai')
+        worker = threading.Thread(target=registry.bind(lambda: results.append(registry.claim('openai'))))
+        worker.start()
+        worker.join()
+    assert results == [False]
+    assert ledger.called == {'openai'}
+
+
+def test_gate_replaces_claim_and_receives_reports():
+    registry = ProviderRegistry()
+    reports = []
+    registry.set_gate('openai', lambda name: name == 'openai',
+                      lambda name, latency, success, reason: reports.append((name, success, reason)))
+    assert registry.acquire('openai')
+    registry.report('openai', 0.1, False, 'http_500')
+    registry.report('unregistered', 0.1, True)   # 게이트 없는 백엔드 보고는 무시
+    assert reports == [('openai', False, 'http_500')]
+
+    with registry.job():
+        assert registry.acquire('google') and not registry.acquire('google')
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""⏳ 토큰 버킷/제공자 할당량 테스트 (monotonic 시계를 대체해 시간 경과를 흉내)"""
+
+import pytest
+
+import rate_limiter
+from rate_limiter import ProviderRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_bucket_starts_full_and_drains(clock):
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    for _ in range(3):
+        assert bucket.available()
+        bucket.consume()
+    assert not bucket.available()
+    assert bucket.wait_time() == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2.0, capacity=4)
+    for _ in range(4):
+        bucket.consume()
+    clock[0] += 0.5
+    assert bucket.available() and not bucket.available(2)
+    assert bucket.wait_time(2) == pytest.approx(0.5)
+    clock[0] += 60
+    assert bucket.tokens <= 4 and bucket.available(4) and not bucket.available(5)
+
+
+def test_limiter_rejects_without_spending(clock):
+    limiter = ProviderRateLimiter({'google': {'rpm': 2}, 'free': {}})
+    assert limiter.try_acquire('google') and limiter.try_acquire('google')
+    assert not limiter.has_budget('google')
+    assert not limiter.try_acquire('google')
+    assert limiter.wait_time('google') == pytest.approx(30.0)
+
+    usage = limiter.get_usage()['google']
+    assert usage['total_used'] == 2 and usage['rejected'] == 1
+
+    clock[0] += 30
+    assert limiter.try_acquire('google')
+    # 한도가 없거나 등록되지 않은 제공자는 항상 허용
+    assert all(limiter.try_acquire('free') for _ in range(100))
+    assert limiter.try_acquire('unknown') and limiter.wait_time('unknown') == 0.0
+
+
+def test_daily_quota(clock):
+    limiter = ProviderRateLimiter({'google': {'rps': 100, 'daily': 2}})
+    assert limiter.try_acquire('google') and limiter.try_acquire('google')
+    clock[0] += 10
+    assert not limiter.try_acquire('google')
+    assert limiter.wait_time('google') > 0
+    assert limiter.get_usage()['google']['daily_remaining'] == 0
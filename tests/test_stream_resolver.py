@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""📺 스트림 포맷 선택/만료 파싱/디스크 캐시 테스트 (yt_dlp 대신 가짜 추출기와 시계 사용)"""
+
+from stream_resolver import YouTubeStreamResolver, parse_expire, select_best_format
+
+YOUTUBE_URL = 'https://www.youtube.com/watch?v=abc123'
+
+
+def fmt(format_id, height, vcodec='avc1.4d401f', acodec='mp4a.40.2', tbr=1000, protocol='https', expire=2000):
+    return {'format_id': format_id, 'height': height, 'vcodec': vcodec, 'acodec': acodec, 'tbr': tbr,
+            'protocol': protocol, 'url': f'https://r1.googlevideo.com/videoplayback?id={format_id}&expire={expire}'}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeExtractor:
+    """extract_info 호출 수를 세는 가짜 추출기 팩토리"""
+
+    def __init__(self, formats):
+        self.formats = formats
+        self.calls = 0
+
+    def __call__(self, options):
+        return self
+
+    def extract_info(self, url, download=False):
+        self.calls += 1
+        return {'formats': self.formats}
+
+
+def test_select_best_format_prefers_muxed_tier_then_avc1():
+    formats = [
+        fmt('video-only-1080', 1080, acodec='none', tbr=5000),
+        fmt('vp9-720', 720, vcodec='vp9', tbr=3000),
+        fmt('avc1-720', 720, tbr=2000),
+        fmt('avc1-360', 360),
+    ]
+    assert select_best_format(formats)['format_id'] == 'avc1-720'
+
+
+def test_select_best_format_falls_back_to_video_only_and_skips_unplayable():
+    formats = [
+        fmt('dash', 720, acodec='none', protocol='http_dash_segments'),
+        fmt('video-only-480', 480, acodec='none'),
+        fmt('audio-only', None, vcodec='none'),
+    ]
+    assert select_best_format(formats)['format_id'] == 'video-only-480'
+    assert select_best_format([]) is None
+
+
+def test_select_best_format_outside_tiers():
+    assert select_best_format([fmt('4k', 2160), fmt('1440', 1440)])['format_id'] == '1440'
+    assert select_best_format([fmt('144', 144), fmt('180', 180)])['format_id'] == '180'
+
+
+def test_parse_expire_query_and_path():
+    assert parse_expire('https://r1.googlevideo.com/videoplayback?expire=1700000000&id=1') == 1700000000.0
+    assert parse_expire('https://manifest.googlevideo.com/api/manifest/hls/expire/1700000123/id/1') == 1700000123.0
+    assert parse_expire('https://example.com/video.mp4') is None
+    assert parse_expire('https://example.com/video.mp4?expire=soon') is None
+
+
+def test_cache_hits_until_expiry(tmp_path):
+    clock = FakeClock(1000.0)
+    extractor = FakeExtractor([fmt('avc1-720', 720, expire=2000)])
+    resolver = YouTubeStreamResolver(extractor, refresh_margin=0, clock=clock,
+                                     cache_path=str(tmp_path / 'cache.json'))
+
+    url = resolver.resolve(YOUTUBE_URL)
+    assert 'avc1-720' in url
+    assert resolver.resolve(YOUTUBE_URL) == url
+    assert extractor.calls == 1
+
+    clock.now = 2001.0
+    resolver.resolve(YOUTUBE_URL)
+    assert extractor.calls == 2
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache_path = str(tmp_path / 'cache.json')
+    clock = FakeClock(1000.0)
+    first = YouTubeStreamResolver(FakeExtractor([fmt('avc1-720', 720, expire=2000)]),
+                                  clock=clock, cache_path=cache_path)
+    url = first.resolve(YOUTUBE_URL)
+
+    # 새 프로세스처럼 새 해석기를 만들어도 만료 전이면 추출하지 않음
+    extractor = FakeExtractor([fmt('other', 480)])
+    second = YouTubeStreamResolver(extractor, refresh_margin=0, clock=clock, cache_path=cache_path)
+    assert second.get_stats()['loaded_from_disk'] == 1
+    assert second.resolve(YOUTUBE_URL) == url
+    assert extractor.calls == 0
+
+    # 무효화는 디스크에도 반영되고, 만료된 항목은 읽지 않음
+    second.invalidate(YOUTUBE_URL)
+    assert YouTubeStreamResolver(extractor, clock=clock, cache_path=cache_path).get_stats()['loaded_from_disk'] == 0
+
+    first._save_cache()
+    clock.now = 2001.0
+    assert YouTubeStreamResolver(extractor, clock=clock, cache_path=cache_path).get_stats()['loaded_from_disk'] == 0
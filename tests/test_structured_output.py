@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""🧾 잘린 JSON 복구/점진적 파서/축약 응답 변환 테스트"""
+
+import json
+
+import pytest
+
+from structured_output import (BRAND_MODEL_FIELDS, StreamingJSONParser, build_batch_schema, build_schema,
+                               parse_analysis, parse_batch, repair_json)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"b":"Nike","m"', '{"b":"Nike"}'),               # 값 없는 키는 버림
+    ('{"b":"Ni', '{}'),                               # 잘린 문자열은 버림
+    ('{"p":0.8', '{}'),                               # 끝에서 잘린 숫자는 더 길었을 수 있음
+    ('{"p":0.8,', '{"p":0.8}'),
+    ('{"f":["x","y', '{"f":["x"]}'),
+    ('[1,2', '[1]'),
+    ('text {"r":[{"i":1,"b":"A"},{"i":2,"b":"B', '{"r":[{"i":1,"b":"A"},{"i":2}]}'),
+    ('{"b":"a\\"}","m":"x"', '{"b":"a\\"}","m":"x"}'),  # 문자열 안의 이스케이프/괄호
+    ('no json here', None),
+])
+def test_repair_json(text, expected):
+    repaired = repair_json(text)
+    assert repaired == expected
+    if repaired is not None:
+        json.loads(repaired)
+
+
+def test_streaming_parser_emits_completed_fields():
+    parser = StreamingJSONParser()
+    assert parser.feed('') is None
+    assert parser.feed('{"b":"So') == {}
+    assert parser.feed('ny","m":"WH') == {'b': 'Sony'}
+    assert parser.feed('-1000","p":0.9}') == {'b': 'Sony', 'm': 'WH-1000', 'p': 0.9}
+
+
+def test_parse_analysis_expands_compact_keys():
+    analysis = parse_analysis('```json\n{"b":"Sony","c":"black","p":1.7,"f":"x"}\n```', 'tv')
+    assert analysis == {'brand': 'Sony', 'model': 'Unknown', 'type': 'tv', 'color': 'Black',
+                        'distinctive_features': ['x'], 'confidence': 1.0}
+    assert parse_analysis('{"b":"Sony","m":"WH', 'tv')['truncated'] is True
+    assert parse_analysis('not json') is None
+
+
+def test_parse_batch_orders_by_index_and_drops_truncated_item():
+    content = '{"r":[{"i":2,"b":"B","p":0.7},{"i":1,"b":"A"},{"i":3,"b":"C'
+    results = parse_batch(content, 3)
+    assert [r and r['brand'] for r in results] == ['A', 'B', None]
+    # 브랜드/모델이 모두 없는 항목과 범위 밖 번호는 버림
+    assert parse_batch([{'i': 1, 'c': 'red'}, {'i': 9, 'b': 'X'}], 2) == [None, None]
+
+
+def test_schemas_are_strict():
+    schema = build_schema(BRAND_MODEL_FIELDS)
+    assert schema['required'] == ['b', 'm', 'p'] and schema['additionalProperties'] is False
+    item = build_batch_schema(BRAND_MODEL_FIELDS)['properties']['r']['items']
+    assert item['required'][0] == 'i' and list(item['properties'])[0] == 'i'
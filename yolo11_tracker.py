@@ -7,7 +7,6 @@ YOLO11 - 최신 Ultralytics 모델 사용
 
 import cv2
 import numpy as np
-import yt_dlp
 import random
 from ultralytics import YOLO
 import threading
@@ -19,6 +18,11 @@ import os
 from simple_text_utils import put_korean_text
 from ui_design_improved import ImprovedUIDesign
 from ai_object_analyzer import AIObjectAnalyzer
+from frame_capture import ThreadedFrameCapture
+from ffmpeg_capture import FFmpegCapture, ffmpeg_available, probe_video
+from stream_resolver import YouTubeStreamResolver
+from crop_quality import BestFrameSelector
+from appearance_drift import AppearanceDriftMonitor
 
 class YOLO11ObjectTracker:
     def __init__(self, model_size='n'):
@@ -34,6 +38,9 @@ class YOLO11ObjectTracker:
         }
         
         self.current_model = model_size
+        # 캡처 스레드가 프레임 크기를 정할 때 쓰는 모델 (모델 변경이 끝난 뒤에만 잠금 안에서 갱신)
+        self.frame_size_model = model_size
+        self.frame_size_lock = threading.Lock()
         model_info = self.models[model_size]
         
         print("🚀" + "="*60)
@@ -100,12 +107,24 @@ class YOLO11ObjectTracker:
         self.current_fps = 0
         self.total_detections = 0
         self.valid_detections = 0
+        
+        # 프레임 캡처 설정 (캡처 스레드 + 링 버퍼)
+        self.capture_settings = {
+            'ring_size': 2,                # 링 버퍼 크기 (작을수록 지연 감소)
+            'live_policy': 'drop_oldest',  # 웹캠/YouTube/스트림: 항상 최신 프레임
+            'file_policy': 'block',        # 로컬 파일: 무손실 처리
+            'backend': os.getenv('CAPTURE_BACKEND', 'opencv'),  # opencv | ffmpeg (ffmpeg: 디코딩 단계에서 모델 크기로 변환)
+            'max_reconnects': 3,           # YouTube 읽기 실패 시 URL 재해석 후 재연결 횟수 (성공적으로 읽으면 초기화)
+        }
+        self.frame_capture = None
+        self.stream_resolver = YouTubeStreamResolver()   # 스트림 URL 캐시 (재연결 시 재추출 생략)
           # UI 디자인 개선
         self.ui_design = ImprovedUIDesign()
         
         # AI 객체 상세 분석기 (선택적)
         try:
             self.ai_analyzer = AIObjectAnalyzer()
+            self.ai_analyzer.start_workers()
             self.use_ai_analysis = True
             print("🤖 AI 상세 분석 시스템 활성화")
         except Exception as e:
@@ -114,8 +133,12 @@ class YOLO11ObjectTracker:
             print(f"⚠️ AI 분석 시스템 비활성화: {e}")
         
         # AI 분석 설정
-        self.ai_analysis_interval = 5  # 5프레임마다 AI 분석
+        self.ai_analysis_interval = 1  # N프레임마다 분석 후보 크롭 수집
         self.frame_count_for_ai = 0
+        # 트랙별 최적 프레임 선택 (흐리거나 잘린 크롭 대신 가장 좋은 크롭을 분석)
+        self.best_frame_selector = BestFrameSelector(buffer_size=3, min_quality=0.65, timeout=1.5)
+        # 트랙 외형 변화 감지 (분석 후 외형이 바뀐 경우에만 재분석)
+        self.drift_monitor = AppearanceDriftMonitor(threshold=0.4, alpha=0.3, confirm_frames=5)
         self.detailed_object_info = {}  # 상세 정보 캐시
         
         # YOLO11 최적화된 클래스별 임계값
@@ -242,46 +265,17 @@ class YOLO11ObjectTracker:
         
         return url
     
-    def get_youtube_stream_url(self, youtube_url):
-        """유튜브 URL에서 스트림 URL 추출 (YOLO11 최적화)"""
+    def get_youtube_stream_url(self, youtube_url, force_refresh=False):
+        """유튜브 URL에서 스트림 URL 추출 (한 번의 추출로 최적 포맷 선택, 만료 전까지 캐시 재사용)"""
         normalized_url = self.normalize_youtube_url(youtube_url)
         print(f"🔗 정규화된 URL: {normalized_url}")
         
-        # YOLO11 성능을 위한 최적 품질 선택
-        format_options = [
-            'best[height<=1080][height>=720]',  # 1080p-720p (최적 품질)
-            'best[height<=720][height>=480]',   # 720p-480p
-            'best[height<=480][height>=360]',   # 480p-360p
-            'best[height<=360]',                # 360p 이하
-            'worst[height>=240]',               # 240p 이상 최저품질
-        ]
-        
-        for format_option in format_options:
-            ydl_opts = {
-                'format': format_option,
-                'quiet': True,
-                'no_warnings': True,
-                'extractaudio': False,
-                'ignoreerrors': True,
-                'socket_timeout': 30,
-                'retries': 2,
-            }
-            
-            try:
-                print(f"🎯 품질 옵션 시도: {format_option}")
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(normalized_url, download=False)
-                    
-                    if info and 'url' in info:
-                        print(f"✅ 스트림 URL 추출 성공 (품질: {format_option})")
-                        return info['url']
-                        
-            except Exception as e:
-                print(f"❌ 품질 {format_option} 시도 실패: {str(e)[:100]}")
-                continue
-        
-        print("❌ 모든 품질 옵션에서 실패했습니다.")
-        return None
+        if force_refresh:
+            self.stream_resolver.invalidate(normalized_url)
+        stream_url = self.stream_resolver.resolve(normalized_url)
+        if stream_url is None:
+            print("❌ 사용할 수 있는 스트림 포맷이 없습니다.")
+        return stream_url
     
     def get_video_source(self, source):
         """비디오 소스 결정"""
@@ -358,8 +352,76 @@ class YOLO11ObjectTracker:
         weighted_distance = center_distance * (2 - area_ratio)
         return weighted_distance
 
+    def apply_ai_results(self):
+        """워커 풀에서 완료된 AI 분석 결과를 해당 트랙에 반영"""
+        if not self.use_ai_analysis:
+            return
+        
+        for track_id, result in self.ai_analyzer.collect_results().items():
+            if track_id in self.tracked_objects:
+                self.tracked_objects[track_id]['ai_analysis'] = result['analysis']
+                self.tracked_objects[track_id]['detailed_name'] = result['detailed_name']
+                self.drift_monitor.set_reference(track_id)
+    
+    def submit_ai_analysis(self, frame):
+        """트랙 외형 서명을 갱신하고 후보 크롭을 모아, 최적 크롭이 준비된 트랙만 워커 풀에 제출"""
+        for obj_id, obj_data in self.tracked_objects.items():
+            try:
+                crop = self.ai_analyzer.get_object_crop(frame, obj_data['box'])
+                
+                # 외형 서명 갱신, 분석 이후 외형이 바뀐 트랙은 결과를 지우고 재분석 대상으로
+                if self.drift_monitor.update(obj_id, crop) and 'ai_analysis' in obj_data:
+                    print(f"🎨 트랙 {obj_id} 외형 변화 감지 - 재분석 요청")
+                    obj_data.pop('ai_analysis', None)
+                    obj_data.pop('detailed_name', None)
+                    self.ai_analyzer.invalidate_track(obj_id)
+                
+                # 첫 프레임에 로컬 속성(색상/대략적 타입)을 즉시 표시
+                if 'ai_analysis' not in obj_data:
+                    local = self.ai_analyzer.local_pre_analysis(obj_id, frame, obj_data['box'], obj_data['class'])
+                    if local:
+                        obj_data['ai_analysis'] = local
+                        obj_data['detailed_name'] = self.ai_analyzer.get_detailed_object_name(local, obj_data['class'])
+                        self.drift_monitor.set_reference(obj_id)
+                
+                # 원격 분석이 끝났거나 필요 없는 트랙, 고신뢰도가 아닌 객체는 제외
+                analysis = obj_data.get('ai_analysis')
+                if (analysis and not analysis.get('partial')) or obj_data['confidence'] <= 0.7:
+                    self.best_frame_selector.discard(obj_id)
+                    continue
+                if self.ai_analyzer.is_pending(obj_id):
+                    continue
+                if not self.ai_analyzer.should_analyze(obj_data['class'], obj_data['confidence']):
+                    continue
+                
+                self.best_frame_selector.add_candidate(
+                    obj_id, crop, obj_data['box'], obj_data['confidence'], frame.shape
+                )
+                
+                candidate = self.best_frame_selector.get_ready(obj_id)
+                if candidate is None:
+                    continue
+                
+                self.ai_analyzer.submit_analysis(
+                    obj_id, frame, candidate['box'], obj_data['class'], candidate['confidence'],
+                    stable_count=obj_data['stable_count'], crop=candidate['crop']
+                )
+            except Exception as e:
+                print(f"⚠️ AI 분석 제출 오류: {e}")
+    
+    def get_best_frame_stats(self):
+        """최적 프레임 선택 통계 반환 (품질/시간 초과로 제출된 수)"""
+        return self.best_frame_selector.get_stats()
+    
+    def get_drift_stats(self):
+        """외형 변화 감지 통계 반환 (변화로 인한 재분석 횟수)"""
+        return self.drift_monitor.get_stats()
+    
     def track_objects(self, detections):
         """YOLO11 최적화된 고급 객체 추적 로직"""
+        # 이전 프레임에서 제출한 AI 분석 결과 반영
+        self.apply_ai_results()
+        
         if not self.tracked_objects:
             # 첫 번째 프레임: 모든 검출을 새 객체로 등록
             for detection in detections:
@@ -553,33 +615,24 @@ class YOLO11ObjectTracker:
                             'confidence': confidence
                         }
                         
-                        # AI 상세 분석 (선택적, 간헐적)
-                        if (self.use_ai_analysis and 
-                            self.frame_count_for_ai % self.ai_analysis_interval == 0 and
-                            confidence > 0.7):  # 고신뢰도 객체만 분석
-                            
-                            try:
-                                ai_analysis = self.ai_analyzer.analyze_object_detailed(
-                                    frame, [x1, y1, x2, y2], class_name, confidence
-                                )
-                                if ai_analysis:
-                                    # 상세 정보를 객체 데이터에 추가
-                                    detection_data['ai_analysis'] = ai_analysis
-                                    detection_data['detailed_name'] = self.ai_analyzer.get_detailed_object_name(
-                                        ai_analysis, class_name
-                                    )
-                            except Exception as e:
-                                print(f"⚠️ AI 분석 오류: {e}")
-                        
                         valid_detections.append(detection_data)
                     else:
                         invalid_count += 1
         
-        self.frame_count_for_ai += 1
-        
         # YOLO11 최적화된 객체 추적
         self.track_objects(valid_detections)
         
+        # 사라진 트랙의 분석 캐시 정리 (캐시 수명 = 트랙 수명)
+        if self.use_ai_analysis:
+            self.ai_analyzer.prune_tracks(self.tracked_objects.keys())
+            self.best_frame_selector.prune(self.tracked_objects.keys())
+            self.drift_monitor.prune(self.tracked_objects.keys())
+        
+        # AI 상세 분석 후보 수집 및 작업 제출 (비동기)
+        if self.use_ai_analysis and self.frame_count_for_ai % self.ai_analysis_interval == 0:
+            self.submit_ai_analysis(frame)
+        self.frame_count_for_ai += 1
+        
         # 안정적인 객체만 표시
         stable_objects = {obj_id: obj_data for obj_id, obj_data in self.tracked_objects.items() 
                          if obj_data['stable_count'] >= self.stable_frames_required}
@@ -651,6 +704,9 @@ class YOLO11ObjectTracker:
                     self.model.conf = 0.5
                     self.model.iou = 0.4
                 
+                with self.frame_size_lock:
+                    self.frame_size_model = new_size
+                
                 print(f"✅ YOLO11 모델 변경 완료!")
                 print(f"🎯 새로운 설정 - 신뢰도: {self.model.conf}, NMS: {self.model.iou}")
                 return True
@@ -661,8 +717,112 @@ class YOLO11ObjectTracker:
                 return False
         return False
     
-    def run(self, source):
-        """YOLO11 메인 실행 함수"""
+    def get_model_frame_size(self, width, model_size=None):
+        """모델에 맞는 처리 해상도 (model_size가 없으면 현재 모델, 크기 조정이 필요 없으면 None)"""
+        model_size = model_size or self.current_model
+        if model_size in ['x', 'l']:
+            # 큰 모델은 고해상도 유지
+            if width > 1920:
+                return (1920, 1080)
+            elif width < 1280:
+                return (1280, 720)
+        elif model_size == 'm':
+            # 중간 모델은 적정 해상도
+            if width > 1280:
+                return (1280, 720)
+            elif width < 960:
+                return (960, 540)
+        else:
+            # 작은 모델은 낮은 해상도로 빠른 처리
+            if width > 960:
+                return (960, 540)
+            elif width < 640:
+                return (640, 480)
+        return None
+    
+    def resize_frame_for_model(self, frame):
+        """YOLO11 최적화된 프레임 크기 조정 (캡처 스레드에서 호출)"""
+        # 렌더링 스레드의 모델 변경('m' 키)과 겹치지 않도록 잠금 안에서 모델을 한 번만 읽음
+        with self.frame_size_lock:
+            model_size = self.frame_size_model
+        size = self.get_model_frame_size(frame.shape[1], model_size)
+        if size is not None and (frame.shape[1], frame.shape[0]) != size:
+            frame = cv2.resize(frame, size)
+        return frame
+    
+    def open_ffmpeg_capture(self, video_source, source_type):
+        """ffmpeg 파이프 캡처 열기 (디코딩 단계에서 모델 해상도로 변환, 첫 프레임을 못 받으면 None)"""
+        if not isinstance(video_source, str) or not ffmpeg_available():
+            print("⚠️ ffmpeg 캡처 사용 불가 (ffmpeg/ffprobe 없음 또는 웹캠 소스) - OpenCV 사용")
+            return None
+        
+        info = probe_video(video_source)
+        if info is None:
+            print("⚠️ ffprobe로 비디오 정보를 확인할 수 없음 - OpenCV 사용")
+            return None
+        
+        width, height = self.get_model_frame_size(info['width']) or (info['width'], info['height'])
+        cap = FFmpegCapture(
+            video_source, width, height,
+            fps=info['fps'],
+            realtime=source_type != "local_file"
+        )
+        if not cap.isOpened():
+            print("⚠️ ffmpeg 캡처를 열 수 없음 - OpenCV 사용")
+            return None
+        print(f"🎞️ ffmpeg 파이프 캡처: {info['width']}x{info['height']} → {width}x{height}")
+        return cap
+    
+    def open_capture(self, video_source, source_type, backend=None):
+        """캡처 열기 (ffmpeg 백엔드 우선, 불가하면 OpenCV - 열 수 없으면 None)"""
+        if video_source is None:
+            return None
+        
+        if (backend or self.capture_settings['backend']) == 'ffmpeg':
+            cap = self.open_ffmpeg_capture(video_source, source_type)
+            if cap is not None:
+                return cap
+        
+        # OpenCV VideoCapture 설정
+        cap = cv2.VideoCapture()
+        if source_type == "youtube":
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not cap.open(video_source):
+            cap.release()
+            return None
+        return cap
+    
+    def reopen_youtube_capture(self, source, source_type, backend=None):
+        """캐시된 스트림 URL을 버리고 다시 해석해 캡처 열기 (실패 시 None)"""
+        video_source = self.get_youtube_stream_url(source, force_refresh=True)
+        return self.open_capture(video_source, source_type, backend)
+    
+    def start_frame_capture(self, cap, drop_policy):
+        """캡처 스레드 시작 (디코딩/리사이즈를 처리 루프와 분리)"""
+        self.frame_capture = ThreadedFrameCapture(
+            cap,
+            ring_size=self.capture_settings['ring_size'],
+            policy=drop_policy,
+            preprocess=self.resize_frame_for_model
+        ).start()
+        print(f"📹 캡처 스레드 시작 (링 크기: {self.capture_settings['ring_size']}, 드롭 정책: {drop_policy})")
+        return self.frame_capture
+    
+    def get_capture_stats(self):
+        """캡처 스레드 통계 반환 (드롭 프레임 수, 대기열 체류 시간)"""
+        if self.frame_capture is None:
+            return {}
+        stats = self.frame_capture.get_stats()
+        if hasattr(self.frame_capture.cap, 'get_stats'):
+            stats['ingest'] = self.frame_capture.cap.get_stats()
+        return stats
+    
+    def run(self, source, drop_policy=None, backend=None):
+        """YOLO11 메인 실행 함수
+
+        drop_policy: 'drop_oldest' | 'drop_newest' | 'block' (None이면 소스 타입에 따라 자동 선택)
+        backend: 'opencv' | 'ffmpeg' (None이면 capture_settings['backend'])
+        """
         print("🚀" + "="*60)
         print(f"🎯 YOLO11 최신 모델로 비디오 처리 시작: {source}")
         print("="*60)
@@ -676,16 +836,13 @@ class YOLO11ObjectTracker:
         print(f"✅ 소스 타입: {source_type}")
         print("📹 동영상 스트림을 여는 중...")
         
-        # OpenCV VideoCapture 설정
-        cap = cv2.VideoCapture()
-        
-        if source_type == "youtube" and video_source:
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            success = cap.open(video_source)
-        else:
-            success = cap.open(video_source)
+        cap = self.open_capture(video_source, source_type, backend)
+        if cap is None and source_type == "youtube":
+            # 캐시된 URL이 만료/거부(403)된 경우 - 다시 해석해서 한 번 더 시도
+            print("⚠️ 스트림 URL로 열기 실패 - URL을 다시 해석합니다.")
+            cap = self.reopen_youtube_capture(source, source_type, backend)
         
-        if not success:
+        if cap is None:
             print("❌ 동영상을 열 수 없습니다.")
             return
         
@@ -712,32 +869,31 @@ class YOLO11ObjectTracker:
         show_info = True
         frame_count = 0
         
+        # 캡처 스레드 시작 (디코딩/리사이즈를 처리 루프와 분리)
+        if drop_policy is None:
+            drop_policy = (self.capture_settings['file_policy'] if source_type == "local_file"
+                           else self.capture_settings['live_policy'])
+        self.start_frame_capture(cap, drop_policy)
+        reconnects = 0
+        
         try:
             while True:
-                ret, frame = cap.read()
+                ret, frame = self.frame_capture.read()
                 if not ret:
+                    # YouTube 스트림 URL 만료/거부로 읽기가 끊기면 URL을 다시 해석해 재연결
+                    if source_type == "youtube" and reconnects < self.capture_settings['max_reconnects']:
+                        reconnects += 1
+                        print(f"⚠️ 스트림 읽기 실패 - URL을 다시 해석해 재연결합니다 "
+                              f"({reconnects}/{self.capture_settings['max_reconnects']})")
+                        self.frame_capture.stop()
+                        cap.release()
+                        cap = self.reopen_youtube_capture(source, source_type, backend)
+                        if cap is not None:
+                            self.start_frame_capture(cap, drop_policy)
+                            continue
                     print("프레임을 읽을 수 없습니다.")
                     break
-                
-                # YOLO11 최적화된 프레임 크기 조정
-                if self.current_model in ['x', 'l']:
-                    # 큰 모델은 고해상도 유지
-                    if frame.shape[1] > 1920:
-                        frame = cv2.resize(frame, (1920, 1080))
-                    elif frame.shape[1] < 1280:
-                        frame = cv2.resize(frame, (1280, 720))
-                elif self.current_model == 'm':
-                    # 중간 모델은 적정 해상도
-                    if frame.shape[1] > 1280:
-                        frame = cv2.resize(frame, (1280, 720))
-                    elif frame.shape[1] < 960:
-                        frame = cv2.resize(frame, (960, 540))
-                else:
-                    # 작은 모델은 낮은 해상도로 빠른 처리
-                    if frame.shape[1] > 960:
-                        frame = cv2.resize(frame, (960, 540))
-                    elif frame.shape[1] < 640:
-                        frame = cv2.resize(frame, (640, 480))
+                reconnects = 0
                 
                 # YOLO11 최적화된 객체 인식 및 추적
                 processed_frame = self.process_frame_yolo11(frame)
@@ -769,6 +925,10 @@ class YOLO11ObjectTracker:
                     self.valid_detections = 0
                     self.tracked_objects = {}
                     self.next_id = 1
+                    self.best_frame_selector.clear()
+                    self.drift_monitor.clear()
+                    if self.use_ai_analysis:
+                        self.ai_analyzer.reset_tracks()
                     print("🔄 YOLO11 통계가 리셋되었습니다.")
                 elif key == ord('m'):
                     # YOLO11 모델 변경 (순환)
@@ -792,7 +952,12 @@ class YOLO11ObjectTracker:
             print("🔚 사용자에 의해 중단되었습니다.")
         
         finally:
-            cap.release()
+            capture_stats = self.get_capture_stats()
+            self.frame_capture.stop()
+            if self.use_ai_analysis:
+                self.ai_analyzer.shutdown()
+            if cap is not None:
+                cap.release()
             cv2.destroyAllWindows()
             
             # YOLO11 최종 통계 출력
@@ -811,6 +976,10 @@ class YOLO11ObjectTracker:
                 print(f"🎯 검출 정확도: {final_accuracy:.2f}%")
                 print(f"🚀 평균 FPS: {self.current_fps:.1f}")
                 print(f"📹 처리 프레임: {frame_count:,}")
+                print(f"🗑️ 드롭 프레임: {capture_stats.get('dropped_frames', 0):,} "
+                      f"(건너뜀: {capture_stats.get('skipped_frames', 0):,})")
+                print(f"⏱️ 평균 대기열 지연: {capture_stats.get('avg_queue_age_ms', 0):.1f}ms "
+                      f"(최대: {capture_stats.get('max_queue_age_ms', 0):.1f}ms)")
                 print("="*60)
             
             print("🚀 YOLO11 최신 모델 프로그램이 종료되었습니다.")
@@ -841,6 +1010,7 @@ def main():
         print("  python yolo11_tracker.py 0          # 웹캠, Medium 모델")
         print("  python yolo11_tracker.py 0 x        # 웹캠, Extra Large 모델")
         print("  python yolo11_tracker.py youtube_url l  # YouTube, Large 모델")
+        print("  CAPTURE_BACKEND=ffmpeg python yolo11_tracker.py video.mp4  # ffmpeg 파이프 캡처 (디코딩 단계 크기 변환)")
         print("")
         print("🚀 YOLO11의 새로운 특징:")
         print("  • 향상된 정확도와 속도")